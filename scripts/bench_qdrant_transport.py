@@ -0,0 +1,131 @@
+"""
+Benchmark de transporte do Qdrant: REST vs gRPC, com as opções de conexão
+da API (`qdrant_client_kwargs`: timeout e pool).
+
+Para cada transporte mede:
+- latência (p50/p95) de buscas sequenciais no cliente síncrono;
+- throughput (buscas/s) no cliente assíncrono com N buscas simultâneas.
+
+Inclui o REST com as opções padrão do qdrant-client (sem keep-alive em
+localhost) como referência. Cria a coleção temporária
+`<coleção>__bench_transport` com vetores sintéticos e a apaga no fim.
+Requer um Qdrant local com as portas REST e gRPC expostas (docker-compose).
+
+Uso:
+    uv run python scripts/bench_qdrant_transport.py [--points 20000] [--queries 500] [--concurrency 1 8 32]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+
+from src.core.vector_store_config import VectorStoreConfig
+from src.providers.qdrant_vector_store_provider import build_vectors_config, qdrant_client_kwargs
+
+
+def transports(base: VectorStoreConfig) -> dict[str, dict]:
+    return {
+        "rest (padrão qdrant-client)": {"url": base.url, "timeout": base.timeout},
+        f"rest (pool {base.pool_size})": qdrant_client_kwargs(base.model_copy(update={"prefer_grpc": False})),
+        f"grpc (pool {base.pool_size})": qdrant_client_kwargs(base.model_copy(update={"prefer_grpc": True})),
+    }
+
+
+def create_collection(client: QdrantClient, cfg: VectorStoreConfig, name: str, vectors: np.ndarray) -> None:
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(collection_name=name, vectors_config=build_vectors_config(cfg, vectors.shape[1]))
+    client.upload_collection(name, vectors=vectors, ids=list(range(len(vectors))), batch_size=256, wait=True)
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+
+def sequential_latencies(client: QdrantClient, name: str, queries: np.ndarray, k: int) -> list[float]:
+    latencies = []
+    for query in queries:
+        inicio = time.perf_counter()
+        client.query_points(name, query=query.tolist(), limit=k)
+        latencies.append((time.perf_counter() - inicio) * 1000)
+    return latencies
+
+
+async def throughput(client: AsyncQdrantClient, name: str, queries: np.ndarray, k: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query: np.ndarray) -> None:
+        async with semaphore:
+            await client.query_points(name, query=query.tolist(), limit=k)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in queries))
+    return len(queries) / (time.perf_counter() - inicio)
+
+
+async def bench_async(kwargs: dict, name: str, queries: np.ndarray, k: int, concurrency: list[int]) -> list[float]:
+    client = AsyncQdrantClient(**kwargs)
+    try:
+        # Aquecimento: abre as conexões/canais antes de medir
+        await throughput(client, name, queries[:10], k, 1)
+        return [await throughput(client, name, queries, k, c) for c in concurrency]
+    finally:
+        await client.close()
+
+
+def main() -> None:
+    base = VectorStoreConfig()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=base.url)
+    parser.add_argument("--collection", default=base.collection_name)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--keep", action="store_true", help="Não apaga a coleção de benchmark.")
+    args = parser.parse_args()
+    base = base.model_copy(update={"url": args.url})
+
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((args.points, args.dim)).astype(np.float32)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    name = f"{args.collection}__bench_transport"
+
+    setup = QdrantClient(**qdrant_client_kwargs(base))
+    create_collection(setup, base, name, vectors)
+    print(f"{args.points} vetores, dim={args.dim}, {args.queries} queries, k={args.k}\n")
+
+    header = f"{'transporte':<28} {'p50 ms':>8} {'p95 ms':>8}" + "".join(
+        f" {f'{c} simult.':>12}" for c in args.concurrency
+    )
+    print(header + "   (buscas/s)")
+    print("-" * len(header))
+    try:
+        for label, kwargs in transports(base).items():
+            client = QdrantClient(**kwargs)
+            try:
+                sequential_latencies(client, name, queries[:10], args.k)
+                latencies = sequential_latencies(client, name, queries, args.k)
+            finally:
+                client.close()
+            qps = asyncio.run(bench_async(kwargs, name, queries, args.k, args.concurrency))
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            print(
+                f"{label:<28} {statistics.median(latencies):>8.2f} {p95:>8.2f}"
+                + "".join(f" {value:>12.0f}" for value in qps)
+            )
+    finally:
+        if not args.keep:
+            setup.delete_collection(name)
+        setup.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark de quantização no Qdrant: memória, latência e recall@k de cada
+modo (none / scalar / binary, com e sem rescoring) contra a busca exata
+sem quantização.
+
+Cria coleções temporárias `<coleção>__bench_<modo>` com os vetores da
+coleção atual (ou vetores sintéticos com `--synthetic`) e as apaga no fim.
+A memória é estimada pelo tamanho dos vetores: o Qdrant não expõe RAM por
+coleção.
+
+Uso:
+    uv run python scripts/bench_quantization.py [--k 5] [--queries 200] [--oversampling 1 2 4]
+    uv run python scripts/bench_quantization.py --synthetic 50000 --dim 768
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from qdrant_client import QdrantClient, models
+
+from src.core.vector_store_config import VectorStoreConfig
+from src.providers.qdrant_vector_store_provider import (
+    build_quantization_config,
+    build_search_params,
+    build_vectors_config,
+)
+
+BYTES_PER_DIM = {"none": 4.0, "scalar": 1.0, "binary": 1 / 8}
+
+
+def load_vectors(client: QdrantClient, collection: str) -> np.ndarray:
+    vectors, offset = [], None
+    while True:
+        points, offset = client.scroll(collection, limit=1000, offset=offset, with_vectors=True, with_payload=False)
+        for point in points:
+            vector = point.vector.get("", next(iter(point.vector.values()))) if isinstance(point.vector, dict) else point.vector
+            vectors.append(vector)
+        if offset is None:
+            return np.asarray(vectors, dtype=np.float32)
+
+
+def create_bench_collection(client: QdrantClient, cfg: VectorStoreConfig, name: str, vectors: np.ndarray) -> None:
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=build_vectors_config(cfg, vectors.shape[1]),
+        quantization_config=build_quantization_config(cfg),
+        # Indexa (e quantiza) desde o primeiro segmento, como numa coleção grande
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+    )
+    client.upload_collection(name, vectors=vectors, ids=list(range(len(vectors))), batch_size=256, wait=True)
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+
+def run_queries(client, name, queries, k, params) -> tuple[list[list[int]], list[float]]:
+    ids, latencies = [], []
+    for query in queries:
+        inicio = time.perf_counter()
+        response = client.query_points(name, query=query.tolist(), limit=k, search_params=params)
+        latencies.append((time.perf_counter() - inicio) * 1000)
+        ids.append([point.id for point in response.points])
+    return ids, latencies
+
+
+def recall(found: list[list[int]], truth: list[list[int]]) -> float:
+    return statistics.mean(len(set(f) & set(t)) / len(t) for f, t in zip(found, truth) if t)
+
+
+def main() -> None:
+    base = VectorStoreConfig()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=base.url, help='URL do Qdrant (ou ":memory:" para testar o script)')
+    parser.add_argument("--collection", default=base.collection_name)
+    parser.add_argument("--synthetic", type=int, default=0, help="Usa N vetores aleatórios em vez da coleção.")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--modes", nargs="+", default=["scalar", "binary"], choices=["scalar", "binary"])
+    parser.add_argument("--keep", action="store_true", help="Não apaga as coleções de benchmark.")
+    args = parser.parse_args()
+
+    client = QdrantClient(location=args.url)
+    rng = np.random.default_rng(42)
+    if args.synthetic:
+        vectors = rng.standard_normal((args.synthetic, args.dim)).astype(np.float32)
+    else:
+        vectors = load_vectors(client, args.collection)
+    if len(vectors) == 0:
+        sys.exit(f"Coleção {args.collection!r} vazia; rode a ingestão ou use --synthetic N")
+
+    # Queries: vetores da coleção com ruído (próximas de documentos reais)
+    sample = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+    queries = sample + rng.normal(scale=0.1 * float(np.abs(sample).mean()), size=sample.shape).astype(np.float32)
+    n, dim = vectors.shape
+    print(f"{n} vetores, dim={dim}, {len(queries)} queries, k={args.k}\n")
+
+    created = []
+    try:
+        plain_cfg = base.model_copy(update={"quantization": "none"})
+        plain = f"{args.collection}__bench_none"
+        create_bench_collection(client, plain_cfg, plain, vectors)
+        created.append(plain)
+        truth, _ = run_queries(client, plain, queries, args.k, models.SearchParams(exact=True))
+
+        header = f"{'modo':<28} {'RAM (vetores)':>14} {'disco':>10} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}"
+        print(header)
+        print("-" * len(header))
+
+        def report(label: str, mode: str, latencies: list[float], found: list[list[int]]) -> None:
+            ram_mb = n * dim * BYTES_PER_DIM[mode] / 1e6
+            disk_mb = n * dim * 4 / 1e6 if mode != "none" and base.on_disk_vectors else 0.0
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            print(
+                f"{label:<28} {ram_mb:>11.1f} MB {disk_mb:>7.1f} MB "
+                f"{statistics.median(latencies):>8.2f} {p95:>8.2f} {recall(found, truth):>9.3f}"
+            )
+
+        found, latencies = run_queries(client, plain, queries, args.k, None)
+        report("none (HNSW)", "none", latencies, found)
+
+        for mode in args.modes:
+            cfg = base.model_copy(update={"quantization": mode})
+            name = f"{args.collection}__bench_{mode}"
+            create_bench_collection(client, cfg, name, vectors)
+            created.append(name)
+
+            no_rescore = build_search_params(cfg.model_copy(update={"rescore": False, "oversampling": 1.0}))
+            found, latencies = run_queries(client, name, queries, args.k, no_rescore)
+            report(f"{mode} sem rescoring", mode, latencies, found)
+            for oversampling in args.oversampling:
+                params = build_search_params(cfg.model_copy(update={"rescore": True, "oversampling": oversampling}))
+                found, latencies = run_queries(client, name, queries, args.k, params)
+                report(f"{mode} rescore x{oversampling:g}", mode, latencies, found)
+    finally:
+        if not args.keep:
+            for name in created:
+                client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark da contagem de tokens.
+
+Compara, sobre os chunks dos PDFs de `data/`:
+- heurística antiga (`estimate_tokens`, ~4 caracteres por token);
+- `TokenCounter.count`, um chunk por vez;
+- `TokenCounter.count_batch` (o que a ingestão usa para gravar `token_count`);
+- caminho da consulta: só somar os `token_count` já gravados.
+
+Mostra também o erro médio da heurística em relação ao encoder.
+
+Uso:
+    uv run python scripts/bench_token_counting.py [--data-dir data] [--repeat 3] [--top-k 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.ingestion.chunking import ChunkingService
+from src.ingestion.document_loader import list_source_files, load_file
+from src.utils.rag_helpers import estimate_tokens
+from src.utils.token_counter import TOKEN_COUNT_METADATA_KEY, TokenCounter
+
+
+def timed(fn) -> tuple[object, float]:
+    inicio = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - inicio
+
+
+def report(label: str, elapsed: float, texts: int, tokens: int) -> None:
+    print(f"{label:>24}: {elapsed * 1000:9.2f} ms  {texts / elapsed:12.0f} textos/s  {tokens / elapsed:14.0f} tokens/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--repeat", type=int, default=3, help="repete os chunks para ter volume")
+    parser.add_argument("--top-k", type=int, default=5, help="chunks somados por consulta")
+    args = parser.parse_args()
+
+    docs = [doc for path in list_source_files(args.data_dir) for doc in load_file(path)]
+    if not docs:
+        sys.exit(f"Nenhum documento em {args.data_dir}/")
+    chunks = ChunkingService().split(docs)
+    texts = [chunk.page_content for chunk in chunks] * args.repeat
+
+    counter = TokenCounter()
+    _, load_s = timed(lambda: counter.backend)
+    print(f"{len(texts)} chunks, encoder: {counter.backend} (carga {load_s * 1000:.1f} ms, uma vez por processo)")
+
+    heuristic, elapsed = timed(lambda: [estimate_tokens(text) for text in texts])
+    report("heurística", elapsed, len(texts), sum(heuristic))
+
+    single, elapsed = timed(lambda: [counter.count(text) for text in texts])
+    report("count (um por vez)", elapsed, len(texts), sum(single))
+
+    batch, elapsed = timed(lambda: counter.count_batch(texts))
+    report("count_batch", elapsed, len(texts), sum(batch))
+    assert batch == single
+
+    counts = [chunk.metadata[TOKEN_COUNT_METADATA_KEY] for chunk in chunks]
+    queries = [counts[i : i + args.top_k] for i in range(0, len(counts), args.top_k)]
+    _, elapsed = timed(lambda: [sum(query) for query in queries])
+    print(f"{'consulta (soma payload)':>24}: {elapsed * 1e6 / len(queries):9.3f} µs por consulta de top_k={args.top_k}")
+
+    erro = sum(abs(h - b) / b for h, b in zip(heuristic, batch) if b) / len(batch)
+    print(f"erro médio da heurística vs encoder: {erro * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
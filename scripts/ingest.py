@@ -1,18 +1,49 @@
+import argparse
 
 from src.clients.vector_store_client import get_vector_store_client
-from src.ingestion.document_loader import load_documents
-from src.ingestion.chunking import chunk_documents
+from src.ingestion.incremental import IncrementalIngestor
 
 
 def main():
-    docs = load_documents()
-    chunks = chunk_documents(docs)
+    parser = argparse.ArgumentParser(description="Indexa a pasta data/ no Vector DB (incremental).")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--batch-size", type=int, default=None, help="Chunks por lote de embedding/upsert.")
+    parser.add_argument("--queue-size", type=int, default=None, help="Lotes em voo entre etapas.")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Processos para o parsing de PDFs (1 = em série)."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reprocessa e reembeda todos os arquivos, ignorando o manifest.",
+    )
+    args = parser.parse_args()
 
-    vs_client = get_vector_store_client()
-    vs_client.index(chunks)
+    ingestor = IncrementalIngestor(
+        get_vector_store_client(),
+        data_dir=args.data_dir,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        parse_workers=args.workers,
+    )
+    report = ingestor.run(force=args.force)
 
-    print("Indexação concluída.")
+    print(
+        f"Arquivos: {report.files_added} novos, {report.files_changed} alterados, "
+        f"{report.files_removed} removidos, {report.files_unchanged} sem mudança."
+    )
+    print(
+        f"Chunks: {report.chunks_upserted} embedados, {report.chunks_reused} reaproveitados; "
+        f"{report.points_deleted} pontos removidos."
+    )
+    if report.files_failed:
+        print(f"Falharam (serão tentados de novo): {', '.join(report.files_failed)}")
+    if report.stages:
+        print(f"Pipeline ({report.elapsed_seconds:.1f}s):")
+        for stage in report.stages:
+            print(f"  {stage}")
+    print("Indexação concluída." if report.changed else "Nada a indexar.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
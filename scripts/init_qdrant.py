@@ -1,22 +1,31 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
-
 from src.clients.embedding_client import get_embeddings_client
 from src.core.vector_store_config import VectorStoreConfig
+from src.providers.qdrant_vector_store_provider import (
+    build_qdrant_client,
+    build_quantization_config,
+    build_vectors_config,
+)
 
 def main() -> None:
     cfg = VectorStoreConfig()
-    client = QdrantClient(url=cfg.url)
+    # Mesmas opções de conexão da API (gRPC/REST, timeout, pool)
+    client = build_qdrant_client(cfg)
     emb_client = get_embeddings_client()
     dim = len(emb_client.embed_query("test"))
+    quantization = build_quantization_config(cfg)
     if cfg.collection_name not in [c.name for c in client.get_collections().collections]:
         client.create_collection(
             collection_name=cfg.collection_name,
-            vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+            vectors_config=build_vectors_config(cfg, dim),
+            quantization_config=quantization,
         )
-        print(f"Collection {cfg.collection_name!r} criada com dim={dim}.")
+        print(f"Collection {cfg.collection_name!r} criada com dim={dim}, quantização={cfg.quantization}.")
+    elif quantization is not None:
+        # Coleção existente: o Qdrant quantiza os vetores já indexados em background
+        client.update_collection(collection_name=cfg.collection_name, quantization_config=quantization)
+        print(f"Collection {cfg.collection_name!r} já existe; quantização={cfg.quantization} aplicada.")
     else:
         print(f"Collection {cfg.collection_name!r} já existe.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,6 +1,9 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
 from src.api.v1.query_api import qa_router
+from src.core.lifecycle import resources
+from src.providers.ollama_provider import ollama_provider
 
 
 router = APIRouter(prefix="/api")
@@ -14,6 +17,21 @@ async def health_check() -> dict:
     return {"status": "healthy"}
 
 
+@router.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """
+    Readiness: 200 só depois de inicializar os recursos (Vector DB, Langfuse,
+    serviços) e do warm-up dos modelos no Ollama (503 antes), para o
+    orquestrador mandar tráfego apenas para instâncias prontas. Traz o estado
+    e o tempo de inicialização de cada dependência.
+    """
+    status = resources.readiness()
+    ollama = ollama_provider.readiness()
+    ready = status["ready"] and ollama["ready"]
+    body = {"ready": ready, "resources": status["resources"], "ollama": ollama}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
 @router.get("/")
 async def root() -> dict:
     """Endpoint raiz com informações básicas da API."""
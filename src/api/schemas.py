@@ -2,9 +2,13 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
+from src.core.config import settings
+
 class QueryRequest(BaseModel):
     question: str = Field(..., description="Pergunta do usuário")
     top_k: Optional[int] = Field(None, description="Número de documentos a recuperar (opcional)")
+    hnsw_ef: Optional[int] = Field(None, ge=1, description="ef da busca HNSW só nesta pergunta: mais recall, mais latência (opcional; padrão VECTOR_DB_HNSW_EF)")
+    exact: Optional[bool] = Field(None, description="Busca exata (força bruta) só nesta pergunta (opcional; padrão VECTOR_DB_EXACT)")
 
 class Citation(BaseModel):
     source: str = Field(..., description="Nome do documento fonte")
@@ -15,20 +19,47 @@ class Citation(BaseModel):
 class Metrics(BaseModel):
     total_latency_ms: float = Field(..., description="Latência total em milissegundos")
     retrieval_latency_ms: float = Field(..., description="Latência do retrieval em milissegundos")
+    dense_retrieval_latency_ms: Optional[float] = Field(None, description="Latência da busca vetorial (embedding + Vector DB) em milissegundos")
+    sparse_retrieval_latency_ms: Optional[float] = Field(None, description="Latência da busca lexical BM25 em milissegundos (apenas modo híbrido)")
+    fusion_latency_ms: Optional[float] = Field(None, description="Latência da fusão RRF em milissegundos (apenas modo híbrido)")
+    rerank_latency_ms: Optional[float] = Field(None, description="Latência do reranking em milissegundos (apenas ENABLE_RERANKING)")
+    rerank_fallback: Optional[bool] = Field(None, description="Reranking estourou o orçamento de tempo e manteve a ordem do retrieval")
     generation_latency_ms: float = Field(..., description="Latência da geração em milissegundos")
+    guardrail_latency_ms: float = Field(0.0, description="Latência dos guardrails (regex + LLM) em milissegundos")
+    parallel_savings_ms: float = Field(0.0, description="Tempo economizado ao rodar o guardrail LLM em paralelo com o retrieval")
+    tracing_latency_ms: float = Field(0.0, description="Overhead do tracing no caminho da requisição em milissegundos")
     prompt_tokens: int = Field(..., description="Número de tokens do prompt")
     completion_tokens: int = Field(..., description="Número de tokens da resposta")
     estimated_cost_usd: float = Field(..., description="Custo estimado em USD")
     top_k_used: int = Field(..., description="Top-K utilizado na busca")
     context_size_chars: int = Field(..., description="Tamanho do contexto em caracteres")
+    context_tokens_saved: int = Field(0, description="Tokens economizados no contexto (chunks sobrepostos juntados e limite de tokens)")
+    context_chunks_dropped: int = Field(0, description="Chunks recuperados que não couberam em CONTEXT_MAX_TOKENS")
+    time_to_first_token_ms: Optional[float] = Field(None, description="Tempo até o primeiro token gerado (apenas streaming)")
+    tokens_per_second: Optional[float] = Field(None, description="Throughput da geração em tokens por segundo")
+    insufficient_context: bool = Field(False, description="Nenhum chunk passou de MIN_RELEVANCE_SCORE: resposta padrão, sem chamar o LLM")
+    cache_hit: bool = Field(False, description="Resposta servida pelo cache semântico (sem retrieval nem geração)")
+    cache_similarity: Optional[float] = Field(None, description="Similaridade de cosseno com a pergunta cacheada (se cache_hit)")
 
 class GuardrailStatus(BaseModel):
     blocked: bool = Field(..., description="Indica se a requisição foi bloqueada")
     reason: Optional[str] = Field(None, description="Motivo do bloqueio (se aplicável)")
 
+class BatchQueryRequest(BaseModel):
+    questions: List[QueryRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BATCH_MAX_QUESTIONS,
+        description="Perguntas do lote (cada uma com seu top_k opcional)",
+    )
+
 class QueryResponse(BaseModel):
     answer: Optional[str] = Field(None, description="Resposta gerada (null se bloqueado)")
     citations: List[Citation] = Field(default_factory=list, description="Lista de citações")
     metrics: Metrics = Field(..., description="Métricas de execução")
     guardrail_status: GuardrailStatus = Field(..., description="Status dos guardrails")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp da requisição")
\ No newline at end of file
+    timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp da requisição")
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse] = Field(..., description="Respostas na mesma ordem das perguntas")
+    total_latency_ms: float = Field(..., description="Latência total do lote em milissegundos")
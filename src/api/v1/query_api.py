@@ -1,7 +1,14 @@
+import json
+import time
+from typing import Any, AsyncIterator
+
 from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
-from src.api.schemas import QueryRequest, QueryResponse
+from src.api.schemas import BatchQueryRequest, BatchQueryResponse, QueryRequest, QueryResponse
 from src.services.qa_service import qa_service
+from src.utils.logger import logger
 
 
 
@@ -9,7 +16,7 @@ qa_router = APIRouter(prefix="/v1", tags=["qa"])
 
 
 @qa_router.post("/query", response_model=QueryResponse)
-def query_endpoint(payload: QueryRequest) -> QueryResponse:
+async def query_endpoint(payload: QueryRequest) -> QueryResponse:
     """
     Endpoint único de pergunta e resposta (Q&A).
 
@@ -18,6 +25,54 @@ def query_endpoint(payload: QueryRequest) -> QueryResponse:
     - Saída: answer, citations, metrics, guardrail_status.
     """
     try:
-        return qa_service.handle_query(payload)
+        return await qa_service.handle_query(payload)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@qa_router.post("/query/batch", response_model=BatchQueryResponse)
+async def query_batch_endpoint(payload: BatchQueryRequest) -> BatchQueryResponse:
+    """
+    Endpoint de Q&A em lote (avaliações offline, integrações em massa).
+
+    Guardrails para todas as perguntas, embedding + busca vetorial em lote e
+    geração com concorrência limitada. `results` segue a ordem de `questions`.
+    """
+    inicio = time.monotonic()
+    try:
+        results = await qa_service.handle_batch(payload.questions)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return BatchQueryResponse(
+        results=results,
+        total_latency_ms=round((time.monotonic() - inicio) * 1000, 2),
+    )
+
+
+def _format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+
+async def _sse_stream(payload: QueryRequest) -> AsyncIterator[str]:
+    try:
+        async for event, data in qa_service.stream_query(payload):
+            yield _format_sse(event, data)
+    except Exception as exc:
+        # O status 200 já foi enviado; o erro vira um evento do stream.
+        logger.exception("Erro no streaming da query")
+        yield _format_sse("error", {"detail": str(exc)})
+
+
+@qa_router.post("/query/stream")
+async def query_stream_endpoint(payload: QueryRequest) -> StreamingResponse:
+    """
+    Variante em streaming (Server-Sent Events) do endpoint de Q&A.
+
+    Eventos, em ordem: `guardrail`, `citations`, `token` (vários), `metrics`.
+    Em caso de falha no meio do stream é enviado um evento `error`.
+    """
+    return StreamingResponse(
+        _sse_stream(payload),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -5,6 +5,8 @@ from functools import lru_cache
 from src.providers.embedding_provider import EmbeddingProvider
 from src.core.embeddings_config import EmbeddingsConfig
 from src.providers.ollama_embedding_provider import OllamaEmbeddingProvider
+from src.providers.cached_embedding_provider import CachedEmbeddingProvider
+from src.utils.cache import SQLiteStore
 
 
 
@@ -23,6 +25,12 @@ class EmbeddingsClient:
     def embed_documents(self, texts: Iterable[str]) -> List[List[float]]:
         return self._provider.embed_documents(texts)
 
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._provider.aembed_query(text)
+
+    async def aembed_documents(self, texts: Iterable[str]) -> List[List[float]]:
+        return await self._provider.aembed_documents(texts)
+
     @property
     def as_langchain_embeddings(self):
         """
@@ -40,11 +48,18 @@ def _build_provider_from_env() -> EmbeddingProvider:
 
     backend = os.getenv("EMBEDDING_BACKEND", "ollama").lower()
 
+    cfg = EmbeddingsConfig()
+
     if backend == "ollama":
-        cfg = EmbeddingsConfig()
-        return OllamaEmbeddingProvider(cfg)
+        provider: EmbeddingProvider = OllamaEmbeddingProvider(cfg)
+    else:
+        raise ValueError(f"Backend de embedding não suportado: {backend}")
+
+    if cfg.cache_max_bytes > 0:
+        store = SQLiteStore(cfg.cache_path, table="embeddings") if cfg.cache_path else None
+        provider = CachedEmbeddingProvider(provider, max_bytes=cfg.cache_max_bytes, store=store)
 
-    raise ValueError(f"Backend de embedding não suportado: {backend}")
+    return provider
 
 
 @lru_cache(maxsize=1)
@@ -1,26 +1,177 @@
-from typing import List
+import asyncio
+import time
+from typing import Dict, List, Optional
 
 from langchain_core.documents import Document
 
 from src.core.config import settings
+from src.core.lifecycle import resources
+from src.core.types import RetrievalResult
 from src.clients.vector_store_client import get_vector_store_client, VectorStoreClient
+from src.providers.vector_store_provider import SCORE_METADATA_KEY
+
+
+def _doc_key(doc: Document) -> str:
+    point_id = doc.metadata.get("_id")
+    return str(point_id) if point_id is not None else doc.page_content
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Funde rankings por RRF: score = soma de 1 / (rrf_k + posição). Só usa
+    posições (não os scores), então combina BM25 e cosseno sem calibração.
+    O score fundido vai em `metadata["_rrf_score"]`.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            if key in docs:
+                # Mesmo ponto nas duas buscas: junta os metadados (score denso + BM25)
+                docs[key] = Document(page_content=docs[key].page_content, metadata={**doc.metadata, **docs[key].metadata})
+            else:
+                docs[key] = doc
+    fused = sorted(scores, key=lambda key: scores[key], reverse=True)[:k]
+    return [
+        Document(page_content=docs[key].page_content, metadata={**docs[key].metadata, "_rrf_score": scores[key]})
+        for key in fused
+    ]
+
+
+def apply_score_threshold(docs: List[Document], min_score: float) -> List[Document]:
+    """
+    Corta os chunks com score de similaridade abaixo de `min_score` (<= 0
+    desativa). Chunks sem score (vindos só do BM25 no modo híbrido) seguem
+    junto, mas só se algum chunk da busca densa passou: se nenhum passou,
+    não há contexto relevante e o resultado é vazio.
+    """
+    if min_score <= 0:
+        return docs
+    passed = [
+        doc for doc in docs
+        if doc.metadata.get(SCORE_METADATA_KEY) is None or doc.metadata[SCORE_METADATA_KEY] >= min_score
+    ]
+    if not any(doc.metadata.get(SCORE_METADATA_KEY) is not None for doc in passed):
+        return []
+    return passed
 
 
 class RetrievalClient:
     """
     Camada de alto nível para recuperação de documentos.
     Abstracao de Vector Store.
+
+    Em `RETRIEVAL_MODE=hybrid`, a busca densa (Vector DB) e a lexical (BM25)
+    rodam em paralelo, cada uma com `HYBRID_CANDIDATES` candidatos, e são
+    fundidas por Reciprocal Rank Fusion.
     """
 
-    def __init__(self, client: VectorStoreClient | None = None) -> None:
+    def __init__(self, client: VectorStoreClient | None = None, mode: str | None = None) -> None:
         self._client = client or get_vector_store_client()
+        self._mode = (mode or settings.RETRIEVAL_MODE).lower()
+
+    @property
+    def hybrid(self) -> bool:
+        return self._mode == "hybrid" and self._client.sparse_index is not None
+
+    def _candidates(self, k: int) -> int:
+        return max(k, settings.HYBRID_CANDIDATES)
 
     def retrieve(self, query: str, top_k: int | None = None) -> List[Document]:
         """
         Recupera documentos relevantes para a query.
         """
         k = top_k or settings.DEFAULT_TOP_K
-        return self._client.retrieve(query, k=k)
+        if not self.hybrid:
+            return self._client.retrieve(query, k=k)
+        dense = self._client.retrieve(query, k=self._candidates(k))
+        sparse = self._client.sparse_index.search(query, self._candidates(k))
+        return reciprocal_rank_fusion([dense, sparse], k, settings.RRF_K)
+
+    async def asearch(
+        self,
+        query: str,
+        top_k: int | None = None,
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> RetrievalResult:
+        """
+        Retrieval com a latência de cada etapa (densa, lexical e fusão),
+        reportada nas métricas da API. `with_vectors`, `hnsw_ef` e `exact`
+        (só a busca densa): ver `VectorStoreProvider.asimilarity_search`.
+        """
+        k = top_k or settings.DEFAULT_TOP_K
+        inicio = time.monotonic()
+        if not self.hybrid:
+            docs = await self._client.aretrieve(query, k=k, with_vectors=with_vectors, hnsw_ef=hnsw_ef, exact=exact)
+            return RetrievalResult(docs=docs, dense_latency_ms=round((time.monotonic() - inicio) * 1000, 2))
+
+        async def dense() -> tuple[List[Document], float]:
+            docs = await self._client.aretrieve(
+                query, k=self._candidates(k), with_vectors=with_vectors, hnsw_ef=hnsw_ef, exact=exact
+            )
+            return docs, (time.monotonic() - inicio) * 1000
+
+        def sparse() -> tuple[List[Document], float]:
+            started = time.monotonic()
+            docs = self._client.sparse_index.search(query, self._candidates(k))
+            return docs, (time.monotonic() - started) * 1000
+
+        # BM25 é CPU em processo: numa thread, para sobrepor à ida ao Vector DB
+        (dense_docs, dense_ms), (sparse_docs, sparse_ms) = await asyncio.gather(dense(), asyncio.to_thread(sparse))
+        inicio_fusao = time.monotonic()
+        docs = reciprocal_rank_fusion([dense_docs, sparse_docs], k, settings.RRF_K)
+        return RetrievalResult(
+            docs=docs,
+            dense_latency_ms=round(dense_ms, 2),
+            sparse_latency_ms=round(sparse_ms, 2),
+            fusion_latency_ms=round((time.monotonic() - inicio_fusao) * 1000, 3),
+        )
+
+    async def aretrieve(self, query: str, top_k: int | None = None) -> List[Document]:
+        """
+        Versão assíncrona de `retrieve`, usada pelo pipeline da API.
+        """
+        return (await self.asearch(query, top_k=top_k)).docs
+
+    async def abatch_retrieve(
+        self,
+        queries: List[str],
+        top_k: List[Optional[int]] | None = None,
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[List[Document]]:
+        """
+        Recupera documentos para várias queries de uma vez (embedding em lote
+        + batch search no Vector DB). Resultado na mesma ordem das queries.
+        """
+        ks = [k or settings.DEFAULT_TOP_K for k in (top_k or [None] * len(queries))]
+        if not self.hybrid:
+            return await self._client.abatch_retrieve(
+                queries, k=ks, with_vectors=with_vectors, hnsw_ef=hnsw_ef, exact=exact
+            )
+
+        sparse_index = self._client.sparse_index
+        dense_results, sparse_results = await asyncio.gather(
+            self._client.abatch_retrieve(
+                queries, k=[self._candidates(k) for k in ks], with_vectors=with_vectors, hnsw_ef=hnsw_ef, exact=exact
+            ),
+            asyncio.to_thread(
+                lambda: [sparse_index.search(query, self._candidates(k)) for query, k in zip(queries, ks)]
+            ),
+        )
+        return [
+            reciprocal_rank_fusion([dense, sparse], k, settings.RRF_K)
+            for dense, sparse, k in zip(dense_results, sparse_results, ks)
+        ]
+
+    async def aclose(self) -> None:
+        """Fecha as conexões com o Vector DB (shutdown da API)."""
+        await self._client.aclose()
 
     def retriever(self, top_k: int | None = None):
         """
@@ -30,4 +181,5 @@ class RetrievalClient:
         return self._client.retriever(k=k)
 
 
-retrieval_client = RetrievalClient()
\ No newline at end of file
+# Criado no startup da API ou no primeiro uso: o construtor conecta no Vector DB
+retrieval_client = resources.register("vector_store", RetrievalClient, shutdown=RetrievalClient.aclose)
@@ -2,34 +2,113 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 from langchain_core.documents import Document
 from langchain_core.vectorstores import VectorStoreRetriever
 
 from src.providers.vector_store_provider import VectorStoreProvider
-from src.providers.qdrant_vector_store_provider import QdrantVectorStoreProvider
+from src.core.config import settings
 from src.core.vector_store_config import VectorStoreConfig
 from src.clients.embedding_client import get_embeddings_client
+from src.utils.bm25 import BM25Index
+from src.utils.index_version import bump_index_version
 
 
 class VectorStoreClient:
     """
     Fachada de alto nível para o Vector DB.
     Depende só da interface VectorStoreProvider.
+
+    Com `sparse_index`, toda escrita com IDs (upsert/delete) também atualiza
+    o índice lexical BM25, que fica sincronizado com o Vector DB.
+
+    A versão do índice (que invalida o cache semântico de respostas da API)
+    muda uma vez por `flush` com escritas pendentes, não a cada lote.
     """
 
-    def __init__(self, provider: VectorStoreProvider, k_default: int = 5) -> None:
+    def __init__(
+        self, provider: VectorStoreProvider, k_default: int = 5, sparse_index: Optional[BM25Index] = None
+    ) -> None:
         self._provider = provider
         self._k_default = k_default
+        self._sparse_index = sparse_index
+        self._changed = False
+
+    @property
+    def sparse_index(self) -> Optional[BM25Index]:
+        return self._sparse_index
 
     def index(self, documents: List[Document]) -> None:
         self._provider.index_documents(documents)
+        self._changed = True
+        self.flush()
+
+    def upsert(self, documents: List[Document], ids: List[str]) -> None:
+        self._provider.upsert_documents(documents, ids)
+        if self._sparse_index is not None:
+            self._sparse_index.upsert(documents, ids)
+        self._changed = True
+        self.flush()
+
+    def upsert_vectors(self, documents: List[Document], vectors: List[List[float]], ids: List[str]) -> None:
+        """Caminho quente da ingestão: quem chama decide quando persistir (`flush`)."""
+        self._provider.upsert_vectors(documents, vectors, ids)
+        if self._sparse_index is not None:
+            self._sparse_index.upsert(documents, ids)
+        self._changed = True
+
+    def delete(self, ids: List[str]) -> None:
+        self._provider.delete_documents(ids)
+        if self._sparse_index is not None:
+            self._sparse_index.delete(ids)
+        self._changed = True
+        self.flush()
+
+    def flush(self) -> None:
+        self._provider.flush()
+        if self._sparse_index is not None:
+            self._sparse_index.flush()
+        if self._changed:
+            # Nova versão do índice invalida o cache semântico de respostas da API
+            self._changed = False
+            bump_index_version()
+
+    async def aclose(self) -> None:
+        await self._provider.aclose()
+        if self._sparse_index is not None:
+            self._sparse_index.close()
 
     def retrieve(self, query: str, k: int | None = None) -> List[Document]:
         k = k or self._k_default
         return self._provider.similarity_search(query, k=k)
 
+    async def aretrieve(
+        self,
+        query: str,
+        k: int | None = None,
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[Document]:
+        k = k or self._k_default
+        return await self._provider.asimilarity_search(
+            query, k=k, with_vectors=with_vectors, hnsw_ef=hnsw_ef, exact=exact
+        )
+
+    async def abatch_retrieve(
+        self,
+        queries: List[str],
+        k: List[int] | None = None,
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[List[Document]]:
+        ks = k or [self._k_default] * len(queries)
+        return await self._provider.abatch_similarity_search(
+            queries, k=ks, with_vectors=with_vectors, hnsw_ef=hnsw_ef, exact=exact
+        )
+
     def retriever(self, k: int | None = None) -> VectorStoreRetriever:
         k = k or self._k_default
         return self._provider.as_retriever(k=k)
@@ -39,6 +118,10 @@ def _build_provider_from_env() -> VectorStoreProvider:
     """
     Factory de provider de Vector DB.
     Open/Closed: adicionar novos providers sem mexer no client.
+
+    O provider é importado aqui, não no topo do módulo: o qdrant-client leva
+    ~1 s para importar e só o backend escolhido precisa ser carregado (na API,
+    isso acontece na inicialização em background, não no import).
     """
     config = VectorStoreConfig()
     backend = config.backend.lower()
@@ -46,7 +129,13 @@ def _build_provider_from_env() -> VectorStoreProvider:
     emb_client = get_embeddings_client()
 
     if backend == "qdrant":
+        from src.providers.qdrant_vector_store_provider import QdrantVectorStoreProvider
+
         return QdrantVectorStoreProvider(config=config, embeddings_client=emb_client)
+    if backend == "local":
+        from src.providers.local_vector_store_provider import LocalVectorStoreProvider
+
+        return LocalVectorStoreProvider(config=config, embeddings_client=emb_client)
 
     raise ValueError(f"VECTOR_DB_BACKEND não suportado: {backend}")
 
@@ -54,4 +143,5 @@ def _build_provider_from_env() -> VectorStoreProvider:
 @lru_cache(maxsize=1)
 def get_vector_store_client() -> VectorStoreClient:
     provider = _build_provider_from_env()
-    return VectorStoreClient(provider)
\ No newline at end of file
+    sparse_index = BM25Index(settings.SPARSE_INDEX_PATH) if settings.ENABLE_SPARSE_INDEX else None
+    return VectorStoreClient(provider, sparse_index=sparse_index)
\ No newline at end of file
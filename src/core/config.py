@@ -8,27 +8,112 @@ class Settings:
     OLLAMA_LLM_MODEL: str = os.getenv("OLLAMA_LLM_MODEL", "llama3.2")
     OLLAMA_EMBEDDING_MODEL: str = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    # Conexões com o Ollama: pool keep-alive compartilhado (LLM, guardrail e embeddings),
+    # tempo que o Ollama mantém os modelos carregados (segundos, -1 ou "30m") e warm-up no startup
+    OLLAMA_POOL_SIZE: int = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_WARMUP: bool = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+    OLLAMA_WARMUP_RETRY_SECONDS: float = float(os.getenv("OLLAMA_WARMUP_RETRY_SECONDS", "5"))
+
+    # Cache de embeddings (EMBEDDING_CACHE_MAX_BYTES=0 desativa)
+    EMBEDDING_CACHE_MAX_BYTES: int = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "")
+
+    # Embedding em lotes: textos por chamada, lotes simultâneos e retry com backoff
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    EMBEDDING_TIMEOUT_SECONDS: float = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", "30"))
+    EMBEDDING_MAX_RETRIES: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+    EMBEDDING_RETRY_BACKOFF_SECONDS: float = float(os.getenv("EMBEDDING_RETRY_BACKOFF_SECONDS", "0.5"))
     
     
     # Qdrant
-    VECTOR_DB_BACKEND: str = "qdrant"
+    VECTOR_DB_BACKEND: str = os.getenv("VECTOR_DB_BACKEND", "qdrant")  # qdrant | local
     VECTOR_DB_URL: str = os.getenv("VECTOR_DB_URL", "http://localhost:6333")
     VECTOR_DB_COLLECTION_NAME: str = os.getenv("VECTOR_DB_COLLECTION_NAME", "rag_docs")
+    # Conexão com o Qdrant: gRPC (porta VECTOR_DB_GRPC_PORT) ou REST, timeout e
+    # tamanho do pool (conexões HTTP keep-alive ou canais gRPC)
+    VECTOR_DB_PREFER_GRPC: bool = os.getenv("VECTOR_DB_PREFER_GRPC", "false").lower() == "true"
+    VECTOR_DB_GRPC_PORT: int = int(os.getenv("VECTOR_DB_GRPC_PORT", "6334"))
+    VECTOR_DB_TIMEOUT_SECONDS: int = int(os.getenv("VECTOR_DB_TIMEOUT_SECONDS", "10"))
+    VECTOR_DB_POOL_SIZE: int = int(os.getenv("VECTOR_DB_POOL_SIZE", "8"))
+    # Busca HNSW: ef (0 = padrão da coleção) ou busca exata (força bruta)
+    VECTOR_DB_HNSW_EF: int = int(os.getenv("VECTOR_DB_HNSW_EF", "0"))
+    VECTOR_DB_EXACT: bool = os.getenv("VECTOR_DB_EXACT", "false").lower() == "true"
+    # Backend local (NumPy em processo)
+    VECTOR_DB_LOCAL_PATH: str = os.getenv("VECTOR_DB_LOCAL_PATH", ".cache/vector_store")
+    VECTOR_DB_LOCAL_MMAP: bool = os.getenv("VECTOR_DB_LOCAL_MMAP", "false").lower() == "true"
+    # Quantização no Qdrant: none | scalar (int8) | binary. Vetores quantizados na RAM,
+    # originais em disco; a busca pega `oversampling` x k candidatos e reordena com os originais
+    VECTOR_DB_QUANTIZATION: str = os.getenv("VECTOR_DB_QUANTIZATION", "none")
+    VECTOR_DB_ON_DISK_VECTORS: bool = os.getenv("VECTOR_DB_ON_DISK_VECTORS", "true").lower() == "true"
+    VECTOR_DB_OVERSAMPLING: float = float(os.getenv("VECTOR_DB_OVERSAMPLING", "2.0"))
+    VECTOR_DB_RESCORE: bool = os.getenv("VECTOR_DB_RESCORE", "true").lower() == "true"
     
     # RAG Config
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "800"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
     DEFAULT_TOP_K: int = int(os.getenv("DEFAULT_TOP_K", "5"))
+    BATCH_MAX_QUESTIONS: int = int(os.getenv("BATCH_MAX_QUESTIONS", "256"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+    # Busca: dense (só vetorial) | hybrid (vetorial + BM25 em paralelo, fundidos por RRF)
+    RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "dense")
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "20"))
+    RRF_K: int = int(os.getenv("RRF_K", "60"))
+    # Índice lexical (BM25, SQLite) mantido pela ingestão junto com o Vector DB;
+    # só existe no modo hybrid (no dense ninguém o consulta)
+    ENABLE_SPARSE_INDEX: bool = (
+        RETRIEVAL_MODE == "hybrid" and os.getenv("ENABLE_SPARSE_INDEX", "true").lower() == "true"
+    )
+    SPARSE_INDEX_PATH: str = os.getenv("SPARSE_INDEX_PATH", ".cache/bm25_index.sqlite3")
+    # Score mínimo (cosseno) de um chunk para ir ao contexto; nenhum passou: responde
+    # "contexto insuficiente" sem chamar o LLM. 0 desativa
+    MIN_RELEVANCE_SCORE: float = float(os.getenv("MIN_RELEVANCE_SCORE", "0.0"))
+    # Contexto do prompt: limite de tokens (0 = sem limite), após juntar chunks sobrepostos
+    CONTEXT_MAX_TOKENS: int = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+    # Encoder do tiktoken para contar tokens (métricas, orçamento do contexto, token_count dos chunks)
+    TOKENIZER_ENCODING: str = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
     ENABLE_RERANKING: bool = os.getenv("ENABLE_RERANKING", "false").lower() == "true"
+    # Reranking: candidatos buscados, peso lexical, lambda do MMR e orçamento de tempo
+    RERANK_CANDIDATES: int = int(os.getenv("RERANK_CANDIDATES", "20"))
+    RERANK_LEXICAL_WEIGHT: float = float(os.getenv("RERANK_LEXICAL_WEIGHT", "0.3"))
+    RERANK_MMR_LAMBDA: float = float(os.getenv("RERANK_MMR_LAMBDA", "0.7"))
+    RERANK_TIME_BUDGET_MS: float = float(os.getenv("RERANK_TIME_BUDGET_MS", "50"))
+    INDEX_VERSION_PATH: str = os.getenv("INDEX_VERSION_PATH", ".cache/index_version")
+    INGESTION_MANIFEST_PATH: str = os.getenv("INGESTION_MANIFEST_PATH", ".cache/ingestion_manifest.json")
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+    INGEST_QUEUE_SIZE: int = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+    INGEST_PARSE_WORKERS: int = int(os.getenv("INGEST_PARSE_WORKERS", "1"))
+    INGEST_PAGES_PER_TASK: int = int(os.getenv("INGEST_PAGES_PER_TASK", "50"))
+    INGEST_PARSE_TIMEOUT_SECONDS: float = float(os.getenv("INGEST_PARSE_TIMEOUT_SECONDS", "120"))
+
+    # Cache semântico de respostas (perguntas parafraseadas)
+    ENABLE_ANSWER_CACHE: bool = os.getenv("ENABLE_ANSWER_CACHE", "false").lower() == "true"
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+    ANSWER_CACHE_TTL_SECONDS: float = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+    # Guardrails
+    GUARDRAIL_CACHE_SIZE: int = int(os.getenv("GUARDRAIL_CACHE_SIZE", "10000"))
+    GUARDRAIL_CACHE_TTL_SECONDS: float = float(os.getenv("GUARDRAIL_CACHE_TTL_SECONDS", "86400"))
+    GUARDRAIL_CACHE_PATH: str = os.getenv("GUARDRAIL_CACHE_PATH", "")
     
     # API Config
+    # Intervalo entre tentativas de inicializar os recursos da API (Vector DB, Langfuse...) no startup
+    STARTUP_RETRY_SECONDS: float = float(os.getenv("STARTUP_RETRY_SECONDS", "5"))
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_RELOAD: bool = os.getenv("API_RELOAD", "false").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
     # Langfuse
     LANGFUSE_SECRET_KEY: str | None = os.getenv("LANGFUSE_SECRET_KEY")
     LANGFUSE_PUBLIC_KEY: str | None = os.getenv("LANGFUSE_PUBLIC_KEY")
     LANGFUSE_HOST: str = os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com")
+    LANGFUSE_PROMPT_REFRESH_SECONDS: float = float(os.getenv("LANGFUSE_PROMPT_REFRESH_SECONDS", "60"))
+    LANGFUSE_SAMPLE_RATE: float = float(os.getenv("LANGFUSE_SAMPLE_RATE", "1.0"))
+    LANGFUSE_TRACE_QUEUE_SIZE: int = int(os.getenv("LANGFUSE_TRACE_QUEUE_SIZE", "1000"))
+    LANGFUSE_TRACE_BATCH_SIZE: int = int(os.getenv("LANGFUSE_TRACE_BATCH_SIZE", "50"))
+    LANGFUSE_TRACE_FLUSH_SECONDS: float = float(os.getenv("LANGFUSE_TRACE_FLUSH_SECONDS", "2"))
 
 settings = Settings()
\ No newline at end of file
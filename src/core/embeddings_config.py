@@ -8,5 +8,10 @@ from src.core.config import settings
 class EmbeddingsConfig(BaseModel):
     model: str = settings.OLLAMA_EMBEDDING_MODEL
     base_url: str = settings.OLLAMA_BASE_URL
-    timeout: int = 30
-    batch_size: int = 16
\ No newline at end of file
+    timeout: float = settings.EMBEDDING_TIMEOUT_SECONDS
+    batch_size: int = settings.EMBEDDING_BATCH_SIZE
+    max_concurrency: int = settings.EMBEDDING_MAX_CONCURRENCY
+    max_retries: int = settings.EMBEDDING_MAX_RETRIES
+    retry_backoff: float = settings.EMBEDDING_RETRY_BACKOFF_SECONDS
+    cache_max_bytes: int = settings.EMBEDDING_CACHE_MAX_BYTES
+    cache_path: str = settings.EMBEDDING_CACHE_PATH
\ No newline at end of file
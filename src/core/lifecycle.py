@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar, cast
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class ResourceStatus:
+    """Estado da inicialização de um recurso (exposto no `/api/ready`)."""
+    ready: bool = False
+    init_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class LazyResource(Generic[T]):
+    """
+    Singleton criado no primeiro uso (ou no startup da API, pelo
+    `ResourceRegistry`), nunca no import do módulo.
+
+    Repassa atributos para a instância: `from ... import qa_service` e
+    `patch("...qa_service.handle_query")` funcionam como com o objeto real.
+    """
+
+    __slots__ = ("name", "status", "_factory", "_shutdown", "_instance", "_lock")
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        shutdown: Optional[Callable[[T], Any]] = None,
+    ) -> None:
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "status", ResourceStatus())
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_shutdown", shutdown)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        """Retorna a instância, criando-a (uma vez, thread-safe) se preciso."""
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                inicio = time.monotonic()
+                try:
+                    instance = self._factory()
+                except Exception as e:
+                    self.status.ready, self.status.error = False, str(e) or type(e).__name__
+                    raise
+                self.status.ready, self.status.error = True, None
+                self.status.init_ms = round((time.monotonic() - inicio) * 1000, 2)
+                object.__setattr__(self, "_instance", instance)
+            return self._instance
+
+    async def aclose(self) -> None:
+        """Encerra a instância (se foi criada); um novo uso cria outra."""
+        with self._lock:
+            instance = self._instance
+            object.__setattr__(self, "_instance", None)
+            self.status.ready = False
+        if instance is None or self._shutdown is None:
+            return
+        result = self._shutdown(instance)
+        if inspect.isawaitable(result):
+            await result
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr in _NOT_FORWARDED or (attr.startswith("__") and attr.endswith("__")):
+            # Slot não preenchido ou introspecção (`inspect.iscoroutinefunction`
+            # e `hasattr(x, "__code__")` do mock, copy...): responde sem criar o recurso
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self.get(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        return f"LazyResource({self.name!r}, initialized={self.initialized})"
+
+
+# Marcadores que inspect/asyncio procuram em qualquer objeto (mock.patch os consulta)
+_NOT_FORWARDED = frozenset(LazyResource.__slots__) | {"_is_coroutine", "_is_coroutine_marker"}
+
+
+class ResourceRegistry:
+    """
+    Recursos da API com ciclo de vida gerenciado pelo lifespan do FastAPI:
+    criados em paralelo no startup (tentando de novo os que falharem) e
+    encerrados na ordem inversa no shutdown. Fora da API (scripts, testes)
+    cada recurso é criado no primeiro uso.
+    """
+
+    def __init__(self) -> None:
+        self._resources: Dict[str, LazyResource[Any]] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        shutdown: Optional[Callable[[T], Any]] = None,
+    ) -> T:
+        resource = LazyResource(name, factory, shutdown)
+        self._resources[name] = resource
+        # Tipado como T: quem usa enxerga a interface do objeto real
+        return cast(T, resource)
+
+    @property
+    def ready(self) -> bool:
+        return all(resource.initialized for resource in self._resources.values())
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "resources": {name: asdict(resource.status) for name, resource in self._resources.items()},
+        }
+
+    async def _init(self, resource: LazyResource[Any]) -> None:
+        try:
+            await asyncio.to_thread(resource.get)
+        except Exception:
+            logger.warning(f"Inicialização de {resource.name!r} falhou: {resource.status.error}")
+            return
+        logger.info(f"{resource.name!r} inicializado em {resource.status.init_ms} ms")
+
+    async def astartup(self, retry_seconds: Optional[float] = None) -> None:
+        """
+        Cria os recursos pendentes em paralelo (em threads: os construtores são
+        síncronos); repete a cada `retry_seconds` (STARTUP_RETRY_SECONDS) até
+        todos subirem.
+        """
+        retry = retry_seconds if retry_seconds is not None else settings.STARTUP_RETRY_SECONDS
+        while True:
+            pending = [resource for resource in self._resources.values() if not resource.initialized]
+            if not pending:
+                return
+            await asyncio.gather(*(self._init(resource) for resource in pending))
+            if not self.ready:
+                await asyncio.sleep(retry)
+
+    async def ashutdown(self) -> None:
+        """Encerra os recursos criados, na ordem inversa do registro."""
+        for resource in reversed(list(self._resources.values())):
+            try:
+                await resource.aclose()
+            except Exception:
+                logger.exception(f"Falha ao encerrar {resource.name!r}")
+
+
+resources = ResourceRegistry()
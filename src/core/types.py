@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import List, Optional
+from langchain_core.documents import Document
 from src.api.schemas import Citation, Metrics, GuardrailStatus
 
 @dataclass
@@ -9,3 +10,24 @@ class QAResult:
     metrics: Metrics
     guardrail_status: GuardrailStatus
 
+
+@dataclass
+class RetrievalResult:
+    """Documentos recuperados e a latência (ms) de cada etapa do retrieval."""
+    docs: List[Document]
+    dense_latency_ms: Optional[float] = None
+    sparse_latency_ms: Optional[float] = None
+    fusion_latency_ms: Optional[float] = None
+    rerank_latency_ms: Optional[float] = None
+    rerank_fallback: Optional[bool] = None
+
+
+@dataclass
+class GuardedRetrieval:
+    """Resultado da etapa guardrail LLM + retrieval executada em paralelo."""
+    guardrail_status: GuardrailStatus
+    docs: List[Document]
+    guardrail_latency_ms: float
+    retrieval_latency_ms: float
+    parallel_savings_ms: float
+    retrieval: Optional[RetrievalResult] = None
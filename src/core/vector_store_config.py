@@ -1,5 +1,7 @@
 # src/core/vector_store_config.py
 
+from typing import Literal, Optional
+
 from pydantic import BaseModel
 
 from src.core.config import settings
@@ -9,4 +11,15 @@ class VectorStoreConfig(BaseModel):
     backend: str = settings.VECTOR_DB_BACKEND
     url: str = settings.VECTOR_DB_URL
     collection_name: str = settings.VECTOR_DB_COLLECTION_NAME
-    prefer_grpc: bool = False
\ No newline at end of file
+    prefer_grpc: bool = settings.VECTOR_DB_PREFER_GRPC
+    grpc_port: int = settings.VECTOR_DB_GRPC_PORT
+    timeout: int = settings.VECTOR_DB_TIMEOUT_SECONDS
+    pool_size: int = settings.VECTOR_DB_POOL_SIZE
+    hnsw_ef: Optional[int] = settings.VECTOR_DB_HNSW_EF or None
+    exact: bool = settings.VECTOR_DB_EXACT
+    local_path: str = settings.VECTOR_DB_LOCAL_PATH
+    local_mmap: bool = settings.VECTOR_DB_LOCAL_MMAP
+    quantization: Literal["none", "scalar", "binary"] = settings.VECTOR_DB_QUANTIZATION
+    on_disk_vectors: bool = settings.VECTOR_DB_ON_DISK_VECTORS
+    oversampling: float = settings.VECTOR_DB_OVERSAMPLING
+    rescore: bool = settings.VECTOR_DB_RESCORE
\ No newline at end of file
@@ -1,14 +1,17 @@
 from typing import List
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 from src.core.config import settings
+from src.utils.token_counter import TOKEN_COUNT_METADATA_KEY, token_counter
 
 
 class ChunkingService:
     """
     Serviço responsável por fazer o chunking dos documentos.
     Não conhece embeddings nem vector DB, só texto + config.
+
+    Cada chunk leva `token_count` no metadata (vai para o payload): na
+    consulta, o orçamento do contexto só soma esses números.
     """
 
     def __init__(
@@ -17,13 +20,18 @@ class ChunkingService:
         chunk_overlap: int | None = None,
     ) -> None:
         self._chunk_size = chunk_size or settings.CHUNK_SIZE
-        self._chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
+        self._chunk_overlap = chunk_overlap if chunk_overlap is not None else settings.CHUNK_OVERLAP
+
+        # Import no construtor: langchain_text_splitters completo leva ~0,5 s
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
 
         self._splitter = RecursiveCharacterTextSplitter(
             chunk_size=self._chunk_size,
             chunk_overlap=self._chunk_overlap,
             length_function=len,
             separators=["\n\n", "\n", ". ", " ", ""],
+            # Offset do chunk na página: o contexto da API junta chunks sobrepostos
+            add_start_index=True,
         )
 
     def split(self, documents: List[Document]) -> List[Document]:
@@ -35,6 +43,23 @@ class ChunkingService:
         for idx, chunk in enumerate(chunks):
             chunk.metadata["chunk_index"] = idx
 
+        return self._with_token_counts(chunks)
+
+    def split_page(self, document: Document, start_index: int = 0) -> List[Document]:
+        """
+        Divide uma única página/documento; `chunk_index` continua a partir de
+        `start_index` (usado no pipeline em streaming, página a página).
+        """
+        chunks = self._splitter.split_documents([document])
+        for offset, chunk in enumerate(chunks):
+            chunk.metadata["chunk_index"] = start_index + offset
+        return self._with_token_counts(chunks)
+
+    @staticmethod
+    def _with_token_counts(chunks: List[Document]) -> List[Document]:
+        counts = token_counter.count_batch([chunk.page_content for chunk in chunks])
+        for chunk, count in zip(chunks, counts):
+            chunk.metadata[TOKEN_COUNT_METADATA_KEY] = count
         return chunks
 
 
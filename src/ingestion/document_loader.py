@@ -1,25 +1,42 @@
 from pathlib import Path
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_core.documents import Document
-from typing import List
+from typing import Iterator, List
+
+SUPPORTED_SUFFIXES = {".pdf", ".txt"}
+
+
+def list_source_files(data_dir: str | Path = "data") -> List[Path]:
+    """Arquivos suportados da pasta data, em ordem determinística"""
+    return [
+        file_path
+        for file_path in sorted(Path(data_dir).glob("*"))
+        if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_SUFFIXES
+    ]
+
+
+def iter_file(file_path: Path) -> Iterator[Document]:
+    """Lê um arquivo página a página (uma Document por página no caso de PDF)"""
+    # langchain_community é pesado: só importado quando há arquivo para ler
+    # (uma ingestão incremental sem mudanças nem chega aqui)
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
+    if file_path.suffix.lower() == ".pdf":
+        loader = PyPDFLoader(str(file_path))
+    else:
+        loader = TextLoader(str(file_path))
+    for doc in loader.lazy_load():
+        doc.metadata["source"] = file_path.name
+        yield doc
+
+
+def load_file(file_path: Path) -> List[Document]:
+    """Carrega um único arquivo inteiro em memória"""
+    return list(iter_file(file_path))
+
 
 def load_documents(data_dir: str = "data") -> List[Document]:
     """Carrega todos os documentos da pasta data"""
-    data_path = Path(data_dir)
     documents = []
-    
-    for file_path in sorted(data_path.glob("*")):
-        if file_path.suffix.lower() == ".pdf":
-            loader = PyPDFLoader(str(file_path))
-            docs = loader.load()
-            for doc in docs:
-                doc.metadata["source"] = file_path.name
-            documents.extend(docs)
-        elif file_path.suffix.lower() == ".txt":
-            loader = TextLoader(str(file_path))
-            docs = loader.load()
-            for doc in docs:
-                doc.metadata["source"] = file_path.name
-            documents.extend(docs)
-    
-    return documents
\ No newline at end of file
+    for file_path in list_source_files(data_dir):
+        documents.extend(load_file(file_path))
+    return documents
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+from langchain_core.documents import Document
+
+from src.clients.embedding_client import EmbeddingsClient, get_embeddings_client
+from src.clients.vector_store_client import VectorStoreClient
+from src.core.config import settings
+from src.ingestion.chunking import ChunkingService
+from src.ingestion.document_loader import iter_file, list_source_files
+from src.ingestion.manifest import FileEntry, IngestionManifest, file_sha256
+from src.ingestion.parallel_loader import ParallelDocumentLoader
+from src.ingestion.pipeline import FileResult, FileTask, IngestionPipeline, StageStats
+
+
+def default_fingerprint() -> str:
+    return "|".join(
+        [
+            settings.VECTOR_DB_BACKEND,
+            "sparse=bm25-sqlite" if settings.ENABLE_SPARSE_INDEX else "sparse=off",
+            settings.VECTOR_DB_COLLECTION_NAME,
+            settings.OLLAMA_EMBEDDING_MODEL,
+            str(settings.CHUNK_SIZE),
+            str(settings.CHUNK_OVERLAP),
+            f"tokenizer={settings.TOKENIZER_ENCODING}",
+        ]
+    )
+
+
+@dataclass
+class IngestionReport:
+    files_added: int = 0
+    files_changed: int = 0
+    files_removed: int = 0
+    files_unchanged: int = 0
+    chunks_upserted: int = 0
+    chunks_reused: int = 0
+    points_deleted: int = 0
+    files_failed: List[str] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+    stages: List[StageStats] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.chunks_upserted or self.points_deleted)
+
+
+class IncrementalIngestor:
+    """
+    Ingestão incremental guiada pelo manifest.
+
+    - Arquivo com o mesmo hash do manifest: não é lido nem embedado.
+    - Arquivo novo/alterado: passa pelo `IngestionPipeline` (streaming);
+      só os chunks cujo ID ainda não está indexado vão para o embedding.
+    - Pontos de arquivos alterados que deixaram de existir e pontos de
+      arquivos removidos são apagados do Vector DB.
+
+    Os IDs são UUID5 de (arquivo, índice do chunk no arquivo, hash do chunk).
+    O manifest é salvo a cada arquivo concluído, então uma execução
+    interrompida retoma de onde parou.
+    """
+
+    def __init__(
+        self,
+        vs_client: VectorStoreClient,
+        data_dir: str | Path = "data",
+        manifest_path: str | Path | None = None,
+        chunker: ChunkingService | None = None,
+        fingerprint: str | None = None,
+        embeddings: EmbeddingsClient | None = None,
+        batch_size: int | None = None,
+        queue_size: int | None = None,
+        reader: Callable[[Path], Iterable[Document]] = iter_file,
+        parse_workers: int | None = None,
+    ) -> None:
+        self._vs_client = vs_client
+        self._data_dir = Path(data_dir)
+        self._manifest_path = Path(manifest_path or settings.INGESTION_MANIFEST_PATH)
+        self._fingerprint = fingerprint if fingerprint is not None else default_fingerprint()
+        workers = parse_workers if parse_workers is not None else settings.INGEST_PARSE_WORKERS
+        parallel_loader = (
+            ParallelDocumentLoader(
+                workers=workers,
+                pages_per_task=settings.INGEST_PAGES_PER_TASK,
+                timeout_seconds=settings.INGEST_PARSE_TIMEOUT_SECONDS,
+            )
+            if workers > 1
+            else None
+        )
+        self._pipeline = IngestionPipeline(
+            vs_client,
+            embeddings or get_embeddings_client(),
+            chunker=chunker,
+            batch_size=batch_size,
+            queue_size=queue_size,
+            reader=reader,
+            parallel_loader=parallel_loader,
+        )
+
+    def run(self, force: bool = False) -> IngestionReport:
+        """
+        Sincroniza o Vector DB com a pasta de dados.
+        `force=True` reembeda tudo (ignora hashes e IDs já indexados).
+        """
+        report = IngestionReport()
+        manifest = IngestionManifest.load(self._manifest_path)
+        reuse = not force and manifest.fingerprint == self._fingerprint
+        manifest.fingerprint = self._fingerprint
+
+        current_files = list_source_files(self._data_dir)
+        digests: Dict[str, str] = {}
+        tasks: List[FileTask] = []
+        for file_path in current_files:
+            digest = file_sha256(file_path)
+            previous = manifest.files.get(file_path.name)
+            if reuse and previous is not None and previous.sha256 == digest:
+                report.files_unchanged += 1
+                continue
+            digests[file_path.name] = digest
+            previous_ids = set(previous.point_ids) if previous is not None else set()
+            tasks.append(FileTask(path=file_path, indexed=previous_ids if reuse else set(), previous=previous_ids))
+
+        def on_file_done(result: FileResult) -> None:
+            name = result.task.name
+            previous = manifest.files.get(name)
+            # Chamado após o upsert do arquivo: o conteúdo nunca some do índice
+            stale = sorted(set(previous.point_ids) - set(result.point_ids)) if previous is not None else []
+            if stale:
+                self._vs_client.delete(stale)
+
+            report.chunks_upserted += result.upserted
+            report.chunks_reused += result.reused
+            report.points_deleted += len(stale)
+            if previous is None:
+                report.files_added += 1
+            else:
+                report.files_changed += 1
+
+            manifest.files[name] = FileEntry(sha256=digests[name], point_ids=result.point_ids)
+            # Pontos persistidos antes do manifest que os registra
+            self._vs_client.flush()
+            manifest.save()
+
+        if tasks:
+            report.stages = self._pipeline.run(tasks, on_file_done)
+            report.elapsed_seconds = self._pipeline.elapsed_seconds
+            report.files_failed = list(self._pipeline.failed_files)
+
+        current_names = {file_path.name for file_path in current_files}
+        for name in sorted(set(manifest.files) - current_names):
+            stale = manifest.files.pop(name).point_ids
+            if stale:
+                self._vs_client.delete(stale)
+            report.points_deleted += len(stale)
+            report.files_removed += 1
+            manifest.save()
+
+        if not manifest.path.exists():
+            manifest.save()
+        return report
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.documents import Document
+
+MANIFEST_FORMAT_VERSION = 1
+
+# Namespace fixo: o mesmo chunk gera sempre o mesmo UUID de ponto
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1d1e-8a51-4c57-9d0e-3f6a2b7c9e41")
+
+
+def chunk_hash(chunk: Document) -> str:
+    page = chunk.metadata.get("page")
+    return hashlib.sha256(f"{page}\0{chunk.page_content}".encode("utf-8")).hexdigest()
+
+
+def chunk_point_id(source: str, chunk_index: int, content_hash: str) -> str:
+    """ID determinístico (UUID5) do ponto: reindexar o mesmo chunk faz upsert no lugar."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source}\0{chunk_index}\0{content_hash}"))
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Hash do conteúdo do arquivo, lido em blocos (memória constante)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class FileEntry:
+    sha256: str
+    point_ids: List[str] = field(default_factory=list)
+
+
+class IngestionManifest:
+    """
+    Registro do que já está indexado: hash de cada arquivo e os IDs dos
+    pontos gerados a partir dele.
+
+    `fingerprint` resume a configuração que gerou os pontos (coleção, modelo
+    de embedding, chunking). Se mudar, nenhum ponto antigo é reaproveitado.
+    """
+
+    def __init__(self, path: str | Path, fingerprint: str = "", files: Dict[str, FileEntry] | None = None) -> None:
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.files: Dict[str, FileEntry] = files or {}
+
+    @classmethod
+    def load(cls, path: str | Path) -> "IngestionManifest":
+        target = Path(path)
+        if not target.exists():
+            return cls(target)
+        raw = json.loads(target.read_text(encoding="utf-8"))
+        if raw.get("format_version") != MANIFEST_FORMAT_VERSION:
+            return cls(target)
+        files = {
+            name: FileEntry(sha256=entry["sha256"], point_ids=list(entry.get("point_ids", [])))
+            for name, entry in raw.get("files", {}).items()
+        }
+        return cls(target, fingerprint=raw.get("fingerprint", ""), files=files)
+
+    def save(self) -> None:
+        """Escrita atômica: um crash no meio nunca deixa o manifest corrompido."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "format_version": MANIFEST_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "files": {
+                name: {"sha256": entry.sha256, "point_ids": entry.point_ids}
+                for name, entry in sorted(self.files.items())
+            },
+        }
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing.pool import AsyncResult, Pool
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from langchain_core.documents import Document
+
+from src.ingestion.document_loader import load_file
+from src.utils.logger import logger
+
+# (page_content, metadata): o que volta dos workers (Document serializado)
+_ParsedPage = Tuple[str, Dict[str, Any]]
+
+# Chaves que o PyPDFLoader duplica com o nome usado pelos outros parsers
+_PDF_KEY_ALIASES = {"page_count": "total_pages", "file_path": "source"}
+
+
+def _normalize_pdf_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normaliza os metadados do PDF como o PyPDFLoader: chaves sem "/" e em
+    minúsculas, valores str/int (o resto vira str), datas do PDF em ISO 8601.
+    """
+    normalized: Dict[str, Any] = {}
+    for raw_key, raw_value in metadata.items():
+        value = raw_value if type(raw_value) in (str, int) else str(raw_value)
+        key = raw_key.removeprefix("/").lower()
+        if key in ("creationdate", "moddate"):
+            try:
+                normalized[key] = datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+            except ValueError:
+                normalized[key] = value
+        elif key in _PDF_KEY_ALIASES:
+            normalized[_PDF_KEY_ALIASES[key]] = value
+            normalized[key] = value
+        elif isinstance(value, str):
+            normalized[key] = value.strip()
+        else:
+            normalized[key] = value
+    return normalized
+
+
+def _parse_pdf_pages(path: str, start: int, end: int) -> List[_ParsedPage]:
+    """
+    Extrai as páginas [start, end) de um PDF no worker.
+    Mesmo texto e metadados do PyPDFLoader (modo "page").
+    """
+    import pypdf
+
+    reader = pypdf.PdfReader(path)
+    base = _normalize_pdf_metadata(
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | dict(reader.metadata or {})
+        | {"source": Path(path).name, "total_pages": len(reader.pages)}
+    )
+    pages: List[_ParsedPage] = []
+    for page_number in range(start, min(end, len(reader.pages))):
+        text = reader.pages[page_number].extract_text(extraction_mode="plain").strip()
+        pages.append(
+            (text, base | {"page": page_number, "page_label": reader.page_labels[page_number]})
+        )
+    return pages
+
+
+def _parse_file(path: str) -> List[_ParsedPage]:
+    return [(doc.page_content, doc.metadata) for doc in load_file(Path(path))]
+
+
+@dataclass(frozen=True)
+class ParseTask:
+    path: Path
+    start: Optional[int] = None  # None: arquivo inteiro
+    end: Optional[int] = None
+
+    def describe(self) -> str:
+        if self.start is None:
+            return self.path.name
+        return f"{self.path.name} [páginas {self.start}-{self.end - 1}]"
+
+
+@dataclass(frozen=True)
+class LoadFailure:
+    task: ParseTask
+    error: str
+
+
+@dataclass(frozen=True)
+class LoadedPages:
+    path: Path
+    docs: List[Document]
+
+
+@dataclass(frozen=True)
+class FileLoaded:
+    """Fim de um arquivo no stream do loader. `ok=False` se alguma parte falhou."""
+    path: Path
+    ok: bool
+
+
+class ParallelDocumentLoader:
+    """
+    Parsing de documentos em paralelo num pool de processos.
+
+    - Arquivos viram tarefas; PDFs com mais de `pages_per_task` páginas são
+      divididos em faixas de páginas, para um PDF grande não ficar num core só.
+    - A saída segue a ordem dos arquivos/páginas (determinística), com no
+      máximo `max_in_flight` tarefas em andamento (memória limitada).
+    - Uma tarefa que levanta exceção, trava ou derruba o worker (o resultado
+      nunca chega) é registrada em `failures` e o arquivo sai com
+      `FileLoaded(ok=False)`; as demais seguem normalmente. O prazo de cada
+      tarefa (`timeout_seconds`) conta do envio ao pool, não de quando a
+      saída chega nela: uma tarefa lenta na frente não esconde o timeout das
+      de trás. Em timeout o pool é recriado; as tarefas com prazo vencido
+      também falham e as demais em andamento são reenviadas (com prazo novo).
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: int = 50,
+        timeout_seconds: float = 120.0,
+        max_in_flight: Optional[int] = None,
+    ) -> None:
+        self._workers = max(1, workers or os.cpu_count() or 1)
+        self._pages_per_task = max(1, pages_per_task)
+        self._timeout = timeout_seconds
+        self._max_in_flight = max_in_flight or self._workers * 2
+        self.failures: List[LoadFailure] = []
+
+    def _split(self, path: Path) -> List[ParseTask]:
+        if path.suffix.lower() != ".pdf":
+            return [ParseTask(path)]
+        try:
+            import pypdf
+
+            total_pages = len(pypdf.PdfReader(str(path)).pages)
+        except Exception:
+            # PDF que nem abre: vai inteiro para o worker, que registra a falha
+            return [ParseTask(path)]
+        if total_pages <= self._pages_per_task:
+            return [ParseTask(path)]
+        return [
+            ParseTask(path, start, min(start + self._pages_per_task, total_pages))
+            for start in range(0, total_pages, self._pages_per_task)
+        ]
+
+    @staticmethod
+    def _submit(pool: Pool, task: ParseTask) -> AsyncResult:
+        if task.start is None:
+            return pool.apply_async(_parse_file, (str(task.path),))
+        return pool.apply_async(_parse_pdf_pages, (str(task.path), task.start, task.end))
+
+    def _new_pool(self) -> Pool:
+        # spawn: workers não herdam threads/locks do processo pai (pipeline em threads)
+        return multiprocessing.get_context("spawn").Pool(processes=self._workers)
+
+    def iter_documents(self, paths: Iterable[Path]) -> Iterator[Union[LoadedPages, FileLoaded]]:
+        """
+        Gera, em ordem, um `LoadedPages` por tarefa concluída e um
+        `FileLoaded` ao fim de cada arquivo.
+        """
+        tasks: Iterator[Tuple[ParseTask, bool]] = (
+            (task, idx == len(parts) - 1)
+            for path in paths
+            for parts in [self._split(path)]
+            for idx, task in enumerate(parts)
+        )
+        pool = self._new_pool()
+        # (tarefa, último pedaço do arquivo?, resultado ou None se já expirou, prazo)
+        window: Deque[Tuple[ParseTask, bool, Optional[AsyncResult], float]] = deque()
+        file_ok = True
+        try:
+            while True:
+                while len(window) < self._max_in_flight:
+                    nxt = next(tasks, None)
+                    if nxt is None:
+                        break
+                    task, last = nxt
+                    window.append((task, last, self._submit(pool, task), time.monotonic() + self._timeout))
+                if not window:
+                    break
+
+                task, last, result, deadline = window.popleft()
+                try:
+                    if result is None:
+                        raise multiprocessing.TimeoutError
+                    pages = result.get(timeout=max(0.0, deadline - time.monotonic()))
+                except multiprocessing.TimeoutError:
+                    self._record(task, f"timeout após {self._timeout}s")
+                    file_ok = False
+                    if result is not None:
+                        # Worker travado (ou morto): recria o pool e reenvia o que estava em voo
+                        pool.terminate()
+                        pool.join()
+                        pool = self._new_pool()
+                        window = deque(self._resubmit(pool, entry) for entry in window)
+                except Exception as exc:
+                    self._record(task, f"{type(exc).__name__}: {exc}")
+                    file_ok = False
+                else:
+                    yield LoadedPages(
+                        task.path,
+                        [Document(page_content=text, metadata=metadata) for text, metadata in pages],
+                    )
+
+                if last:
+                    yield FileLoaded(task.path, ok=file_ok)
+                    file_ok = True
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _resubmit(
+        self, pool: Pool, entry: Tuple[ParseTask, bool, Optional[AsyncResult], float]
+    ) -> Tuple[ParseTask, bool, Optional[AsyncResult], float]:
+        """Entrada da janela após recriar o pool: mantém as prontas, expira as vencidas, reenvia o resto."""
+        task, last, result, deadline = entry
+        if result is None or result.ready():
+            return entry
+        now = time.monotonic()
+        if deadline <= now:
+            return task, last, None, deadline
+        return task, last, self._submit(pool, task), now + self._timeout
+
+    def _record(self, task: ParseTask, error: str) -> None:
+        logger.warning(f"Falha ao carregar {task.describe()}: {error}")
+        self.failures.append(LoadFailure(task, error))
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from src.clients.embedding_client import EmbeddingsClient
+from src.clients.vector_store_client import VectorStoreClient
+from src.core.config import settings
+from src.ingestion.chunking import ChunkingService
+from src.ingestion.document_loader import iter_file
+from src.ingestion.manifest import chunk_hash, chunk_point_id
+from src.ingestion.parallel_loader import FileLoaded, ParallelDocumentLoader
+from src.utils.logger import logger
+
+
+@dataclass
+class FileTask:
+    """
+    Arquivo a (re)indexar. `indexed`: IDs já presentes no índice (não são
+    reembedados). `previous`: IDs do arquivo no manifest, mesmo com `force`
+    (nunca apagados ao desfazer uma falha: os IDs são determinísticos, então
+    um reupsert com o mesmo ID é o mesmo conteúdo já publicado).
+    """
+    path: Path
+    indexed: Set[str] = field(default_factory=set)
+    previous: Set[str] = field(default_factory=set)
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+@dataclass
+class FileResult:
+    task: FileTask
+    point_ids: List[str]
+    upserted: int
+    reused: int
+
+
+@dataclass
+class StageStats:
+    name: str
+    unit: str
+    count: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Throughput da etapa (itens por segundo de trabalho efetivo)."""
+        return self.count / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.count} {self.unit} ({self.rate:.1f} {self.unit}/s)"
+
+
+@dataclass
+class _Page:
+    task: FileTask
+    doc: Document
+
+
+@dataclass
+class _Batch:
+    task: FileTask
+    docs: List[Document]
+    ids: List[str]
+    vectors: Optional[List[List[float]]] = None
+
+
+@dataclass
+class _FileEnd:
+    task: FileTask
+    point_ids: List[str] = field(default_factory=list)
+    reused: int = 0
+    ok: bool = True
+
+
+_DONE = object()
+
+
+class _Aborted(Exception):
+    """Outra etapa falhou; esta só precisa parar."""
+
+
+class IngestionPipeline:
+    """
+    Pipeline de ingestão em streaming: loader → chunker → embedder → upsert.
+
+    Cada etapa roda na sua thread e conversa com a próxima por uma fila
+    limitada (`queue_size`). Se uma etapa atrasa, a fila dela enche e a
+    anterior bloqueia (backpressure): em qualquer momento só existem em
+    memória algumas páginas e alguns lotes de `batch_size` chunks, qualquer
+    que seja o tamanho do acervo. O upsert começa assim que o primeiro lote
+    fica pronto.
+
+    Ao terminar todos os chunks de um arquivo, `on_file_done` é chamado
+    (na thread de quem chamou `run`) com os IDs de ponto do arquivo. Um
+    arquivo que falha no parsing não chama `on_file_done` (fica em
+    `failed_files`) e não interrompe os demais.
+
+    Com `parallel_loader`, o parsing é distribuído num pool de processos
+    (ver `ParallelDocumentLoader`); sem ele, os arquivos são lidos em série
+    com `reader`.
+    """
+
+    def __init__(
+        self,
+        vs_client: VectorStoreClient,
+        embeddings: EmbeddingsClient,
+        chunker: Optional[ChunkingService] = None,
+        batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        reader: Callable[[Path], Iterable[Document]] = iter_file,
+        parallel_loader: Optional[ParallelDocumentLoader] = None,
+    ) -> None:
+        self._vs_client = vs_client
+        self._embeddings = embeddings
+        self._chunker = chunker or ChunkingService()
+        self._batch_size = max(1, batch_size or settings.INGEST_BATCH_SIZE)
+        self._queue_size = max(1, queue_size or settings.INGEST_QUEUE_SIZE)
+        self._reader = reader
+        self._parallel_loader = parallel_loader
+        self.failed_files: List[str] = []
+        self._error: Optional[BaseException] = None
+        self.stages: List[StageStats] = []
+        self.elapsed_seconds = 0.0
+
+    def _put(self, q: queue.Queue[object], item: object) -> None:
+        while True:
+            if self._error is not None:
+                raise _Aborted
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue[object]) -> object:
+        while True:
+            if self._error is not None:
+                raise _Aborted
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _run_stage(self, target: Callable[[], None]) -> None:
+        try:
+            target()
+        except _Aborted:
+            pass
+        except BaseException as exc:  # propagado para `run`
+            logger.exception("Falha no pipeline de ingestão")
+            if self._error is None:
+                self._error = exc
+
+    def _load(self, tasks: Iterable[FileTask], out: queue.Queue[object], stats: StageStats) -> None:
+        if self._parallel_loader is not None:
+            self._load_parallel(list(tasks), out, stats)
+            return
+
+        for task in tasks:
+            ok = True
+            try:
+                pages: Iterator[Document] = iter(self._reader(task.path))
+                while True:
+                    inicio = time.perf_counter()
+                    doc = next(pages, None)
+                    stats.busy_seconds += time.perf_counter() - inicio
+                    if doc is None:
+                        break
+                    stats.count += 1
+                    self._put(out, _Page(task, doc))
+            except _Aborted:
+                raise
+            except Exception as exc:
+                logger.warning(f"Falha ao carregar {task.name}: {type(exc).__name__}: {exc}")
+                ok = False
+            self._put(out, _FileEnd(task, ok=ok))
+        self._put(out, _DONE)
+
+    def _load_parallel(self, tasks: List[FileTask], out: queue.Queue[object], stats: StageStats) -> None:
+        by_path = {task.path: task for task in tasks}
+        items = self._parallel_loader.iter_documents([task.path for task in tasks])
+        try:
+            while True:
+                inicio = time.perf_counter()
+                item = next(items, None)
+                stats.busy_seconds += time.perf_counter() - inicio
+                if item is None:
+                    break
+                task = by_path[item.path]
+                if isinstance(item, FileLoaded):
+                    self._put(out, _FileEnd(task, ok=item.ok))
+                    continue
+                for doc in item.docs:
+                    stats.count += 1
+                    self._put(out, _Page(task, doc))
+        finally:
+            items.close()  # encerra o pool de processos também em caso de erro
+        self._put(out, _DONE)
+
+    def _chunk(self, inbox: queue.Queue[object], out: queue.Queue[object], stats: StageStats) -> None:
+        chunk_index = 0
+        point_ids: List[str] = []
+        reused = 0
+        batch: Optional[_Batch] = None
+
+        while (item := self._get(inbox)) is not _DONE:
+            if isinstance(item, _FileEnd):
+                if batch is not None:
+                    self._put(out, batch)
+                    batch = None
+                self._put(out, _FileEnd(item.task, point_ids=point_ids, reused=reused, ok=item.ok))
+                chunk_index, point_ids, reused = 0, [], 0
+                continue
+
+            if not isinstance(item, _Page):
+                raise TypeError(f"Item inesperado no estágio de chunking: {type(item).__name__}")
+            inicio = time.perf_counter()
+            chunks = self._chunker.split_page(item.doc, start_index=chunk_index)
+            stats.busy_seconds += time.perf_counter() - inicio
+            stats.count += len(chunks)
+            chunk_index += len(chunks)
+
+            for chunk in chunks:
+                content_hash = chunk_hash(chunk)
+                chunk.metadata["chunk_hash"] = content_hash
+                point_id = chunk_point_id(item.task.name, chunk.metadata["chunk_index"], content_hash)
+                point_ids.append(point_id)
+                if point_id in item.task.indexed:
+                    reused += 1
+                    continue
+                if batch is None:
+                    batch = _Batch(item.task, [], [])
+                batch.docs.append(chunk)
+                batch.ids.append(point_id)
+                if len(batch.docs) >= self._batch_size:
+                    self._put(out, batch)
+                    batch = None
+
+        self._put(out, _DONE)
+
+    def _embed(self, inbox: queue.Queue[object], out: queue.Queue[object], stats: StageStats) -> None:
+        while (item := self._get(inbox)) is not _DONE:
+            if isinstance(item, _Batch):
+                inicio = time.perf_counter()
+                item.vectors = self._embeddings.embed_documents([doc.page_content for doc in item.docs])
+                stats.busy_seconds += time.perf_counter() - inicio
+                stats.count += len(item.vectors)
+            self._put(out, item)
+        self._put(out, _DONE)
+
+    def run(
+        self,
+        tasks: Iterable[FileTask],
+        on_file_done: Callable[[FileResult], None] = lambda _: None,
+    ) -> List[StageStats]:
+        """
+        Processa os arquivos e retorna as estatísticas por etapa
+        (páginas/s, chunks/s, vetores/s, pontos/s). Relança a primeira
+        exceção de qualquer etapa, depois de parar as demais.
+        """
+        load_stats = StageStats("load", "páginas")
+        chunk_stats = StageStats("chunk", "chunks")
+        embed_stats = StageStats("embed", "vetores")
+        upsert_stats = StageStats("upsert", "pontos")
+        self.stages = [load_stats, chunk_stats, embed_stats, upsert_stats]
+        self.failed_files = []
+        self._error = None
+
+        pages_q: queue.Queue[object] = queue.Queue(maxsize=self._queue_size)
+        chunks_q: queue.Queue[object] = queue.Queue(maxsize=self._queue_size)
+        vectors_q: queue.Queue[object] = queue.Queue(maxsize=self._queue_size)
+
+        threads = [
+            threading.Thread(
+                target=self._run_stage, args=(lambda: self._load(tasks, pages_q, load_stats),),
+                name="ingest-load", daemon=True,
+            ),
+            threading.Thread(
+                target=self._run_stage, args=(lambda: self._chunk(pages_q, chunks_q, chunk_stats),),
+                name="ingest-chunk", daemon=True,
+            ),
+            threading.Thread(
+                target=self._run_stage, args=(lambda: self._embed(chunks_q, vectors_q, embed_stats),),
+                name="ingest-embed", daemon=True,
+            ),
+        ]
+
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        upserted_ids: List[str] = []
+
+        def consume() -> None:
+            while (item := self._get(vectors_q)) is not _DONE:
+                if isinstance(item, _Batch):
+                    started = time.perf_counter()
+                    self._vs_client.upsert_vectors(item.docs, item.vectors or [], item.ids)
+                    upsert_stats.busy_seconds += time.perf_counter() - started
+                    upsert_stats.count += len(item.ids)
+                    upserted_ids.extend(item.ids)
+                elif isinstance(item, _FileEnd):
+                    if item.ok:
+                        on_file_done(
+                            FileResult(item.task, item.point_ids, upserted=len(upserted_ids), reused=item.reused)
+                        )
+                    else:
+                        # Manifest não é atualizado (o arquivo é tentado de novo na próxima
+                        # execução) e o que foi escrito parcialmente é desfeito, menos os
+                        # pontos que o manifest ainda registra (continuam valendo).
+                        self.failed_files.append(item.task.name)
+                        partial = [point_id for point_id in upserted_ids if point_id not in item.task.previous]
+                        if partial:
+                            self._vs_client.delete(partial)
+                    upserted_ids.clear()
+
+        self._run_stage(consume)
+        for thread in threads:
+            thread.join()
+        self.elapsed_seconds = time.perf_counter() - inicio
+
+        if self._error is not None:
+            raise self._error
+        return self.stages
@@ -7,16 +7,48 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
 from src.api.routes import router as api_router
 from src.core.config import settings
+from src.core.lifecycle import resources
+from src.providers.ollama_provider import ollama_provider
 from src.utils.logger import logger
 
 logger.info("Inicializando Micro-RAG API...")
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Inicialização em background: os recursos (Vector DB, Langfuse, serviços)
+    são criados em paralelo e os modelos do Ollama pré-carregados enquanto a
+    API já responde; o `/api/ready` só fica pronto quando tudo subiu.
+    No shutdown os recursos são encerrados (conexões, traces pendentes).
+    """
+    startup = [
+        asyncio.create_task(resources.astartup()),
+        asyncio.create_task(ollama_provider.awarmup()),
+    ]
+    try:
+        yield
+    finally:
+        for task in startup:
+            task.cancel()
+        for task in startup:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await resources.ashutdown()
+        await ollama_provider.aclose()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Micro-RAG API",
     description="API de Q&A com RAG sobre documentos indexados em Qdrant e LLM Ollama",
     version="1.0.0",
@@ -30,5 +62,6 @@ if __name__ == "__main__":
         "src.main:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=True,
+        # Reloader só em desenvolvimento: vigia arquivos e roda a API num subprocesso
+        reload=settings.API_RELOAD,
     )
@@ -0,0 +1,124 @@
+# src/providers/cached_embedding_provider.py
+
+from __future__ import annotations
+
+import hashlib
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.embeddings import Embeddings as LCEmbeddings
+
+from src.providers.embedding_provider import EmbeddingProvider, ProviderLangChainEmbeddings
+from src.utils.cache import LRUTTLCache, SQLiteStore
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(raw: bytes) -> List[float]:
+    return array("f", raw).tolist()
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """
+    Decorator de EmbeddingProvider com cache de vetores.
+
+    - Chave: modelo + texto exato (sha256).
+    - Memória: LRU limitado por bytes; vetores guardados como float32 empacotado.
+    - Disco (opcional): SQLite com os mesmos blobs float32, sobrevive a restarts.
+
+    Vale tanto para `embed_query`/`embed_documents` quanto para o objeto
+    LangChain (`langchain_embeddings`) que o QdrantVectorStore usa.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        max_bytes: int,
+        store: Optional[SQLiteStore] = None,
+    ) -> None:
+        self._provider = provider
+        self._cache = LRUTTLCache[bytes](
+            maxsize=sys.maxsize,
+            max_bytes=max_bytes,
+            sizeof=len,
+            store=store,
+            encode=lambda raw: raw,
+            decode=lambda raw: raw,
+        )
+        self._lc = ProviderLangChainEmbeddings(self)
+
+    @property
+    def model_name(self) -> str:
+        return self._provider.model_name
+
+    def cache_stats(self) -> dict:
+        return self._cache.stats()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, text: str) -> Optional[List[float]]:
+        raw = self._cache.get(self._key(text))
+        return _unpack(raw) if raw is not None else None
+
+    def _store(self, text: str, vector: List[float]) -> None:
+        self._cache.set(self._key(text), _pack(vector))
+
+    def embed_query(self, text: str) -> List[float]:
+        cached = self._lookup(text)
+        if cached is not None:
+            return cached
+        vector = self._provider.embed_query(text)
+        self._store(text, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        cached = self._lookup(text)
+        if cached is not None:
+            return cached
+        vector = await self._provider.aembed_query(text)
+        self._store(text, vector)
+        return vector
+
+    def _split_cached(self, texts: List[str]) -> tuple[Dict[str, List[float]], List[str]]:
+        """Separa (encontrados, faltantes); os faltantes vêm deduplicados e em ordem."""
+        found: Dict[str, List[float]] = {}
+        missing: Dict[str, None] = {}  # dict preserva a ordem e deduplica
+        for text in texts:
+            if text in found or text in missing:
+                continue
+            cached = self._lookup(text)
+            if cached is None:
+                missing[text] = None
+            else:
+                found[text] = cached
+        return found, list(missing)
+
+    def _merge(
+        self, texts: List[str], found: Dict[str, List[float]], pending: List[str], vectors: List[List[float]]
+    ) -> List[List[float]]:
+        for text, vector in zip(pending, vectors):
+            self._store(text, vector)
+            found[text] = vector
+        return [found[text] for text in texts]
+
+    def embed_documents(self, texts: Iterable[str]) -> List[List[float]]:
+        """Só envia ao provider os textos ainda não cacheados (deduplicados)."""
+        texts = list(texts)
+        found, pending = self._split_cached(texts)
+        vectors = self._provider.embed_documents(pending) if pending else []
+        return self._merge(texts, found, pending, vectors)
+
+    async def aembed_documents(self, texts: Iterable[str]) -> List[List[float]]:
+        texts = list(texts)
+        found, pending = self._split_cached(texts)
+        vectors = await self._provider.aembed_documents(pending) if pending else []
+        return self._merge(texts, found, pending, vectors)
+
+    @property
+    def langchain_embeddings(self) -> LCEmbeddings:
+        return self._lc
+
@@ -12,6 +12,11 @@ class EmbeddingProvider(ABC):
     Qualquer backend (Ollama, OpenAI, etc.) implementa isso.
     """
 
+    @property
+    def model_name(self) -> str:
+        """Identificador do modelo (usado, por exemplo, em chaves de cache)."""
+        return type(self).__name__
+
     @abstractmethod
     def embed_query(self, text: str) -> List[float]:
         ...
@@ -20,10 +25,46 @@ class EmbeddingProvider(ABC):
     def embed_documents(self, texts: Iterable[str]) -> List[List[float]]:
         ...
 
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Versão assíncrona de `embed_query`.
+        Por padrão delega para o objeto LangChain (que faz fallback para thread).
+        """
+        return await self.langchain_embeddings.aembed_query(text)
+
+    async def aembed_documents(self, texts: Iterable[str]) -> List[List[float]]:
+        """
+        Versão assíncrona de `embed_documents` (uma única chamada em lote).
+        """
+        return await self.langchain_embeddings.aembed_documents(list(texts))
+
     @property
     @abstractmethod
     def langchain_embeddings(self) -> LCEmbeddings:
         """
         Objeto compatível com LangChain para usar em VectorStore.
         """
-        ...
\ No newline at end of file
+        ...
+
+
+class ProviderLangChainEmbeddings(LCEmbeddings):
+    """
+    Adaptador LangChain que roteia as chamadas pelo provider: quem usa o
+    objeto LangChain (ex.: QdrantVectorStore) passa pelo mesmo lote, cache,
+    retry etc. que o resto do sistema.
+    """
+
+    def __init__(self, provider: EmbeddingProvider) -> None:
+        self._provider = provider
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._provider.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._provider.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._provider.aembed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._provider.aembed_documents(texts)
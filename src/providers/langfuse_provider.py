@@ -1,24 +1,95 @@
-from typing import Optional, Tuple
-from langfuse import Langfuse
-from langfuse.callback import CallbackHandler
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from src.core.config import settings
+from src.core.lifecycle import resources
 from src.prompts.rag_prompt.V1.prompt_rag import RAG_PROMPT as LOCAL_RAG_PROMPT
 from src.prompts.system_prompt.v1.system_prompt import SYSTEM_PROMPT_V1 as LOCAL_SYSTEM_PROMPT
 from src.prompts.guardrrails.v1.guardrrails_prompt import GUARDRAIL_PROMPT_V1 as LOCAL_GUARDRAIL_PROMPT
+from src.utils.tracing import TraceRecord, TracingPipeline
+
+if TYPE_CHECKING:
+    # SDK do Langfuse (~0,3 s de import): só carregado com as chaves configuradas
+    from langfuse import Langfuse
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT_NAME = "system-prompt"
+RAG_PROMPT_NAME = "rag-prompt"
+GUARDRAIL_PROMPT_NAME = "guardrail-prompt"
+
+LOCAL_PROMPTS: Dict[str, str] = {
+    SYSTEM_PROMPT_NAME: LOCAL_SYSTEM_PROMPT,
+    RAG_PROMPT_NAME: LOCAL_RAG_PROMPT,
+    GUARDRAIL_PROMPT_NAME: LOCAL_GUARDRAIL_PROMPT,
+}
+
+
+@dataclass(frozen=True)
+class ResolvedPrompt:
+    name: str
+    text: str
+    source: str  # "langfuse" ou "local"
+
+    @property
+    def version(self) -> str:
+        """Versão baseada no conteúdo: muda sempre que o texto muda."""
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()[:12]
+
 
 class LangfuseProvider:
     """
     Provider responsável pela integração com o Langfuse.
-    Gerencia a inicialização do cliente, recuperação de prompts e callbacks.
+    Gerencia a inicialização do cliente, recuperação de prompts e exportação de traces.
+
+    Os prompts ficam num registro em memória, atualizado em background a cada
+    `LANGFUSE_PROMPT_REFRESH_SECONDS`. As requisições só leem o registro e nunca
+    esperam pelo Langfuse; até a primeira atualização valem os prompts locais.
+
+    O tracing passa por um único `TracingPipeline` por processo (fila limitada,
+    amostragem e exportação em lote numa thread), em vez de um client novo a
+    cada requisição.
     """
 
-    def __init__(self) -> None:
-        self._client: Optional[Langfuse] = None
-        self._initialize()
+    def __init__(
+        self,
+        client: Optional[Langfuse] = None,
+        refresh_interval_seconds: Optional[float] = None,
+    ) -> None:
+        self._client: Optional[Langfuse] = client
+        self._refresh_interval = (
+            refresh_interval_seconds
+            if refresh_interval_seconds is not None
+            else settings.LANGFUSE_PROMPT_REFRESH_SECONDS
+        )
+        self._prompts: Dict[str, ResolvedPrompt] = {
+            name: ResolvedPrompt(name=name, text=str(text), source="local")
+            for name, text in LOCAL_PROMPTS.items()
+        }
+        self._stop_event = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+        if self._client is None:
+            self._initialize()
+        self.tracing = TracingPipeline(
+            exporter=self._export_traces if self.is_enabled else None,
+            max_queue_size=settings.LANGFUSE_TRACE_QUEUE_SIZE,
+            batch_size=settings.LANGFUSE_TRACE_BATCH_SIZE,
+            flush_interval_seconds=settings.LANGFUSE_TRACE_FLUSH_SECONDS,
+            sample_rate=settings.LANGFUSE_SAMPLE_RATE,
+        )
+        if self.is_enabled and self._refresh_interval > 0:
+            self.start_background_refresh()
 
     def _initialize(self) -> None:
         if settings.LANGFUSE_PUBLIC_KEY and settings.LANGFUSE_SECRET_KEY:
             try:
+                from langfuse import Langfuse
+
                 self._client = Langfuse(
                     public_key=settings.LANGFUSE_PUBLIC_KEY,
                     secret_key=settings.LANGFUSE_SECRET_KEY,
@@ -31,54 +102,120 @@ class LangfuseProvider:
     def is_enabled(self) -> bool:
         return self._client is not None
 
-    def get_callback_handler(self) -> Optional[CallbackHandler]:
-        """Retorna um handler de callback para ser usado nas chains do LangChain."""
-        if not self.is_enabled:
-            return None
-        
-        return CallbackHandler(
-            public_key=settings.LANGFUSE_PUBLIC_KEY,
-            secret_key=settings.LANGFUSE_SECRET_KEY,
-            host=settings.LANGFUSE_HOST,
-        )
+    def _export_traces(self, batch: List[TraceRecord]) -> None:
+        """Exporter do TracingPipeline: roda na thread worker, nunca na requisição."""
+        client = self._client
+        if client is None:
+            return
 
-    def get_prompts(self) -> Tuple[str, str]:
+        for record in batch:
+            client.trace(
+                id=record.trace_id,
+                name=record.name,
+                input=record.input,
+                output=record.output,
+                metadata=record.metadata,
+                timestamp=record.start_time,
+            )
+            for span in record.spans:
+                if span.kind == "generation":
+                    client.generation(
+                        trace_id=record.trace_id,
+                        name=span.name,
+                        model=span.model,
+                        input=span.input,
+                        output=span.output,
+                        metadata=span.metadata,
+                        start_time=span.start_time,
+                        end_time=span.end_time,
+                        usage=span.usage,
+                    )
+                else:
+                    client.span(
+                        trace_id=record.trace_id,
+                        name=span.name,
+                        input=span.input,
+                        output=span.output,
+                        metadata=span.metadata,
+                        start_time=span.start_time,
+                        end_time=span.end_time,
+                    )
+        client.flush()
+
+    def shutdown(self) -> None:
+        """Para o refresh de prompts e exporta os traces pendentes."""
+        self.stop_background_refresh()
+        self.tracing.shutdown()
+
+    def refresh_prompts(self) -> None:
         """
-        Retorna (system_prompt, rag_prompt).
-        Tenta buscar do Langfuse; se falhar ou não estiver configurado, usa os locais.
+        Busca os prompts no Langfuse e atualiza o registro em memória.
+        Prompts que falharem mantêm o valor anterior (Langfuse ou local).
         """
-        sys_prompt = LOCAL_SYSTEM_PROMPT
-        rag_prompt = LOCAL_RAG_PROMPT
+        if not self.is_enabled or self._client is None:
+            return
 
-        if self.is_enabled and self._client:
+        updated = dict(self._prompts)
+        for name in LOCAL_PROMPTS:
             try:
-                lf_sys = self._client.get_prompt("system-prompt")
-                lf_rag = self._client.get_prompt("rag-prompt")
-
-                if lf_sys:
-                    sys_prompt = lf_sys.get_langchain_prompt()
-                if lf_rag:
-                    rag_prompt = lf_rag.get_langchain_prompt()
+                lf_prompt = self._client.get_prompt(name)
+                if lf_prompt:
+                    updated[name] = ResolvedPrompt(
+                        name=name,
+                        text=str(lf_prompt.get_langchain_prompt()),
+                        source="langfuse",
+                    )
             except Exception:
-                # Fallback silencioso
-                pass
-        
-        return str(sys_prompt), str(rag_prompt)
+                logger.warning(f"Falha ao atualizar prompt '{name}' do Langfuse; mantendo versão atual")
+
+        # Troca atômica da referência: leitores nunca veem um registro parcial
+        self._prompts = updated
+
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.is_set():
+            self.refresh_prompts()
+            self._stop_event.wait(self._refresh_interval)
+
+    def start_background_refresh(self) -> None:
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, name="langfuse-prompt-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self) -> None:
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=5)
+            self._refresh_thread = None
+
+    def get_prompt(self, name: str) -> ResolvedPrompt:
+        """Retorna o prompt ativo (sem I/O)."""
+        return self._prompts[name]
+
+    @property
+    def prompt_version(self) -> str:
+        """
+        Versão combinada de todos os prompts ativos.
+        Use como parte da chave de caches que dependem dos prompts.
+        """
+        prompts = self._prompts
+        combined = "|".join(f"{name}:{prompts[name].version}" for name in sorted(prompts))
+        return hashlib.sha256(combined.encode("utf-8")).hexdigest()[:12]
+
+    def get_prompts(self) -> Tuple[str, str]:
+        """
+        Retorna (system_prompt, rag_prompt) do registro em memória.
+        """
+        prompts = self._prompts
+        return prompts[SYSTEM_PROMPT_NAME].text, prompts[RAG_PROMPT_NAME].text
 
     def get_guardrail_prompt(self) -> str:
         """
         Retorna o prompt de guardrail.
         """
-        prompt = LOCAL_GUARDRAIL_PROMPT
-
-        if self.is_enabled and self._client:
-            try:
-                lf_prompt = self._client.get_prompt("guardrail-prompt")
-                if lf_prompt:
-                    prompt = lf_prompt.get_langchain_prompt()
-            except Exception:
-                pass
-        
-        return str(prompt)
-langfuse_provider = LangfuseProvider()
+        return self._prompts[GUARDRAIL_PROMPT_NAME].text
 
+langfuse_provider = resources.register("langfuse", LangfuseProvider, shutdown=LangfuseProvider.shutdown)
@@ -0,0 +1,387 @@
+# src/providers/local_vector_store_provider.py
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore, VectorStoreRetriever
+
+from src.clients.embedding_client import EmbeddingsClient
+from src.core.vector_store_config import VectorStoreConfig
+from src.providers.embedding_provider import EmbeddingProvider
+from src.providers.vector_store_provider import SCORE_METADATA_KEY, VectorStoreProvider
+from src.utils.reranker import VECTOR_METADATA_KEY
+
+# Cada `flush` grava uma versão nova dos dois arquivos e só então troca o
+# ponteiro (`current.json`, uma única troca atômica): quem lê nunca combina
+# vetores de uma versão com payloads de outra. Sem ponteiro: layout antigo.
+_POINTER_FILE = "current.json"
+_VECTORS_FILE = "vectors{suffix}.npy"
+_PAYLOAD_FILE = "payload{suffix}.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class LocalVectorStoreProvider(VectorStoreProvider):
+    """
+    Vector DB em processo, sem rede: embeddings normalizados (float32) numa
+    matriz NumPy contígua, busca exata por similaridade de cosseno com um
+    produto matriz-vetor + `argpartition`.
+
+    - O score (cosseno) vai em `metadata["score"]`, como no Qdrant.
+    - Persistência em `<local_path>/<coleção>/` (`vectors-<versão>.npy` +
+      `payload-<versão>.json`, publicados juntos por `current.json`),
+      gravada em `flush()`. Com `local_mmap`, a matriz é aberta como
+      memory-map (só as páginas usadas vão para a RAM) e copiada para a
+      memória na primeira escrita.
+    - Se outro processo (ex.: `scripts/ingest.py`) publicar uma versão nova,
+      a busca recarrega os arquivos.
+
+    Indicado para coleções pequenas/médias e testes; para milhões de
+    vetores, use o Qdrant.
+    """
+
+    def __init__(self, config: VectorStoreConfig, embeddings_client: EmbeddingsClient) -> None:
+        self._config = config
+        self._emb_client = embeddings_client
+        self._dir = Path(config.local_path) / config.collection_name
+        self._lock = threading.RLock()
+
+        self._matrix = np.empty((0, 0), dtype=np.float32)  # capacidade >= _size linhas
+        self._size = 0
+        self._ids: List[str] = []
+        self._contents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._dirty = False
+        self._loaded_mtime: Optional[int] = None
+        self._version: Optional[str] = None
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    # ---- persistência ----------------------------------------------------
+
+    def _path(self, template: str, version: str) -> Path:
+        return self._dir / template.format(suffix=f"-{version}" if version else "")
+
+    def _current(self) -> Optional[tuple[int, str]]:
+        """(mtime do ponteiro, versão publicada); versão "" é o layout sem ponteiro."""
+        try:
+            mtime = (self._dir / _POINTER_FILE).stat().st_mtime_ns
+            return mtime, json.loads((self._dir / _POINTER_FILE).read_text(encoding="utf-8"))["version"]
+        except FileNotFoundError:
+            pass
+        try:
+            return self._path(_PAYLOAD_FILE, "").stat().st_mtime_ns, ""
+        except FileNotFoundError:
+            return None
+
+    def _current_mtime(self) -> Optional[int]:
+        for name in (_POINTER_FILE, _PAYLOAD_FILE.format(suffix="")):
+            try:
+                return (self._dir / name).stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _load(self) -> None:
+        current = self._current()
+        if current is None:
+            return
+        mtime, version = current
+        try:
+            payload = json.loads(self._path(_PAYLOAD_FILE, version).read_text(encoding="utf-8"))
+            matrix = np.load(
+                self._path(_VECTORS_FILE, version), mmap_mode="r" if self._config.local_mmap else None
+            )
+        except FileNotFoundError:
+            # Versão já substituída por outro flush entre ler o ponteiro e os
+            # arquivos: mantém o estado atual e tenta de novo na próxima busca
+            return
+        if matrix.shape[0] != len(payload["ids"]):
+            raise RuntimeError(
+                f"Índice local inconsistente em {self._dir} "
+                f"({matrix.shape[0]} vetores, {len(payload['ids'])} documentos); reindexe com --force"
+            )
+        self._matrix = matrix
+        self._size = matrix.shape[0]
+        self._ids = list(payload["ids"])
+        self._contents = list(payload["contents"])
+        self._metadatas = list(payload["metadatas"])
+        self._rows = {point_id: row for row, point_id in enumerate(self._ids)}
+        self._dirty = False
+        self._loaded_mtime = mtime
+        self._version = version
+
+    def _reload_if_changed(self) -> None:
+        if not self._dirty and self._current_mtime() != self._loaded_mtime:
+            self._load()
+
+    def _remove_old_versions(self, keep: set[Optional[str]]) -> None:
+        """Apaga versões antigas; a anterior fica para quem ainda está carregando-a."""
+        for template in (_VECTORS_FILE, _PAYLOAD_FILE):
+            prefix, ext = template.split("{suffix}")
+            for path in self._dir.glob(f"{prefix}*{ext}"):
+                version = path.name[len(prefix): -len(ext)].removeprefix("-")
+                if version not in keep:
+                    with contextlib.suppress(OSError):
+                        path.unlink()
+
+    def flush(self) -> None:
+        """Publica o índice em disco: arquivos de uma versão nova + troca atômica do ponteiro."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dir.mkdir(parents=True, exist_ok=True)
+            version = uuid.uuid4().hex
+            with open(self._path(_VECTORS_FILE, version), "wb") as fh:
+                np.save(fh, np.ascontiguousarray(self._matrix[: self._size]))
+            self._path(_PAYLOAD_FILE, version).write_text(
+                json.dumps(
+                    {"ids": self._ids, "contents": self._contents, "metadatas": self._metadatas},
+                    ensure_ascii=False,
+                ),
+                encoding="utf-8",
+            )
+            pointer_tmp = self._dir / f"{_POINTER_FILE}.tmp"
+            pointer_tmp.write_text(json.dumps({"version": version}), encoding="utf-8")
+            os.replace(pointer_tmp, self._dir / _POINTER_FILE)
+            self._remove_old_versions(keep={version, self._version})
+            self._dirty = False
+            self._version = version
+            self._loaded_mtime = self._current_mtime()
+
+    # ---- escrita ----------------------------------------------------------
+
+    def _writable(self, dim: int, extra_rows: int) -> None:
+        """Garante matriz em RAM com espaço para mais `extra_rows` (crescimento geométrico)."""
+        if self._size and self._matrix.shape[1] != dim:
+            raise ValueError(f"Dimensão do embedding mudou ({self._matrix.shape[1]} -> {dim}); reindexe com --force")
+        needed = self._size + extra_rows
+        if isinstance(self._matrix, np.memmap) or self._matrix.shape[0] < needed or self._matrix.shape[1] != dim:
+            capacity = max(needed, 2 * self._matrix.shape[0], 64)
+            grown = np.empty((capacity, dim), dtype=np.float32)
+            if self._size:
+                grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+
+    def upsert_vectors(self, documents: List[Document], vectors: List[List[float]], ids: List[str]) -> None:
+        """Substitui no lugar os IDs existentes e acrescenta os novos."""
+        if not documents:
+            return
+        block = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            self._reload_if_changed()
+            self._writable(block.shape[1], len(ids))
+            for doc, vector, point_id in zip(documents, block, ids):
+                row = self._rows.get(point_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[point_id] = row
+                    self._ids.append(point_id)
+                    self._contents.append(doc.page_content)
+                    self._metadatas.append(dict(doc.metadata))
+                else:
+                    self._contents[row] = doc.page_content
+                    self._metadatas[row] = dict(doc.metadata)
+                self._matrix[row] = vector
+            self._dirty = True
+
+    def upsert_documents(self, documents: List[Document], ids: List[str]) -> None:
+        if documents:
+            vectors = self._emb_client.embed_documents([doc.page_content for doc in documents])
+            self.upsert_vectors(documents, vectors, ids)
+
+    def index_documents(self, documents: List[Document]) -> None:
+        self.upsert_documents(documents, [str(uuid.uuid4()) for _ in documents])
+
+    def delete_documents(self, ids: List[str]) -> None:
+        """Remove trocando a linha pela última: a matriz continua contígua, O(1) por ID."""
+        with self._lock:
+            self._reload_if_changed()
+            for point_id in ids:
+                row = self._rows.pop(point_id, None)
+                if row is None:
+                    continue
+                if isinstance(self._matrix, np.memmap):
+                    self._writable(self._matrix.shape[1], 0)
+                self._dirty = True
+                last = self._size - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = self._ids[last]
+                    self._contents[row] = self._contents[last]
+                    self._metadatas[row] = self._metadatas[last]
+                    self._rows[self._ids[row]] = row
+                self._ids.pop()
+                self._contents.pop()
+                self._metadatas.pop()
+                self._size = last
+
+    # ---- busca --------------------------------------------------------------
+
+    def _to_document(self, row: int, score: float, with_vectors: bool = False) -> Document:
+        metadata = dict(self._metadatas[row])
+        metadata["_id"] = self._ids[row]
+        metadata["_collection_name"] = self._config.collection_name
+        metadata[SCORE_METADATA_KEY] = score
+        if with_vectors:
+            metadata[VECTOR_METADATA_KEY] = self._matrix[row].tolist()
+        return Document(page_content=self._contents[row], metadata=metadata)
+
+    def _top_k(self, scores: np.ndarray, k: int, with_vectors: bool = False) -> List[Document]:
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self._to_document(int(row), float(scores[row]), with_vectors) for row in top]
+
+    def search_by_vector(self, vector: List[float], k: int, with_vectors: bool = False) -> List[Document]:
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            self._reload_if_changed()
+            if self._size == 0:
+                return []
+            return self._top_k(self._matrix[: self._size] @ query, k, with_vectors)
+
+    def batch_search_by_vector(
+        self, vectors: List[List[float]], k: List[int], with_vectors: bool = False
+    ) -> List[List[Document]]:
+        """Todas as queries num único produto matriz-matriz."""
+        if not vectors:
+            return []
+        queries = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            self._reload_if_changed()
+            if self._size == 0:
+                return [[] for _ in vectors]
+            scores = queries @ self._matrix[: self._size].T
+            return [self._top_k(row_scores, limit, with_vectors) for row_scores, limit in zip(scores, k)]
+
+    def similarity_search(self, query: str, k: int) -> List[Document]:
+        return self.search_by_vector(self._emb_client.embed_query(query), k)
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int,
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[Document]:
+        # A busca em si é sub-milissegundo para coleções pequenas: roda no event loop.
+        # `hnsw_ef` / `exact` não se aplicam: o top-k aqui já é exato
+        return self.search_by_vector(await self._emb_client.aembed_query(query), k, with_vectors)
+
+    async def abatch_similarity_search(
+        self,
+        queries: List[str],
+        k: List[int],
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[List[Document]]:
+        if not queries:
+            return []
+        vectors = await self._emb_client.aembed_documents(queries)
+        return self.batch_search_by_vector(vectors, k, with_vectors)
+
+    def as_retriever(self, k: int) -> VectorStoreRetriever:
+        return _LocalLangChainStore(self).as_retriever(search_kwargs={"k": k})
+
+
+class _LangChainEmbeddingProvider(EmbeddingProvider):
+    """Embeddings do LangChain como EmbeddingProvider (usado por `from_texts`)."""
+
+    def __init__(self, embeddings: Embeddings) -> None:
+        self._embeddings = embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embeddings.embed_query(text)
+
+    def embed_documents(self, texts: Iterable[str]) -> List[List[float]]:
+        return self._embeddings.embed_documents(list(texts))
+
+    @property
+    def langchain_embeddings(self) -> Embeddings:
+        return self._embeddings
+
+
+def _reject_kwargs(method: str, kwargs: Dict[str, Any]) -> None:
+    # O índice local não tem filtros nem outras opções de busca: melhor falhar
+    # do que ignorar em silêncio (ex.: `filter` devolveria resultados sem filtrar)
+    if kwargs:
+        raise TypeError(f"{method}: argumentos não suportados pelo índice local: {sorted(kwargs)}")
+
+
+class _LocalLangChainStore(VectorStore):
+    """Adapter mínimo para expor o provider local como VectorStore do LangChain."""
+
+    def __init__(self, provider: LocalVectorStoreProvider) -> None:
+        self._provider = provider
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._provider._emb_client.as_langchain_embeddings
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        _reject_kwargs("add_texts", kwargs)
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        docs = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        ids = list(ids or [str(uuid.uuid4()) for _ in docs])
+        self._provider.upsert_documents(docs, ids)
+        return ids
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        _reject_kwargs("similarity_search", kwargs)
+        return self._provider.similarity_search(query, k)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        _reject_kwargs("asimilarity_search", kwargs)
+        return await self._provider.asimilarity_search(query, k)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        config: Optional[VectorStoreConfig] = None,
+        **kwargs: Any,
+    ) -> "_LocalLangChainStore":
+        """Abre (ou cria) o índice local de `config` (padrão: o do .env), indexa os textos e persiste."""
+        _reject_kwargs("from_texts", kwargs)
+        provider = LocalVectorStoreProvider(
+            config=config or VectorStoreConfig(backend="local"),
+            embeddings_client=EmbeddingsClient(_LangChainEmbeddingProvider(embedding)),
+        )
+        store = cls(provider)
+        store.add_texts(texts, metadatas, ids=ids)
+        provider.flush()
+        return store
@@ -1,26 +1,131 @@
 # src/rag/ollama_embedding_provider.py
 
-from typing import Iterable, List
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+import httpx
+from langchain_core.embeddings import Embeddings as LCEmbeddings
 from langchain_ollama import OllamaEmbeddings
+from ollama import ResponseError
 
-from src.providers.embedding_provider import EmbeddingProvider
+from src.providers.embedding_provider import EmbeddingProvider, ProviderLangChainEmbeddings
+from src.providers.ollama_provider import ollama_provider
 from src.core.embeddings_config import EmbeddingsConfig
+from src.utils.logger import logger
+
+T = TypeVar("T")
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Falhas transitórias: rede/timeout, Ollama sobrecarregado (429) ou erro 5xx."""
+    if isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    return isinstance(exc, ResponseError) and (exc.status_code == 429 or exc.status_code >= 500)
 
 
 class OllamaEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeddings via Ollama.
+
+    `embed_documents`/`aembed_documents` dividem os textos em lotes de
+    `batch_size` e enviam até `max_concurrency` lotes ao mesmo tempo; a
+    saída mantém a ordem de entrada. Cada requisição respeita `timeout` e
+    falhas transitórias são repetidas até `max_retries` vezes com backoff
+    exponencial. As conexões vêm do pool compartilhado (`ollama_provider`).
+    O mesmo vale para o objeto LangChain (`langchain_embeddings`).
+    """
+
     def __init__(self, config: EmbeddingsConfig) -> None:
         self._config = config
         self._lc = OllamaEmbeddings(
             model=config.model,
             base_url=config.base_url,
+            **ollama_provider.langchain_kwargs(timeout=config.timeout),
         )
+        self._batch_size = max(1, config.batch_size)
+        self._max_concurrency = max(1, config.max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._lc_adapter = ProviderLangChainEmbeddings(self)
+
+    @property
+    def model_name(self) -> str:
+        return self._config.model
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i : i + self._batch_size] for i in range(0, len(texts), self._batch_size)]
+
+    def _backoff(self, attempt: int) -> float:
+        return self._config.retry_backoff * (2 ** attempt)
+
+    def _with_retry(self, call: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except Exception as exc:
+                if attempt >= self._config.max_retries or not _is_retryable(exc):
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Embedding falhou ({type(exc).__name__}: {exc}); nova tentativa em {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    async def _awith_retry(self, call: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as exc:
+                if attempt >= self._config.max_retries or not _is_retryable(exc):
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Embedding falhou ({type(exc).__name__}: {exc}); nova tentativa em {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_concurrency, thread_name_prefix="ollama-embed"
+                )
+            return self._executor
 
     def embed_query(self, text: str) -> List[float]:
-        return self._lc.embed_query(text)
+        return self._with_retry(lambda: self._lc.embed_query(text))
 
     def embed_documents(self, texts: Iterable[str]) -> List[List[float]]:
-        return self._lc.embed_documents(list(texts))
+        batches = self._batches(list(texts))
+        if len(batches) <= 1 or self._max_concurrency == 1:
+            results = [self._with_retry(lambda b=batch: self._lc.embed_documents(b)) for batch in batches]
+        else:
+            # map preserva a ordem dos lotes, qualquer que seja a ordem de conclusão
+            results = list(
+                self._get_executor().map(
+                    lambda batch: self._with_retry(lambda: self._lc.embed_documents(batch)), batches
+                )
+            )
+        return [vector for batch in results for vector in batch]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._awith_retry(lambda: self._lc.aembed_query(text))
+
+    async def aembed_documents(self, texts: Iterable[str]) -> List[List[float]]:
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._awith_retry(lambda: self._lc.aembed_documents(batch))
+
+        results = await asyncio.gather(*(embed_batch(batch) for batch in self._batches(list(texts))))
+        return [vector for batch in results for vector in batch]
 
     @property
-    def langchain_embeddings(self) -> OllamaEmbeddings:
-        return self._lc
\ No newline at end of file
+    def langchain_embeddings(self) -> LCEmbeddings:
+        # Não o OllamaEmbeddings cru: o QdrantVectorStore também passa pelos
+        # lotes, pelo limite de concorrência e pelo retry daqui
+        return self._lc_adapter
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+from ollama import AsyncClient
+
+from src.core.config import settings
+from src.utils.logger import logger
+
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_keep_alive(value: str) -> int:
+    """
+    `OLLAMA_KEEP_ALIVE` em segundos: `300`, `-1` (para sempre), `30s`, `30m`
+    ou `2h` (o `OllamaEmbeddings` só aceita inteiro).
+    """
+    value = value.strip().lower()
+    if value and value[-1] in _DURATION_UNITS:
+        return int(float(value[:-1]) * _DURATION_UNITS[value[-1]])
+    return int(value)
+
+
+@dataclass
+class ModelWarmup:
+    """Estado do pré-carregamento de um modelo no Ollama."""
+    model: str
+    loaded: bool = False
+    load_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class OllamaProvider:
+    """
+    Camada compartilhada de acesso ao Ollama.
+
+    - Um pool de conexões HTTP keep-alive por processo (transports httpx
+      síncrono e assíncrono), usado pelo LLM da API, pelo LLM do guardrail
+      e pelos embeddings: cada cliente LangChain mantém o próprio timeout,
+      mas as conexões vêm do mesmo pool.
+    - `keep_alive` em todas as chamadas, para o Ollama manter os modelos
+      carregados entre requisições.
+    - Warm-up: pré-carrega o LLM e o modelo de embedding (em paralelo,
+      tentando de novo até conseguir). `ready` só fica verdadeiro depois.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        keep_alive: Optional[int] = None,
+        pool_size: Optional[int] = None,
+        warmup_models: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self._base_url = base_url or settings.OLLAMA_BASE_URL
+        self._keep_alive = keep_alive if keep_alive is not None else parse_keep_alive(settings.OLLAMA_KEEP_ALIVE)
+        pool_size = pool_size or settings.OLLAMA_POOL_SIZE
+        self._limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        # Transports criados no primeiro uso (o contexto SSL de cada um custa
+        # ~80 ms), não no import
+        self._transports: Optional[tuple[httpx.HTTPTransport, httpx.AsyncHTTPTransport]] = None
+        self._transports_lock = threading.Lock()
+        if warmup_models is None:
+            warmup_models = (
+                {"llm": settings.OLLAMA_LLM_MODEL, "embeddings": settings.OLLAMA_EMBEDDING_MODEL}
+                if settings.OLLAMA_WARMUP
+                else {}
+            )
+        self._warmup = {kind: ModelWarmup(model=model) for kind, model in warmup_models.items()}
+
+    @property
+    def keep_alive(self) -> int:
+        return self._keep_alive
+
+    def _get_transports(self) -> tuple[httpx.HTTPTransport, httpx.AsyncHTTPTransport]:
+        if self._transports is None:
+            with self._transports_lock:
+                if self._transports is None:
+                    self._transports = (
+                        httpx.HTTPTransport(limits=self._limits),
+                        httpx.AsyncHTTPTransport(limits=self._limits),
+                    )
+        return self._transports
+
+    def langchain_kwargs(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Kwargs para `ChatOllama` / `OllamaEmbeddings`: pool compartilhado + keep_alive."""
+        transport, async_transport = self._get_transports()
+        sync_kwargs: Dict[str, Any] = {"transport": transport}
+        async_kwargs: Dict[str, Any] = {"transport": async_transport}
+        if timeout is not None:
+            sync_kwargs["timeout"] = async_kwargs["timeout"] = timeout
+        return {
+            "keep_alive": self._keep_alive,
+            "sync_client_kwargs": sync_kwargs,
+            "async_client_kwargs": async_kwargs,
+        }
+
+    # ---- warm-up / readiness ------------------------------------------------
+
+    @property
+    def ready(self) -> bool:
+        return all(state.loaded for state in self._warmup.values())
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "models": {
+                kind: {"model": s.model, "loaded": s.loaded, "load_ms": s.load_ms, "error": s.error}
+                for kind, s in self._warmup.items()
+            },
+        }
+
+    async def _load(self, client: AsyncClient, kind: str, state: ModelWarmup) -> None:
+        inicio = time.monotonic()
+        try:
+            if kind == "embeddings":
+                await client.embed(model=state.model, input="warm-up", keep_alive=self._keep_alive)
+            else:
+                # Prompt vazio: o Ollama só carrega o modelo, sem gerar
+                await client.generate(model=state.model, prompt="", keep_alive=self._keep_alive)
+        except Exception as e:
+            state.error = str(e) or type(e).__name__
+            logger.warning(f"Warm-up do modelo {state.model!r} falhou: {state.error}")
+            return
+        state.loaded, state.error = True, None
+        state.load_ms = round((time.monotonic() - inicio) * 1000, 2)
+        logger.info(f"Modelo {state.model!r} carregado no Ollama em {state.load_ms} ms")
+
+    async def awarmup(self, retry_seconds: Optional[float] = None) -> None:
+        """
+        Pré-carrega os modelos pendentes em paralelo; repete a cada
+        `retry_seconds` (OLLAMA_WARMUP_RETRY_SECONDS) até todos carregarem.
+        """
+        retry = retry_seconds if retry_seconds is not None else settings.OLLAMA_WARMUP_RETRY_SECONDS
+        client = AsyncClient(host=self._base_url, transport=self._get_transports()[1])
+        while True:
+            pending: List[tuple[str, ModelWarmup]] = [(k, s) for k, s in self._warmup.items() if not s.loaded]
+            if not pending:
+                return
+            await asyncio.gather(*(self._load(client, kind, state) for kind, state in pending))
+            if not self.ready:
+                await asyncio.sleep(retry)
+
+    async def aclose(self) -> None:
+        with self._transports_lock:
+            transports, self._transports = self._transports, None
+        if transports is None:
+            return
+        await transports[1].aclose()
+        transports[0].close()
+
+
+ollama_provider = OllamaProvider()
@@ -1,18 +1,118 @@
 # src/providers/qdrant_vector_store_provider.py
 
-from typing import List
+import threading
+from typing import Any, Dict, List, Optional
 
+import httpx
 from langchain_qdrant import QdrantVectorStore
 from langchain_core.documents import Document
 from langchain_core.vectorstores import VectorStoreRetriever
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
 
-from src.providers.vector_store_provider import VectorStoreProvider
+from src.providers.vector_store_provider import SCORE_METADATA_KEY, VectorStoreProvider
 from src.core.vector_store_config import VectorStoreConfig
-from src.clients.embedding_client import EmbeddingsClient 
+from src.clients.embedding_client import EmbeddingsClient
+from src.utils.reranker import VECTOR_METADATA_KEY
+
+
+def build_quantization_config(config: VectorStoreConfig) -> Optional[models.QuantizationConfig]:
+    """
+    Quantização da coleção: int8 (4x menos memória) ou binária (32x).
+    Os vetores quantizados ficam sempre na RAM.
+    """
+    if config.quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if config.quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def build_vectors_config(config: VectorStoreConfig, dim: int) -> models.VectorParams:
+    """
+    Originais em disco só com quantização: a busca roda nos quantizados
+    (RAM) e lê do disco apenas os candidatos a reordenar.
+    """
+    return models.VectorParams(
+        size=dim,
+        distance=models.Distance.COSINE,
+        on_disk=config.on_disk_vectors and config.quantization != "none",
+    )
+
+
+def build_search_params(
+    config: VectorStoreConfig, hnsw_ef: Optional[int] = None, exact: Optional[bool] = None
+) -> Optional[models.SearchParams]:
+    """
+    Parâmetros da busca:
+    - `hnsw_ef` / `exact`: os da requisição, ou os da config se não vierem;
+    - com quantização, oversampling + rescoring: busca `oversampling * k`
+      candidatos nos vetores quantizados e reordena com os originais.
+    """
+    hnsw_ef = hnsw_ef if hnsw_ef is not None else config.hnsw_ef
+    exact = exact if exact is not None else config.exact
+    quantization = None
+    if config.quantization != "none":
+        quantization = models.QuantizationSearchParams(rescore=config.rescore, oversampling=config.oversampling)
+    if quantization is None and hnsw_ef is None and not exact:
+        return None
+    return models.SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=quantization)
+
+
+# Layout de ponto do QdrantVectorStore (LangChain), usado também pelos caminhos
+# que falam direto com o Qdrant (upsert de vetores prontos e buscas async)
+VECTOR_NAME = ""
+CONTENT_PAYLOAD_KEY = "page_content"
+METADATA_PAYLOAD_KEY = "metadata"
+
+
+def qdrant_client_kwargs(config: VectorStoreConfig) -> Dict[str, Any]:
+    """
+    Conexão com o Qdrant: gRPC ou REST, timeout e pool. No gRPC, `pool_size`
+    é o número de canais; no REST, o de conexões keep-alive (com limites
+    explícitos, porque o qdrant-client desliga o keep-alive para localhost
+    e toda busca abriria uma conexão nova).
+    """
+    kwargs: Dict[str, Any] = {
+        "url": config.url,
+        "prefer_grpc": config.prefer_grpc,
+        "grpc_port": config.grpc_port,
+        "timeout": config.timeout,
+    }
+    if config.prefer_grpc:
+        kwargs["pool_size"] = config.pool_size
+    else:
+        kwargs["limits"] = httpx.Limits(max_connections=config.pool_size, max_keepalive_connections=config.pool_size)
+    return kwargs
+
+
+def build_qdrant_client(config: VectorStoreConfig) -> QdrantClient:
+    return QdrantClient(**qdrant_client_kwargs(config))
+
+
+def build_async_qdrant_client(config: VectorStoreConfig) -> AsyncQdrantClient:
+    return AsyncQdrantClient(**qdrant_client_kwargs(config))
 
 
 class QdrantVectorStoreProvider(VectorStoreProvider):
+    """
+    Um único cliente assíncrono, criado junto com o provider e usado por
+    todas as buscas da API. O qdrant-client não tem um objeto que sirva aos
+    dois modos, então o cliente síncrono (com as mesmas opções de conexão)
+    só é criado no primeiro uso dos caminhos síncronos: ingestão
+    (`upsert_vectors` / `delete_documents`) e QdrantVectorStore do LangChain.
+    Na API, que só busca, existe um pool de conexões só.
+
+    As buscas aceitam `hnsw_ef` / `exact` por requisição (ver
+    `build_search_params`).
+
+    O QdrantVectorStore é criado só no primeiro uso: o construtor dele
+    valida a coleção embedando um texto de teste, e a ingestão incremental
+    (`upsert_vectors` / `delete_documents`) não precisa dele, então uma
+    reexecução sem mudanças não chama o Ollama.
+    """
+
     def __init__(
         self,
         config: VectorStoreConfig,
@@ -21,21 +121,170 @@ class QdrantVectorStoreProvider(VectorStoreProvider):
         self._config = config
         self._emb_client = embeddings_client
 
-        self._client = QdrantClient(url=config.url)
-        self._vs = QdrantVectorStore(
-            client=self._client,
-            collection_name=config.collection_name,
-            embedding=self._emb_client.as_langchain_embeddings,
-        )
+        self._async_client = build_async_qdrant_client(config)
+        self._client: Optional[QdrantClient] = None
+        self._vs: Optional[QdrantVectorStore] = None
+        self._lock = threading.RLock()
+        self._search_params = build_search_params(config)
+
+    def _sync_client(self) -> QdrantClient:
+        with self._lock:
+            if self._client is None:
+                self._client = build_qdrant_client(self._config)
+            return self._client
+
+    def _store(self) -> QdrantVectorStore:
+        with self._lock:
+            if self._vs is None:
+                self._vs = QdrantVectorStore(
+                    client=self._sync_client(),
+                    collection_name=self._config.collection_name,
+                    embedding=self._emb_client.as_langchain_embeddings,
+                    vector_name=VECTOR_NAME,
+                    content_payload_key=CONTENT_PAYLOAD_KEY,
+                    metadata_payload_key=METADATA_PAYLOAD_KEY,
+                )
+            return self._vs
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            self._client.close()
+        await self._async_client.close()
+
+    def _params(self, hnsw_ef: Optional[int], exact: Optional[bool]) -> Optional[models.SearchParams]:
+        if hnsw_ef is None and exact is None:
+            return self._search_params
+        return build_search_params(self._config, hnsw_ef=hnsw_ef, exact=exact)
 
     def index_documents(self, documents: List[Document]) -> None:
         """
         Adiciona documentos no índice.
         """
-        self._vs.add_documents(documents)
+        self._store().add_documents(documents)
+
+    def upsert_documents(self, documents: List[Document], ids: List[str]) -> None:
+        """
+        `add_documents` com IDs explícitos vira upsert no Qdrant.
+        """
+        if documents:
+            self._store().add_documents(documents, ids=ids)
+
+    def upsert_vectors(self, documents: List[Document], vectors: List[List[float]], ids: List[str]) -> None:
+        """
+        Mesmo layout de ponto/payload do `add_documents` do LangChain,
+        mas sem embedar de novo.
+        """
+        if not documents:
+            return
+        self._sync_client().upsert(
+            collection_name=self._config.collection_name,
+            points=[
+                models.PointStruct(
+                    id=point_id,
+                    vector={VECTOR_NAME: vector},
+                    payload={
+                        CONTENT_PAYLOAD_KEY: doc.page_content,
+                        METADATA_PAYLOAD_KEY: doc.metadata,
+                    },
+                )
+                for doc, vector, point_id in zip(documents, vectors, ids)
+            ],
+        )
+
+    def delete_documents(self, ids: List[str]) -> None:
+        if ids:
+            self._sync_client().delete(
+                collection_name=self._config.collection_name,
+                points_selector=models.PointIdsList(points=ids),
+            )
+
+    def similarity_search(
+        self, query: str, k: int, hnsw_ef: Optional[int] = None, exact: Optional[bool] = None
+    ) -> List[Document]:
+        scored = self._store().similarity_search_with_score(
+            query=query, k=k, search_params=self._params(hnsw_ef, exact)
+        )
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, SCORE_METADATA_KEY: score})
+            for doc, score in scored
+        ]
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int,
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[Document]:
+        """
+        Busca via AsyncQdrantClient.
+        O QdrantVectorStore do LangChain não tem caminho async nativo
+        (cairia em run_in_executor), então consultamos o Qdrant diretamente
+        usando o mesmo layout de payload do `index_documents`.
+        """
+        vector = await self._emb_client.aembed_query(query)
+        response = await self._async_client.query_points(
+            collection_name=self._config.collection_name,
+            query=vector,
+            using=VECTOR_NAME,
+            limit=k,
+            search_params=self._params(hnsw_ef, exact),
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+        return [self._to_document(point) for point in response.points]
 
-    def similarity_search(self, query: str, k: int) -> List[Document]:
-        return self._vs.similarity_search(query=query, k=k)
+    async def abatch_similarity_search(
+        self,
+        queries: List[str],
+        k: List[int],
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[List[Document]]:
+        """
+        Embeda todas as queries numa única chamada e usa a API de batch
+        search do Qdrant (`query_batch_points`): uma requisição HTTP só.
+        """
+        if not queries:
+            return []
+        vectors = await self._emb_client.aembed_documents(queries)
+        params = self._params(hnsw_ef, exact)
+        responses = await self._async_client.query_batch_points(
+            collection_name=self._config.collection_name,
+            requests=[
+                models.QueryRequest(
+                    query=vector,
+                    using=VECTOR_NAME,
+                    limit=limit,
+                    params=params,
+                    with_payload=True,
+                    with_vector=with_vectors,
+                )
+                for vector, limit in zip(vectors, k)
+            ],
+        )
+        return [[self._to_document(point) for point in response.points] for response in responses]
+
+    def _to_document(self, point) -> Document:
+        payload = point.payload or {}
+        metadata = dict(payload.get(METADATA_PAYLOAD_KEY) or {})
+        metadata["_id"] = point.id
+        metadata["_collection_name"] = self._config.collection_name
+        metadata[SCORE_METADATA_KEY] = point.score
+        vector = getattr(point, "vector", None)
+        if isinstance(vector, dict):
+            vector = vector.get(VECTOR_NAME)
+        if isinstance(vector, list):
+            metadata[VECTOR_METADATA_KEY] = vector
+        return Document(
+            page_content=payload.get(CONTENT_PAYLOAD_KEY, ""),
+            metadata=metadata,
+        )
 
     def as_retriever(self, k: int) -> VectorStoreRetriever:
-        return self._vs.as_retriever(search_kwargs={"k": k})
\ No newline at end of file
+        search_kwargs = {"k": k}
+        if self._search_params is not None:
+            search_kwargs["search_params"] = self._search_params
+        return self._store().as_retriever(search_kwargs=search_kwargs)
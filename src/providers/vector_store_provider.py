@@ -2,10 +2,13 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from langchain_core.documents import Document
 from langchain_core.vectorstores import VectorStoreRetriever
 
+# Metadado com o score de similaridade (cosseno) da busca densa
+SCORE_METADATA_KEY = "score"
+
 
 class VectorStoreProvider(ABC):
     """
@@ -21,6 +24,41 @@ class VectorStoreProvider(ABC):
         """
         ...
 
+    @abstractmethod
+    def upsert_documents(self, documents: List[Document], ids: List[str]) -> None:
+        """
+        Insere ou substitui documentos com IDs determinísticos
+        (reindexar o mesmo chunk sobrescreve em vez de duplicar).
+        """
+        ...
+
+    @abstractmethod
+    def upsert_vectors(self, documents: List[Document], vectors: List[List[float]], ids: List[str]) -> None:
+        """
+        Upsert com vetores já calculados (pipeline de ingestão, em que o
+        embedding é uma etapa separada).
+        """
+        ...
+
+    @abstractmethod
+    def delete_documents(self, ids: List[str]) -> None:
+        """
+        Remove pontos do índice pelos IDs.
+        """
+        ...
+
+    def flush(self) -> None:
+        """
+        Persiste escritas pendentes. Backends remotos (Qdrant) gravam a cada
+        chamada e não precisam fazer nada.
+        """
+
+    async def aclose(self) -> None:
+        """
+        Libera conexões com o backend (shutdown da API). Backends em processo
+        não têm nada a fechar.
+        """
+
     @abstractmethod
     def similarity_search(self, query: str, k: int) -> List[Document]:
         """
@@ -28,6 +66,41 @@ class VectorStoreProvider(ABC):
         """
         ...
 
+    @abstractmethod
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int,
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[Document]:
+        """
+        Busca semântica assíncrona (não bloqueia o event loop da API).
+        Com `with_vectors`, o vetor de cada chunk vem em `metadata["_vector"]`
+        (usado pelo reranking, sem reembedar). `hnsw_ef` / `exact` ajustam a
+        busca HNSW só nesta requisição (None = config); backends sem HNSW
+        (busca sempre exata) os ignoram.
+        """
+        ...
+
+    @abstractmethod
+    async def abatch_similarity_search(
+        self,
+        queries: List[str],
+        k: List[int],
+        with_vectors: bool = False,
+        hnsw_ef: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[List[Document]]:
+        """
+        Busca semântica em lote: um embedding em lote e uma ida ao Vector DB
+        para todas as queries. `k[i]` é o top-k da `queries[i]`; o resultado
+        mantém a ordem das queries. `hnsw_ef` / `exact`: como em
+        `asimilarity_search`, para todas as queries do lote.
+        """
+        ...
+
     @abstractmethod
     def as_retriever(self, k: int) -> VectorStoreRetriever:
         """
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-import re
 import unicodedata
-from typing import ClassVar, Optional
+from typing import Any, Callable, ClassVar, Optional, TypeVar
 
 from langchain_ollama import ChatOllama
 
 from src.core.config import settings
+from src.core.lifecycle import resources
 from src.providers.langfuse_provider import langfuse_provider
+from src.providers.ollama_provider import ollama_provider
+from src.utils.cache import LRUTTLCache, SQLiteStore
+from src.utils.pattern_matcher import PatternMatcher
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class GuardrailService:
     """
@@ -61,49 +68,168 @@ class GuardrailService:
         "[DEVELOPER]", "<system>", "<admin>", "</system>", "</admin>",
     }
 
-    def __init__(self) -> None:
+    # Dados sensíveis (PII): regex usadas como estão, sem word boundaries extras
+    SENSITIVE_DATA_PATTERNS: ClassVar[set[str]] = {
+        r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b",  # CPF
+        r"\b\d{4}\s\d{4}\s\d{4}\s\d{4}\b", # Cartão de crédito genérico
+        "senha", "password", "token", "secret",
+    }
+
+    # Categoria -> motivo do bloqueio, na ordem de prioridade da validação
+    BLOCK_REASONS: ClassVar[dict[str, str]] = {
+        "privilege_escalation": "Solicitação bloqueada por conter padrões de injeção de comandos (privilégios).",
+        "instruction_manipulation": "Solicitação bloqueada por tentativa de ignorar instruções do sistema.",
+        "prompt_extraction": "Solicitação bloqueada por tentativa de extração de informações internas.",
+        "sensitive_data": "Solicitação bloqueada por conter ou solicitar dados sensíveis (PII).",
+    }
+
+    # Compilado uma única vez no carregamento da classe: uma varredura por pergunta
+    _MATCHER: ClassVar[PatternMatcher] = PatternMatcher(
+        literals={
+            "privilege_escalation": PRIVILEGE_ESCALATION_PATTERNS,
+            "instruction_manipulation": INSTRUCTION_MANIPULATION_PATTERNS,
+            "prompt_extraction": PROMPT_EXTRACTION_PATTERNS,
+        },
+        regexes={"sensitive_data": SENSITIVE_DATA_PATTERNS},
+    )
+
+    def __init__(self, verdict_cache: Optional[LRUTTLCache[bool]] = None) -> None:
         self._llm = ChatOllama(
             model=settings.OLLAMA_LLM_MODEL,
             base_url=settings.OLLAMA_BASE_URL,
             temperature=0,  # Temperatura 0 para determinismo
+            **ollama_provider.langchain_kwargs(),
         )
+        # Veredito do LLM (temperatura 0) é determinístico por pergunta + prompt
+        if verdict_cache is None:
+            verdict_cache = LRUTTLCache[bool](
+                maxsize=settings.GUARDRAIL_CACHE_SIZE,
+                ttl_seconds=settings.GUARDRAIL_CACHE_TTL_SECONDS,
+                store=SQLiteStore(settings.GUARDRAIL_CACHE_PATH, table="guardrail_verdicts")
+                if settings.GUARDRAIL_CACHE_PATH
+                else None,
+            )
+        self._verdict_cache = verdict_cache
+
+    @property
+    def verdict_cache_stats(self) -> dict:
+        return self._verdict_cache.stats()
+
+    def _verdict_cache_key(self, question: str, guardrail_prompt: str) -> str:
+        prompt_hash = hashlib.sha256(guardrail_prompt.encode("utf-8")).hexdigest()[:16]
+        return f"{prompt_hash}:{self._normalize_text(question)}"
 
     def _normalize_text(self, text: str) -> str:
         """Normaliza texto removendo acentos e convertendo para lowercase."""
         return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII").lower()
 
-    def _contains_pattern(self, query: str, patterns: set[str]) -> tuple[bool, Optional[str]]:
-        for pattern in patterns:
-            # Busca com word boundaries para evitar falsos positivos
-            if re.search(rf"\b{re.escape(pattern)}\b", query, re.IGNORECASE):
-                return True, pattern
-        return False, None
+    def match_patterns(self, question: str) -> dict[str, list[str]]:
+        """
+        Retorna todas as categorias e padrões encontrados na pergunta normalizada.
+        """
+        return self._MATCHER.match_categories(self._normalize_text(question))
+
+    def _lookup_verdict(self, question: str) -> tuple[Optional[str], Optional[str], Optional[bool]]:
+        """
+        Resolve o prompt de guardrail e consulta o cache de vereditos.
+        Retorna `(prompt, chave, veredito)`; prompt vazio desativa a verificação.
+        """
+        guardrail_prompt = langfuse_provider.get_guardrail_prompt()
+
+        if not guardrail_prompt:
+            return None, None, None
+
+        cache_key = self._verdict_cache_key(question, guardrail_prompt)
+        return guardrail_prompt, cache_key, self._verdict_cache.get(cache_key)
+
+    def _store_verdict(self, cache_key: str, response: Any) -> tuple[bool, Optional[str]]:
+        """Interpreta a resposta do LLM e grava o veredito no cache."""
+        is_unsafe = self._parse_verdict(response)
+        self._verdict_cache.set(cache_key, is_unsafe)
+        return self._verdict_result(is_unsafe)
+
+    async def _off_loop(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Executa `func` fora do event loop quando o cache tem camada em disco
+        (SQLite é bloqueante); cache só em memória roda direto.
+        """
+        if self._verdict_cache.persistent:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
 
     def _verify_intentional_prompt_extraction(self, question: str) -> tuple[bool, Optional[str]]:
         """
         Verifica se a pergunta é intencionalmente feita para extrair o prompt do sistema.
         Usa LLM para análise de intenção.
         """
-        guardrail_prompt = langfuse_provider.get_guardrail_prompt()
+        guardrail_prompt, cache_key, cached = self._lookup_verdict(question)
 
-        if not guardrail_prompt:
+        if guardrail_prompt is None or cache_key is None:
             return False, None
+        if cached is not None:
+            return self._verdict_result(cached)
 
         # Monta o prompt final
         full_prompt = guardrail_prompt.format(question=question)
 
         try:
             response = self._llm.invoke(full_prompt)
-            # O objeto retornado pelo ChatOllama geralmente tem .content
-            content = str(response.content).strip().upper()
+            return self._store_verdict(cache_key, response)
+        except Exception:
+            logger.exception("Erro no guardrail LLM")
+            # Fail-open: em caso de erro do LLM, não bloqueamos
 
-            if "UNSAFE" in content:
-                return True, "Solicitação bloqueada por IA de segurança (Intenção maliciosa detectada)."
+        return False, None
+
+    async def _averify_intentional_prompt_extraction(self, question: str) -> tuple[bool, Optional[str]]:
+        """
+        Versão assíncrona de `_verify_intentional_prompt_extraction` (usa `ainvoke`).
+        """
+        guardrail_prompt, cache_key, cached = await self._off_loop(self._lookup_verdict, question)
 
+        if guardrail_prompt is None or cache_key is None:
+            return False, None
+        if cached is not None:
+            return self._verdict_result(cached)
+
+        full_prompt = guardrail_prompt.format(question=question)
+
+        try:
+            response = await self._llm.ainvoke(full_prompt)
+            return await self._off_loop(self._store_verdict, cache_key, response)
         except Exception:
             logger.exception("Erro no guardrail LLM")
             # Fail-open: em caso de erro do LLM, não bloqueamos
-            pass
+
+        return False, None
+
+    def _parse_verdict(self, response: Any) -> bool:
+        """Retorna True se o LLM classificou a pergunta como UNSAFE."""
+        # O objeto retornado pelo ChatOllama geralmente tem .content
+        content = str(response.content).strip().upper()
+        return "UNSAFE" in content
+
+    def _verdict_result(self, is_unsafe: bool) -> tuple[bool, Optional[str]]:
+        if is_unsafe:
+            return True, "Solicitação bloqueada por IA de segurança (Intenção maliciosa detectada)."
+
+        return False, None
+
+    def validate_patterns(self, question: str) -> tuple[bool, Optional[str]]:
+        """
+        Camada barata (regex) da validação. Não faz chamadas externas.
+
+        Verifica, numa única varredura: prompt injection (escalação de
+        privilégios, manipulação e extração de instruções) e dados sensíveis.
+        """
+        hits = self.match_patterns(question)
+        if not hits:
+            return False, None
+
+        logger.debug(f"Guardrail patterns: {hits}")
+        for category, reason in self.BLOCK_REASONS.items():
+            if category in hits:
+                return True, reason
 
         return False, None
 
@@ -116,42 +242,39 @@ class GuardrailService:
             - is_blocked: True se a pergunta deve ser bloqueada.
             - reason: Motivo do bloqueio ou mensagem de erro para o usuário.
         """
-        normalized_query = self._normalize_text(question)
-
-        # 1. Verificar Prompt Injection (Regex rápido)
-        # Escalação de privilégios
-        found, _ = self._contains_pattern(normalized_query, self.PRIVILEGE_ESCALATION_PATTERNS)
-        if found:
-            return True, "Solicitação bloqueada por conter padrões de injeção de comandos (privilégios)."
+        is_blocked, reason = self.validate_patterns(question)
+        if is_blocked:
+            return True, reason
 
-        # Manipulação de instruções
-        found, _ = self._contains_pattern(normalized_query, self.INSTRUCTION_MANIPULATION_PATTERNS)
-        if found:
-            return True, "Solicitação bloqueada por tentativa de ignorar instruções do sistema."
+        # 3. Verificação via LLM (Mais custoso, roda por último)
+        # Verifica intenção maliciosa que escapou do regex
+        is_malicious_intent, reason = self._verify_intentional_prompt_extraction(question)
+        if is_malicious_intent:
+            return True, reason
 
-        # Extração de prompt
-        found, _ = self._contains_pattern(normalized_query, self.PROMPT_EXTRACTION_PATTERNS)
-        if found:
-            return True, "Solicitação bloqueada por tentativa de extração de informações internas."
+        return False, None
 
-        # 2. Verificar Domínio (Regex básico)
-        sensitive_patterns = {
-            r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b",  # CPF
-            r"\b\d{4}\s\d{4}\s\d{4}\s\d{4}\b", # Cartão de crédito genérico
-            "senha", "password", "token", "secret",
-        }
+    async def avalidate_question(self, question: str) -> tuple[bool, Optional[str]]:
+        """
+        Versão assíncrona de `validate_question`, usada pelo pipeline da API.
+        """
+        is_blocked, reason = self.validate_patterns(question)
+        if is_blocked:
+            return True, reason
 
-        for pattern in sensitive_patterns:
-            if re.search(pattern, normalized_query):
-                return True, "Solicitação bloqueada por conter ou solicitar dados sensíveis (PII)."
+        return await self.avalidate_intent(question)
 
-        # 3. Verificação via LLM (Mais custoso, roda por último)
-        # Verifica intenção maliciosa que escapou do regex
-        is_malicious_intent, reason = self._verify_intentional_prompt_extraction(question)
+    async def avalidate_intent(self, question: str) -> tuple[bool, Optional[str]]:
+        """
+        Apenas a camada LLM (análise de intenção), sem os regex.
+        Permite ao chamador rodá-la em paralelo com outras etapas
+        depois de já ter aplicado `validate_patterns`.
+        """
+        is_malicious_intent, reason = await self._averify_intentional_prompt_extraction(question)
         if is_malicious_intent:
             return True, reason
 
         return False, None
 
 
-guardrail_service = GuardrailService()
+guardrail_service = resources.register("guardrail", GuardrailService)
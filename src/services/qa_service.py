@@ -1,24 +1,78 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, TypeVar
 
+from langchain_core.documents import Document
 from langchain_ollama import ChatOllama
-from langfuse.decorators import observe
 
 from src.api.schemas import (
+    Citation,
     GuardrailStatus,
     Metrics,
     QueryRequest,
     QueryResponse,
 )
-from src.clients.retrieval_client import retrieval_client
+from src.clients.embedding_client import get_embeddings_client
+from src.clients.retrieval_client import apply_score_threshold, retrieval_client
 from src.core.config import settings
+from src.core.lifecycle import resources
+from src.core.types import GuardedRetrieval, RetrievalResult
 from src.providers.langfuse_provider import langfuse_provider
+from src.providers.ollama_provider import ollama_provider
+from src.utils.context_packer import PackedContext, pack_context
+from src.utils.index_version import read_index_version
 from src.utils.logger import logger
-from src.utils.rag_helpers import build_citations, build_context, estimate_tokens
+from src.utils.rag_helpers import build_citations, build_context
+from src.utils.reranker import Reranker
+from src.utils.semantic_cache import SemanticAnswerCache, SemanticHit
+from src.utils.token_counter import count_tokens
+from src.utils.tracing import SpanRecord, TraceRecord
 
 from src.services.guardrrails_service import guardrail_service
 
+T = TypeVar("T")
+
+# Resposta quando nenhum chunk passa de MIN_RELEVANCE_SCORE (o LLM não é chamado)
+INSUFFICIENT_CONTEXT_ANSWER = (
+    "Não encontrei nos documentos indexados informações suficientes para responder a essa pergunta."
+)
+
+
+@dataclass
+class _Prompt:
+    """Prompt final, contexto empacotado e tokens do prompt (sem recontar o contexto)."""
+    text: str
+    context: str
+    packed: PackedContext
+    tokens: int
+
+
+@dataclass
+class _AnswerCacheLookup:
+    """Resultado da consulta ao cache semântico (embedding reaproveitado no store)."""
+    hit: Optional[SemanticHit]
+    vector: Optional[List[float]]
+    version: str
+
+
+def _search_params(request: QueryRequest) -> Dict[str, Any]:
+    """`hnsw_ef` / `exact` informados na requisição (os ausentes ficam com a config)."""
+    params = {"hnsw_ef": request.hnsw_ef, "exact": request.exact}
+    return {name: value for name, value in params.items() if value is not None}
+
+
+async def _timed(awaitable: Awaitable[T]) -> tuple[T, float]:
+    """Aguarda `awaitable` e retorna (resultado, latência em ms)."""
+    inicio = time.monotonic()
+    result = await awaitable
+    return result, (time.monotonic() - inicio) * 1000
+
+
 class QAService:
     """
     Serviço de alto nível para perguntas e respostas (RAG).
@@ -28,100 +82,439 @@ class QAService:
     - Montar o prompt de RAG
     - Chamar o LLM (Ollama)
     - Calcular métricas de latência e tokens
+    - Reaproveitar respostas de perguntas parafraseadas (cache semântico)
+    - Reordenar os candidatos do retrieval (reranking, se habilitado)
+    - Não chamar o LLM quando nenhum chunk relevante foi recuperado
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        reranker: Optional[Reranker] = None,
+    ) -> None:
         self._llm = ChatOllama(
             model=settings.OLLAMA_LLM_MODEL,
             base_url=settings.OLLAMA_BASE_URL,
             temperature=0.2,
+            **ollama_provider.langchain_kwargs(),
+        )
+        if answer_cache is None and settings.ENABLE_ANSWER_CACHE:
+            answer_cache = SemanticAnswerCache(
+                threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                max_entries=settings.ANSWER_CACHE_SIZE,
+                ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            )
+        self._answer_cache = answer_cache
+        if reranker is None and settings.ENABLE_RERANKING:
+            reranker = Reranker(
+                lexical_weight=settings.RERANK_LEXICAL_WEIGHT,
+                mmr_lambda=settings.RERANK_MMR_LAMBDA,
+            )
+        self._reranker = reranker
+
+    @property
+    def answer_cache(self) -> Optional[SemanticAnswerCache]:
+        return self._answer_cache
+
+    @staticmethod
+    def _answer_cache_version() -> str:
+        """Respostas só valem para o mesmo índice, os mesmos prompts e o mesmo LLM."""
+        return f"{read_index_version()}:{langfuse_provider.prompt_version}:{settings.OLLAMA_LLM_MODEL}"
+
+    async def _lookup_answer(self, question: str, top_k: int) -> _AnswerCacheLookup:
+        """
+        Consulta o cache semântico. O embedding da pergunta fica no cache de
+        embeddings, então o retrieval de um miss não paga por ele de novo.
+        Falhas aqui nunca derrubam a requisição: seguem como miss.
+        """
+        if self._answer_cache is None:
+            return _AnswerCacheLookup(hit=None, vector=None, version="")
+
+        version = self._answer_cache_version()
+        try:
+            vector = await get_embeddings_client().aembed_query(question)
+        except Exception:
+            logger.warning("Falha ao gerar embedding para o cache de respostas; seguindo sem cache")
+            return _AnswerCacheLookup(hit=None, vector=None, version=version)
+
+        hit = self._answer_cache.lookup(vector, version, scope=top_k)
+        return _AnswerCacheLookup(hit=hit, vector=vector, version=version)
+
+    def _store_answer(
+        self, lookup: _AnswerCacheLookup, top_k: int, answer: str, citations: List[Citation]
+    ) -> None:
+        if self._answer_cache is None or lookup.vector is None or not answer:
+            return
+        self._answer_cache.store(lookup.vector, lookup.version, (answer, list(citations)), scope=top_k)
+
+    @staticmethod
+    def _cached_metrics(
+        top_k: int, guarded: GuardedRetrieval, hit: SemanticHit, total_latency_ms: float
+    ) -> Metrics:
+        return Metrics(
+            total_latency_ms=round(total_latency_ms, 2),
+            retrieval_latency_ms=0.0,
+            generation_latency_ms=0.0,
+            guardrail_latency_ms=guarded.guardrail_latency_ms,
+            prompt_tokens=0,
+            completion_tokens=0,
+            estimated_cost_usd=0.0,
+            top_k_used=top_k,
+            context_size_chars=0,
+            cache_hit=True,
+            cache_similarity=hit.similarity,
         )
 
-    def _run_guardrails(self, question: str) -> GuardrailStatus:
+    def _insufficient_context_metrics(
+        self, top_k: int, guarded: GuardedRetrieval, total_latency_ms: float
+    ) -> Metrics:
+        return Metrics(
+            total_latency_ms=round(total_latency_ms, 2),
+            retrieval_latency_ms=guarded.retrieval_latency_ms,
+            generation_latency_ms=0.0,
+            guardrail_latency_ms=guarded.guardrail_latency_ms,
+            parallel_savings_ms=guarded.parallel_savings_ms,
+            prompt_tokens=0,
+            completion_tokens=0,
+            estimated_cost_usd=0.0,
+            top_k_used=top_k,
+            context_size_chars=0,
+            insufficient_context=True,
+            **self._retrieval_stage_metrics(guarded),
+        )
+
+    def _fetch_k(self, top_k: int) -> int:
+        """Com reranking, o retrieval traz mais candidatos do que vão para o LLM."""
+        return max(top_k, settings.RERANK_CANDIDATES) if self._reranker is not None else top_k
+
+    async def _search(
+        self, question: str, top_k: int, search_params: Optional[Dict[str, Any]] = None
+    ) -> RetrievalResult:
+        params = search_params or {}
+        if self._reranker is None:
+            return await retrieval_client.asearch(question, top_k=top_k, **params)
+        return await retrieval_client.asearch(question, top_k=self._fetch_k(top_k), with_vectors=True, **params)
+
+    async def _lookup_and_search(
+        self, question: str, top_k: int, search_params: Optional[Dict[str, Any]] = None
+    ) -> tuple[_AnswerCacheLookup, Optional[RetrievalResult]]:
+        """Cache semântico e, se for miss, retrieval (reaproveitando o embedding já calculado)."""
+        lookup = await self._lookup_answer(question, top_k)
+        if lookup.hit is not None:
+            return lookup, None
+        return lookup, await self._search(question, top_k, search_params)
+
+    async def _rerank(self, question: str, docs: List[Document], top_k: int) -> tuple[List[Document], float, bool]:
+        """
+        Reordena os candidatos e mantém os `top_k` melhores, dentro de
+        `RERANK_TIME_BUDGET_MS` (inclui obter o embedding da pergunta, que
+        normalmente vem do cache de embeddings). Estourou o orçamento:
+        mantém a ordem do retrieval. Retorna (docs, latência em ms, fallback).
         """
-        Executa os guardrails de segurança.
+        inicio = time.monotonic()
+        budget_s = settings.RERANK_TIME_BUDGET_MS / 1000
+        try:
+            query_vector: Optional[List[float]] = await asyncio.wait_for(
+                get_embeddings_client().aembed_query(question), timeout=budget_s
+            )
+        except Exception:
+            logger.warning("Embedding da pergunta indisponível para o reranking; usando só sinais lexicais")
+            query_vector = None
+        outcome = self._reranker.rerank(question, query_vector, docs, top_k, deadline=inicio + budget_s)
+        return outcome.docs, round((time.monotonic() - inicio) * 1000, 2), outcome.fallback
+
+    async def _guard_and_retrieve(
+        self,
+        question: str,
+        top_k: int,
+        search_params: Optional[Dict[str, Any]] = None,
+    ) -> tuple[GuardedRetrieval, _AnswerCacheLookup]:
+        """
+        Executa os guardrails de segurança, o cache semântico e o retrieval.
+
+        Os regex (baratos) rodam uma única vez, antes, e fazem short-circuit
+        (pergunta barrada não paga nem o embedding). Em seguida o guardrail
+        LLM roda em paralelo com a consulta ao cache semântico seguida, se
+        for miss, do retrieval (embedding + Qdrant); se o veredito for UNSAFE
+        o resultado é descartado. Com hit no cache não há retrieval.
+        `search_params`: `hnsw_ef` / `exact` da requisição, repassados à busca.
         """
-        is_blocked, reason = guardrail_service.validate_question(question)
+        inicio = time.monotonic()
+        is_blocked, reason = guardrail_service.validate_patterns(question)
+        if is_blocked:
+            logger.debug(f"Guardrails (regex): {is_blocked}, {reason}")
+            guarded = GuardedRetrieval(
+                guardrail_status=GuardrailStatus(blocked=True, reason=reason),
+                docs=[],
+                guardrail_latency_ms=round((time.monotonic() - inicio) * 1000, 2),
+                retrieval_latency_ms=0.0,
+                parallel_savings_ms=0.0,
+            )
+            return guarded, _AnswerCacheLookup(hit=None, vector=None, version="")
+
+        inicio_paralelo = time.monotonic()
+        guardrail_task = asyncio.create_task(_timed(guardrail_service.avalidate_intent(question)))
+        retrieval_task = asyncio.create_task(_timed(self._lookup_and_search(question, top_k, search_params)))
+
+        try:
+            (is_blocked, reason), llm_guardrail_ms = await guardrail_task
+        except BaseException:
+            retrieval_task.cancel()
+            raise
+        guardrail_latency_ms = (inicio_paralelo - inicio) * 1000 + llm_guardrail_ms
         logger.debug(f"Guardrails: {is_blocked}, {reason}")
         if is_blocked:
-            return GuardrailStatus(blocked=True, reason=reason)
-            
-        return GuardrailStatus(blocked=False, reason=None)
+            retrieval_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await retrieval_task
+            guarded = GuardedRetrieval(
+                guardrail_status=GuardrailStatus(blocked=True, reason=reason),
+                docs=[],
+                guardrail_latency_ms=round(guardrail_latency_ms, 2),
+                retrieval_latency_ms=0.0,
+                parallel_savings_ms=0.0,
+            )
+            return guarded, _AnswerCacheLookup(hit=None, vector=None, version="")
 
-    @observe(name="handle_query")
-    def handle_query(self, request: QueryRequest) -> QueryResponse:
-        inicio_total = time.monotonic()
-        logger.debug(f"Request: {request.question}")
-        guardrail_status = self._run_guardrails(request.question)
-        logger.debug(f"Guardrail Status: {guardrail_status}")
-        if guardrail_status.blocked:
-            metrics = Metrics(
-                total_latency_ms=0.0,
+        (lookup, retrieval), retrieval_latency_ms = await retrieval_task
+        if retrieval is None:
+            # Resposta vinda do cache: nada foi recuperado
+            guarded = GuardedRetrieval(
+                guardrail_status=GuardrailStatus(blocked=False, reason=None),
+                docs=[],
+                guardrail_latency_ms=round(guardrail_latency_ms, 2),
                 retrieval_latency_ms=0.0,
-                generation_latency_ms=0.0,
-                prompt_tokens=0,
-                completion_tokens=0,
-                estimated_cost_usd=0.0,
-                top_k_used=request.top_k or settings.DEFAULT_TOP_K,
-                context_size_chars=0,
+                parallel_savings_ms=0.0,
             )
-            return QueryResponse(
-                answer=None,
-                citations=[],
-                metrics=metrics,
-                guardrail_status=guardrail_status,
+            return guarded, lookup
+
+        retrieval.docs = apply_score_threshold(retrieval.docs, settings.MIN_RELEVANCE_SCORE)
+        if self._reranker is not None:
+            retrieval.docs, retrieval.rerank_latency_ms, retrieval.rerank_fallback = await self._rerank(
+                question, retrieval.docs, top_k
             )
-        top_k = request.top_k or settings.DEFAULT_TOP_K
-        inicio_retrieval = time.monotonic()
-        docs = retrieval_client.retrieve(request.question, top_k=top_k)
-        fim_retrieval = time.monotonic()
-        retrieval_latency_ms = (fim_retrieval - inicio_retrieval) * 1000
-        
+        paralelo_ms = (time.monotonic() - inicio_paralelo) * 1000
+        parallel_savings_ms = max(0.0, llm_guardrail_ms + retrieval_latency_ms - paralelo_ms)
+
+        guarded = GuardedRetrieval(
+            guardrail_status=GuardrailStatus(blocked=False, reason=None),
+            docs=retrieval.docs,
+            guardrail_latency_ms=round(guardrail_latency_ms, 2),
+            retrieval_latency_ms=round(retrieval_latency_ms, 2),
+            parallel_savings_ms=round(parallel_savings_ms, 2),
+            retrieval=retrieval,
+        )
+        return guarded, lookup
+
+    def _blocked_metrics(self, top_k: int, guarded: GuardedRetrieval) -> Metrics:
+        return Metrics(
+            total_latency_ms=0.0,
+            retrieval_latency_ms=0.0,
+            generation_latency_ms=0.0,
+            guardrail_latency_ms=guarded.guardrail_latency_ms,
+            prompt_tokens=0,
+            completion_tokens=0,
+            estimated_cost_usd=0.0,
+            top_k_used=top_k,
+            context_size_chars=0,
+        )
+
+    def _build_prompt(self, question: str, docs: List[Document]) -> _Prompt:
+        """
+        Monta o prompt final (system + RAG) com os trechos empacotados em
+        CONTEXT_MAX_TOKENS (usados também nas citações). Os tokens do contexto
+        vêm do empacotamento; só o restante do prompt é contado aqui.
+        """
         sys_prompt_txt, rag_prompt_txt = langfuse_provider.get_prompts()
         logger.debug(f"System Prompt: {sys_prompt_txt[:50]}...")
         logger.debug(f"RAG Prompt Template: {rag_prompt_txt[:50]}...")
         
-        contexto = build_context(docs)
+        packed = pack_context(docs, settings.CONTEXT_MAX_TOKENS)
+        contexto = build_context(packed.docs)
         
-        if "{contexto}" in rag_prompt_txt and "{question}" in rag_prompt_txt:
-            prompt_rag = rag_prompt_txt.replace("{contexto}", contexto).replace("{question}", request.question)
-        else:
-            prompt_rag = f"Contexto:\n{contexto}\n\nPergunta: {request.question}"
+        def render(ctx: str) -> str:
+            if "{contexto}" in rag_prompt_txt and "{question}" in rag_prompt_txt:
+                prompt_rag = rag_prompt_txt.replace("{contexto}", ctx).replace("{question}", question)
+            else:
+                prompt_rag = f"Contexto:\n{ctx}\n\nPergunta: {question}"
+            return f"{sys_prompt_txt.strip()}\n\n{prompt_rag}"
 
-        sys_txt = sys_prompt_txt.strip()
-        full_prompt = f"{sys_txt}\n\n{prompt_rag}"
+        return _Prompt(
+            text=render(contexto),
+            context=contexto,
+            packed=packed,
+            tokens=count_tokens(render("")) + packed.tokens,
+        )
 
-        inicio_geracao = time.monotonic()
-        
-        callbacks = []
-        handler = langfuse_provider.get_callback_handler()
-        if handler:
-            callbacks.append(handler)
+    def _submit_trace(
+        self,
+        name: str,
+        request: QueryRequest,
+        started_at: datetime,
+        metrics: Metrics,
+        guardrail_status: GuardrailStatus,
+        answer: Optional[str] = None,
+        full_prompt: Optional[str] = None,
+        generation_started_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        Monta o trace a partir das latências já medidas e o entrega ao
+        pipeline de tracing (fila + exportação em lote fora da requisição).
+        O custo desta etapa é reportado em `metrics.tracing_latency_ms`.
+        """
+        inicio = time.monotonic()
+
+        def span_end(start: datetime, latency_ms: float) -> datetime:
+            return start + timedelta(milliseconds=latency_ms)
+
+        spans = [
+            SpanRecord(
+                name="guardrails",
+                start_time=started_at,
+                end_time=span_end(started_at, metrics.guardrail_latency_ms),
+                output=guardrail_status.model_dump(),
+            )
+        ]
+        if not guardrail_status.blocked:
+            spans.append(
+                SpanRecord(
+                    name="retrieval",
+                    start_time=started_at,
+                    end_time=span_end(started_at, metrics.retrieval_latency_ms),
+                    metadata={"top_k": metrics.top_k_used},
+                )
+            )
+        if generation_started_at is not None:
+            spans.append(
+                SpanRecord(
+                    name="generation",
+                    kind="generation",
+                    model=settings.OLLAMA_LLM_MODEL,
+                    start_time=generation_started_at,
+                    end_time=span_end(generation_started_at, metrics.generation_latency_ms),
+                    input=full_prompt,
+                    output=answer,
+                    usage={"input": metrics.prompt_tokens, "output": metrics.completion_tokens},
+                )
+            )
 
-        resposta = self._llm.invoke(full_prompt, config={"callbacks": callbacks})
+        langfuse_provider.tracing.submit(
+            TraceRecord(
+                name=name,
+                start_time=started_at,
+                input={"question": request.question, "top_k": request.top_k},
+                output=answer,
+                metadata={"metrics": metrics.model_dump(), "prompt_version": langfuse_provider.prompt_version},
+                spans=spans,
+            )
+        )
+        metrics.tracing_latency_ms = round((time.monotonic() - inicio) * 1000, 3)
+
+    @staticmethod
+    def _retrieval_stage_metrics(guarded: GuardedRetrieval) -> dict[str, Optional[float]]:
+        retrieval = guarded.retrieval
+        if retrieval is None:
+            return {}
+        return {
+            "dense_retrieval_latency_ms": retrieval.dense_latency_ms,
+            "sparse_retrieval_latency_ms": retrieval.sparse_latency_ms,
+            "fusion_latency_ms": retrieval.fusion_latency_ms,
+            "rerank_latency_ms": retrieval.rerank_latency_ms,
+            "rerank_fallback": retrieval.rerank_fallback,
+        }
+
+    @staticmethod
+    def _tokens_per_second(completion_tokens: int, generation_latency_ms: float) -> float:
+        if generation_latency_ms <= 0:
+            return 0.0
+        return round(completion_tokens / (generation_latency_ms / 1000), 2)
+
+    def _blocked_response(
+        self, name: str, request: QueryRequest, top_k: int, guarded: GuardedRetrieval,
+        started_at: datetime, traced: bool,
+    ) -> QueryResponse:
+        metrics = self._blocked_metrics(top_k, guarded)
+        if traced:
+            self._submit_trace(name, request, started_at, metrics, guarded.guardrail_status)
+        return QueryResponse(
+            answer=None,
+            citations=[],
+            metrics=metrics,
+            guardrail_status=guarded.guardrail_status,
+        )
+
+    async def _generate_response(
+        self,
+        name: str,
+        request: QueryRequest,
+        top_k: int,
+        guarded: GuardedRetrieval,
+        inicio_total: float,
+        started_at: datetime,
+        traced: bool,
+        lookup: Optional[_AnswerCacheLookup] = None,
+    ) -> QueryResponse:
+        """
+        Geração a partir dos documentos já recuperados: prompt, LLM, métricas,
+        citações e trace. Compartilhado pelo endpoint unitário e pelo batch.
+        """
+        docs = guarded.docs
+        guardrail_status = guarded.guardrail_status
+        if not docs:
+            # Nada relevante recuperado: responde sem gastar uma geração inteira
+            metrics = self._insufficient_context_metrics(top_k, guarded, (time.monotonic() - inicio_total) * 1000)
+            if traced:
+                self._submit_trace(
+                    name, request, started_at, metrics, guardrail_status, answer=INSUFFICIENT_CONTEXT_ANSWER
+                )
+            return QueryResponse(
+                answer=INSUFFICIENT_CONTEXT_ANSWER,
+                citations=[],
+                metrics=metrics,
+                guardrail_status=guardrail_status,
+            )
+
+        prompt = self._build_prompt(request.question, docs)
+
+        inicio_geracao = time.monotonic()
+        generation_started_at = datetime.now(timezone.utc)
+        resposta = await self._llm.ainvoke(prompt.text)
         fim_geracao = time.monotonic()
         generation_latency_ms = (fim_geracao - inicio_geracao) * 1000
 
         answer_text = resposta.content if hasattr(resposta, "content") else str(resposta)
 
-        prompt_tokens = estimate_tokens(full_prompt)
-        completion_tokens = estimate_tokens(answer_text)
+        completion_tokens = count_tokens(answer_text)
         estimated_cost_usd = 0.0
 
         total_latency_ms = (time.monotonic() - inicio_total) * 1000
 
         metrics = Metrics(
             total_latency_ms=round(total_latency_ms, 2),
-            retrieval_latency_ms=round(retrieval_latency_ms, 2),
+            retrieval_latency_ms=guarded.retrieval_latency_ms,
             generation_latency_ms=round(generation_latency_ms, 2),
-            prompt_tokens=prompt_tokens,
+            guardrail_latency_ms=guarded.guardrail_latency_ms,
+            parallel_savings_ms=guarded.parallel_savings_ms,
+            prompt_tokens=prompt.tokens,
             completion_tokens=completion_tokens,
             estimated_cost_usd=estimated_cost_usd,
             top_k_used=top_k,
-            context_size_chars=len(contexto),
+            context_size_chars=len(prompt.context),
+            context_tokens_saved=prompt.packed.tokens_saved,
+            context_chunks_dropped=prompt.packed.chunks_dropped,
+            tokens_per_second=self._tokens_per_second(completion_tokens, generation_latency_ms),
+            **self._retrieval_stage_metrics(guarded),
         )
 
-        citations = build_citations(docs)
+        citations = build_citations(prompt.packed.docs)
+        if lookup is not None:
+            self._store_answer(lookup, top_k, answer_text, citations)
+
+        if traced:
+            self._submit_trace(
+                name, request, started_at, metrics, guardrail_status,
+                answer=answer_text, full_prompt=prompt.text, generation_started_at=generation_started_at,
+            )
 
         return QueryResponse(
             answer=answer_text,
@@ -130,5 +523,211 @@ class QAService:
             guardrail_status=guardrail_status,
         )
 
+    async def handle_query(self, request: QueryRequest) -> QueryResponse:
+        """
+        Pipeline RAG assíncrono: guardrails, retrieval e geração não ocupam
+        threads do pool, então um único event loop sustenta muitas requisições.
+        """
+        inicio_total = time.monotonic()
+        started_at = datetime.now(timezone.utc)
+        traced = langfuse_provider.tracing.should_sample()
+        logger.debug(f"Request: {request.question}")
+        top_k = request.top_k or settings.DEFAULT_TOP_K
+        guarded, lookup = await self._guard_and_retrieve(request.question, top_k, _search_params(request))
+        guardrail_status = guarded.guardrail_status
+        logger.debug(f"Guardrail Status: {guardrail_status}")
+        if guardrail_status.blocked:
+            return self._blocked_response("handle_query", request, top_k, guarded, started_at, traced)
+        if lookup.hit is not None:
+            answer_text, citations = lookup.hit.payload
+            metrics = self._cached_metrics(top_k, guarded, lookup.hit, (time.monotonic() - inicio_total) * 1000)
+            if traced:
+                self._submit_trace("handle_query", request, started_at, metrics, guardrail_status, answer=answer_text)
+            return QueryResponse(
+                answer=answer_text,
+                citations=list(citations),
+                metrics=metrics,
+                guardrail_status=guardrail_status,
+            )
+
+        return await self._generate_response(
+            "handle_query", request, top_k, guarded, inicio_total, started_at, traced, lookup=lookup
+        )
+
+    async def handle_batch(self, requests: List[QueryRequest]) -> List[QueryResponse]:
+        """
+        Pipeline RAG em lote, em fases:
+
+        1. Guardrails de todas as perguntas (regex + LLM, concorrência limitada)
+        2. Um único embedding em lote + batch search no Vector DB para as aceitas
+        3. Geração com no máximo `BATCH_MAX_CONCURRENCY` chamadas simultâneas ao LLM
+
+        As respostas voltam na ordem de entrada, cada uma com suas métricas e
+        status de guardrail. `retrieval_latency_ms` é o tempo da busca em lote,
+        compartilhada por todas as perguntas aceitas.
+        """
+        inicio_total = time.monotonic()
+        started_at = datetime.now(timezone.utc)
+        semaphore = asyncio.Semaphore(max(1, settings.BATCH_MAX_CONCURRENCY))
+        top_ks = [request.top_k or settings.DEFAULT_TOP_K for request in requests]
+
+        async def guard(question: str) -> tuple[GuardrailStatus, float]:
+            inicio = time.monotonic()
+            is_blocked, reason = guardrail_service.validate_patterns(question)
+            if not is_blocked:
+                async with semaphore:
+                    is_blocked, reason = await guardrail_service.avalidate_intent(question)
+            return GuardrailStatus(blocked=is_blocked, reason=reason), (time.monotonic() - inicio) * 1000
+
+        guard_results = await asyncio.gather(*(guard(request.question) for request in requests))
+
+        accepted = [idx for idx, (status, _) in enumerate(guard_results) if not status.blocked]
+
+        async def retrieve(indices: List[int], params: Dict[str, Any]) -> List[List[Document]]:
+            questions = [requests[idx].question for idx in indices]
+            if self._reranker is None:
+                return await retrieval_client.abatch_retrieve(
+                    questions, top_k=[top_ks[idx] for idx in indices], **params
+                )
+            return await retrieval_client.abatch_retrieve(
+                questions, top_k=[self._fetch_k(top_ks[idx]) for idx in indices], with_vectors=True, **params
+            )
+
+        # Uma busca em lote por combinação de `hnsw_ef` / `exact` (normalmente só uma)
+        groups: Dict[tuple, List[int]] = {}
+        for idx in accepted:
+            groups.setdefault(tuple(sorted(_search_params(requests[idx]).items())), []).append(idx)
+        inicio_retrieval = time.monotonic()
+        results = await asyncio.gather(*(retrieve(indices, dict(key)) for key, indices in groups.items()))
+        retrieval_latency_ms = round((time.monotonic() - inicio_retrieval) * 1000, 2)
+        retrieval_by_index = {
+            idx: RetrievalResult(docs=apply_score_threshold(docs, settings.MIN_RELEVANCE_SCORE))
+            for indices, docs_per_question in zip(groups.values(), results)
+            for idx, docs in zip(indices, docs_per_question)
+        }
+        if self._reranker is not None:
+            reranked = await asyncio.gather(
+                *(self._rerank(requests[idx].question, retrieval_by_index[idx].docs, top_ks[idx]) for idx in accepted)
+            )
+            for idx, (docs, rerank_ms, fallback) in zip(accepted, reranked):
+                retrieval = retrieval_by_index[idx]
+                retrieval.docs, retrieval.rerank_latency_ms, retrieval.rerank_fallback = docs, rerank_ms, fallback
+
+        async def answer(idx: int) -> QueryResponse:
+            status, guardrail_ms = guard_results[idx]
+            traced = langfuse_provider.tracing.should_sample()
+            retrieval = retrieval_by_index.get(idx)
+            guarded = GuardedRetrieval(
+                guardrail_status=status,
+                docs=retrieval.docs if retrieval is not None else [],
+                guardrail_latency_ms=round(guardrail_ms, 2),
+                retrieval_latency_ms=retrieval_latency_ms if not status.blocked else 0.0,
+                parallel_savings_ms=0.0,
+                retrieval=retrieval,
+            )
+            if status.blocked:
+                return self._blocked_response("handle_batch", requests[idx], top_ks[idx], guarded, started_at, traced)
+            async with semaphore:
+                return await self._generate_response(
+                    "handle_batch", requests[idx], top_ks[idx], guarded, inicio_total, started_at, traced
+                )
+
+        return list(await asyncio.gather(*(answer(idx) for idx in range(len(requests)))))
+
+    async def stream_query(self, request: QueryRequest) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Variante em streaming do `handle_query`.
+
+        Produz eventos `(nome, payload)` na ordem:
+        - `guardrail`: GuardrailStatus (assim que os guardrails terminam)
+        - `citations`: lista de Citation (assim que o retrieval termina)
+        - `token`: trecho da resposta, à medida que o Ollama gera
+        - `metrics`: Metrics final, com time-to-first-token e tokens/s
+        """
+        inicio_total = time.monotonic()
+        started_at = datetime.now(timezone.utc)
+        traced = langfuse_provider.tracing.should_sample()
+        top_k = request.top_k or settings.DEFAULT_TOP_K
+
+        guarded, lookup = await self._guard_and_retrieve(request.question, top_k, _search_params(request))
+        yield "guardrail", guarded.guardrail_status
+        if guarded.guardrail_status.blocked:
+            metrics = self._blocked_metrics(top_k, guarded)
+            if traced:
+                self._submit_trace("stream_query", request, started_at, metrics, guarded.guardrail_status)
+            yield "metrics", metrics
+            return
+
+        if lookup.hit is not None:
+            answer_text, cached_citations = lookup.hit.payload
+            yield "citations", list(cached_citations)
+            yield "token", answer_text
+            metrics = self._cached_metrics(top_k, guarded, lookup.hit, (time.monotonic() - inicio_total) * 1000)
+            if traced:
+                self._submit_trace(
+                    "stream_query", request, started_at, metrics, guarded.guardrail_status, answer=answer_text
+                )
+            yield "metrics", metrics
+            return
+
+        if not guarded.docs:
+            yield "citations", []
+            yield "token", INSUFFICIENT_CONTEXT_ANSWER
+            metrics = self._insufficient_context_metrics(top_k, guarded, (time.monotonic() - inicio_total) * 1000)
+            if traced:
+                self._submit_trace(
+                    "stream_query", request, started_at, metrics, guarded.guardrail_status,
+                    answer=INSUFFICIENT_CONTEXT_ANSWER,
+                )
+            yield "metrics", metrics
+            return
+
+        prompt = self._build_prompt(request.question, guarded.docs)
+        citations = build_citations(prompt.packed.docs)
+        yield "citations", citations
+
+        partes: List[str] = []
+        time_to_first_token_ms: Optional[float] = None
+        inicio_geracao = time.monotonic()
+        generation_started_at = datetime.now(timezone.utc)
+        async for chunk in self._llm.astream(prompt.text):
+            content = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if not content:
+                continue
+            if time_to_first_token_ms is None:
+                time_to_first_token_ms = (time.monotonic() - inicio_geracao) * 1000
+            partes.append(content)
+            yield "token", content
+        generation_latency_ms = (time.monotonic() - inicio_geracao) * 1000
+
+        answer_text = "".join(partes)
+        self._store_answer(lookup, top_k, answer_text, citations)
+        completion_tokens = count_tokens(answer_text)
+        total_latency_ms = (time.monotonic() - inicio_total) * 1000
+
+        metrics = Metrics(
+            total_latency_ms=round(total_latency_ms, 2),
+            retrieval_latency_ms=guarded.retrieval_latency_ms,
+            generation_latency_ms=round(generation_latency_ms, 2),
+            guardrail_latency_ms=guarded.guardrail_latency_ms,
+            parallel_savings_ms=guarded.parallel_savings_ms,
+            prompt_tokens=prompt.tokens,
+            completion_tokens=completion_tokens,
+            estimated_cost_usd=0.0,
+            top_k_used=top_k,
+            context_size_chars=len(prompt.context),
+            context_tokens_saved=prompt.packed.tokens_saved,
+            context_chunks_dropped=prompt.packed.chunks_dropped,
+            time_to_first_token_ms=round(time_to_first_token_ms, 2) if time_to_first_token_ms is not None else None,
+            tokens_per_second=self._tokens_per_second(completion_tokens, generation_latency_ms),
+            **self._retrieval_stage_metrics(guarded),
+        )
+        if traced:
+            self._submit_trace(
+                "stream_query", request, started_at, metrics, guarded.guardrail_status,
+                answer=answer_text, full_prompt=prompt.text, generation_started_at=generation_started_at,
+            )
+        yield "metrics", metrics
+
 
-qa_service = QAService()
+qa_service = resources.register("qa", QAService)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Minúsculas, sem acentos, só palavras/números ("Análise" e "analise" casam)."""
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    return _TOKEN_RE.findall("".join(ch for ch in normalized if not unicodedata.combining(ch)))
+
+
+class BM25Index:
+    """
+    Índice invertido com ranking BM25 (Okapi), persistido em SQLite (stdlib).
+
+    Complementa a busca densa em termos exatos (siglas, códigos) que o
+    embedding não captura bem. Mantido incrementalmente pelos mesmos IDs de
+    ponto do Vector DB (`upsert`/`delete`): cada escrita toca só as linhas
+    dos chunks alterados, e `flush` apenas confirma a transação. Textos e
+    postings ficam no disco; a busca lê só as postings dos termos da
+    pergunta. Outros processos (API) enxergam o que a ingestão confirmou.
+    Sem `path`, o índice fica em memória.
+    """
+
+    def __init__(self, path: str | Path | None = None, k1: float = 1.5, b: float = 0.75) -> None:
+        self.path = Path(path) if path else None
+        self._k1 = k1
+        self._b = b
+        self._lock = threading.RLock()
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs
+                (point_id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL, length INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS postings
+                (term TEXT NOT NULL, point_id TEXT NOT NULL, tf INTEGER NOT NULL, PRIMARY KEY (term, point_id))
+                WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_point_id ON postings (point_id);
+            CREATE TABLE IF NOT EXISTS stats
+                (id INTEGER PRIMARY KEY CHECK (id = 0), n_docs INTEGER NOT NULL, total_length INTEGER NOT NULL);
+            INSERT OR IGNORE INTO stats (id, n_docs, total_length) VALUES (0, 0, 0);
+            """
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._stats()[0]
+
+    def _stats(self) -> Tuple[int, int]:
+        return self._conn.execute("SELECT n_docs, total_length FROM stats WHERE id = 0").fetchone()
+
+    # ---- persistência ----------------------------------------------------
+
+    def flush(self) -> None:
+        """Confirma as escritas pendentes (transação única do SQLite)."""
+        with self._lock:
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    # ---- escrita ----------------------------------------------------------
+
+    def _add(self, point_id: str, content: str, metadata: Dict[str, Any]) -> None:
+        terms = Counter(tokenize(content))
+        length = sum(terms.values())
+        self._conn.execute(
+            "INSERT INTO docs (point_id, content, metadata, length) VALUES (?, ?, ?, ?)",
+            (point_id, content, json.dumps(metadata, ensure_ascii=False), length),
+        )
+        self._conn.executemany(
+            "INSERT INTO postings (term, point_id, tf) VALUES (?, ?, ?)",
+            [(term, point_id, tf) for term, tf in terms.items()],
+        )
+        self._conn.execute(
+            "UPDATE stats SET n_docs = n_docs + 1, total_length = total_length + ? WHERE id = 0", (length,)
+        )
+
+    def _remove(self, point_id: str) -> None:
+        row = self._conn.execute("SELECT length FROM docs WHERE point_id = ?", (point_id,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute("DELETE FROM postings WHERE point_id = ?", (point_id,))
+        self._conn.execute("DELETE FROM docs WHERE point_id = ?", (point_id,))
+        self._conn.execute(
+            "UPDATE stats SET n_docs = n_docs - 1, total_length = total_length - ? WHERE id = 0", (row[0],)
+        )
+
+    def upsert(self, documents: List[Document], ids: List[str]) -> None:
+        with self._lock:
+            for doc, point_id in zip(documents, ids):
+                self._remove(point_id)
+                self._add(point_id, doc.page_content, dict(doc.metadata))
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            for point_id in ids:
+                self._remove(point_id)
+
+    # ---- busca --------------------------------------------------------------
+
+    def search(self, query: str, k: int) -> List[Document]:
+        """Top-k por BM25; score em `metadata["_bm25_score"]`, ID em `metadata["_id"]`."""
+        with self._lock:
+            n_docs, total_length = self._stats()
+            if n_docs == 0 or k <= 0:
+                return []
+            avgdl = total_length / n_docs or 1.0
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                posting = self._conn.execute(
+                    "SELECT p.point_id, p.tf, d.length FROM postings p JOIN docs d ON d.point_id = p.point_id"
+                    " WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for point_id, tf, length in posting:
+                    norm = self._k1 * (1 - self._b + self._b * length / avgdl)
+                    scores[point_id] = scores.get(point_id, 0.0) + idf * tf * (self._k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            results = []
+            for point_id, score in top:
+                content, metadata = self._conn.execute(
+                    "SELECT content, metadata FROM docs WHERE point_id = ?", (point_id,)
+                ).fetchone()
+                results.append(
+                    Document(
+                        page_content=content,
+                        metadata={**json.loads(metadata), "_id": point_id, "_bm25_score": score},
+                    )
+                )
+            return results
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class SQLiteStore:
+    """
+    Armazenamento chave/valor persistente em SQLite (stdlib).
+    Usado como segunda camada dos caches em memória para sobreviver a restarts.
+    """
+
+    def __init__(self, path: str | Path, table: str = "cache") -> None:
+        if not table.isidentifier():
+            raise ValueError(f"Nome de tabela inválido: {table}")
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self._table}")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LRUTTLCache(Generic[V]):
+    """
+    Cache LRU em memória com TTL, limitado por número de entradas e,
+    opcionalmente, por bytes (`max_bytes` + `sizeof`).
+
+    - Thread-safe (lock simples; as operações são O(1)).
+    - Contadores de hit/miss para observabilidade.
+    - Camada opcional em disco (`SQLiteStore`): consultada em miss de memória,
+      e o valor encontrado é promovido de volta para a memória.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: Optional[float] = None,
+        store: Optional[SQLiteStore] = None,
+        encode: Callable[[V], bytes] = lambda value: json.dumps(value).encode("utf-8"),
+        decode: Callable[[bytes], V] = lambda raw: json.loads(raw),
+        clock: Callable[[], float] = time.monotonic,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[V], int]] = None,
+    ) -> None:
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes exige uma função sizeof")
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._ttl = ttl_seconds
+        self._store = store
+        self._encode = encode
+        self._decode = decode
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[V, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._maxsize > 0 and (self._max_bytes is None or self._max_bytes > 0)
+
+    @property
+    def persistent(self) -> bool:
+        """Indica se há camada em disco (operações podem bloquear em I/O)."""
+        return self.enabled and self._store is not None
+
+    def _expiry(self) -> Optional[float]:
+        return self._clock() + self._ttl if self._ttl else None
+
+    def get(self, key: Hashable) -> Optional[V]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+
+        if self._store is not None:
+            raw = self._store.get(str(key))
+            if raw is not None:
+                value = self._decode(raw)
+                self._put(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: V) -> None:
+        if not self.enabled:
+            return
+        self._put(key, value)
+        if self._store is not None:
+            self._store.set(str(key), self._encode(value), self._ttl)
+
+    def _put(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, self._expiry())
+            if self._sizeof is not None:
+                self._bytes += self._sizeof(value)
+            while len(self._data) > self._maxsize or (
+                self._max_bytes is not None and self._bytes > self._max_bytes and self._data
+            ):
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key: Hashable) -> None:
+        value, _ = self._data.pop(key)
+        if self._sizeof is not None:
+            self._bytes -= self._sizeof(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+        if self._store is not None:
+            self._store.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self._maxsize,
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
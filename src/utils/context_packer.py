@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from src.utils.rag_helpers import format_context_header
+from src.utils.token_counter import TOKEN_COUNT_METADATA_KEY, token_counter
+
+# Sobreposição mínima (caracteres) para juntar chunks sem `start_index`
+_MIN_TEXT_OVERLAP = 20
+# Distância máxima entre chunks "adjacentes" (o splitter remove o espaço entre eles)
+_MAX_GAP = 3
+
+
+@dataclass
+class PackedContext:
+    """Trechos que vão para o prompt e o quanto o empacotamento economizou."""
+    docs: List[Document]
+    tokens: int = 0
+    tokens_saved: int = 0
+    chunks_dropped: int = 0
+
+
+@dataclass
+class _Passage:
+    text: str
+    start: Optional[int]
+    rank: int
+    metadata: Dict[str, Any]
+    members: int = 1
+    # Tokens do texto, vindos do payload (None: contar na hora)
+    tokens: Optional[int] = None
+
+    @property
+    def end(self) -> Optional[int]:
+        return self.start + len(self.text) if self.start is not None else None
+
+
+def _merge_by_offsets(a: _Passage, b: _Passage) -> Optional[str]:
+    first, second = (a, b) if a.start <= b.start else (b, a)
+    gap = second.start - first.end
+    if gap > _MAX_GAP:
+        return None
+    if gap > 0:
+        return f"{first.text} {second.text}"
+    if second.end <= first.end:
+        return first.text
+    return first.text + second.text[first.end - second.start :]
+
+
+def _merge_by_text(a: str, b: str) -> Optional[str]:
+    if b in a:
+        return a
+    if a in b:
+        return b
+    for first, second in ((a, b), (b, a)):
+        for size in range(min(len(first), len(second)) - 1, _MIN_TEXT_OVERLAP - 1, -1):
+            if first.endswith(second[:size]):
+                return first + second[size:]
+    return None
+
+
+def _merge(a: _Passage, b: _Passage) -> Optional[_Passage]:
+    if a.start is not None and b.start is not None:
+        text = _merge_by_offsets(a, b)
+        start = min(a.start, b.start)
+    else:
+        text = _merge_by_text(a.text, b.text)
+        start = None
+    if text is None:
+        return None
+    best = a if a.rank <= b.rank else b
+    return _Passage(text=text, start=start, rank=best.rank, metadata=best.metadata, members=a.members + b.members)
+
+
+def _passages(docs: Sequence[Document]) -> List[_Passage]:
+    """Junta chunks sobrepostos/adjacentes da mesma fonte e página."""
+    groups: Dict[tuple, List[_Passage]] = {}
+    for rank, doc in enumerate(docs):
+        key = (doc.metadata.get("source"), doc.metadata.get("page"))
+        current = _Passage(
+            text=doc.page_content,
+            start=doc.metadata.get("start_index"),
+            rank=rank,
+            metadata=dict(doc.metadata),
+            tokens=doc.metadata.get(TOKEN_COUNT_METADATA_KEY),
+        )
+        group = groups.setdefault(key, [])
+        merged = True
+        while merged:
+            merged = False
+            for idx, passage in enumerate(group):
+                combined = _merge(passage, current)
+                if combined is not None:
+                    # O trecho combinado pode agora encostar em outro do mesmo grupo
+                    current = combined
+                    group.pop(idx)
+                    merged = True
+                    break
+        group.append(current)
+    return sorted((p for group in groups.values() for p in group), key=lambda p: p.rank)
+
+
+def _chunk_tokens(doc: Document) -> int:
+    tokens = doc.metadata.get(TOKEN_COUNT_METADATA_KEY)
+    return tokens if tokens is not None else token_counter.count(doc.page_content)
+
+
+def _text_tokens(passage: _Passage) -> int:
+    return passage.tokens if passage.tokens is not None else token_counter.count(passage.text)
+
+
+def _block_tokens(idx: int, doc: Document, text_tokens: int) -> int:
+    # Cabeçalho + texto + quebra de linha final (ver `format_context_block`)
+    return token_counter.count(format_context_header(idx, doc)) + text_tokens + 1
+
+
+def pack_context(docs: Sequence[Document], max_tokens: int = 0) -> PackedContext:
+    """
+    Monta os trechos do contexto a partir dos chunks (em ordem de relevância):
+
+    - chunks sobrepostos ou adjacentes da mesma fonte/página viram um trecho
+      só, sem repetir o overlap do chunking (por `start_index`; chunks
+      antigos, sem offset, pela sobreposição do texto);
+    - os trechos entram em ordem de relevância até `max_tokens` (0 = sem
+      limite); o primeiro é truncado se sozinho já passar do limite.
+
+    Os tokens de cada chunk vêm do `token_count` gravado na ingestão; só
+    trechos juntados (ou chunks de índices antigos) são contados na hora.
+    `tokens_saved` compara com o contexto ingênuo (todos os chunks inteiros).
+    """
+    if not docs:
+        return PackedContext(docs=[])
+
+    naive_tokens = sum(_block_tokens(idx, doc, _chunk_tokens(doc)) for idx, doc in enumerate(docs, start=1))
+
+    packed: List[Document] = []
+    tokens = 0
+    dropped = 0
+    for passage in _passages(docs):
+        text_tokens = _text_tokens(passage)
+        metadata = {**passage.metadata, "merged_chunks": passage.members, TOKEN_COUNT_METADATA_KEY: text_tokens}
+        if passage.start is not None:
+            metadata["start_index"] = passage.start
+        doc = Document(page_content=passage.text, metadata=metadata)
+        block_tokens = _block_tokens(len(packed) + 1, doc, text_tokens)
+        if max_tokens and tokens + block_tokens > max_tokens:
+            text_budget = max_tokens - (block_tokens - text_tokens)
+            if packed or text_budget <= 0:
+                # Sem espaço nem para o cabeçalho: nada de bloco com corpo vazio
+                dropped += passage.members
+                continue
+            # Nem o trecho mais relevante cabe: trunca em vez de mandar contexto vazio
+            text = token_counter.truncate(passage.text, text_budget)
+            text_tokens = token_counter.count(text)
+            doc = Document(page_content=text, metadata={**metadata, TOKEN_COUNT_METADATA_KEY: text_tokens})
+            block_tokens = _block_tokens(1, doc, text_tokens)
+        packed.append(doc)
+        tokens += block_tokens
+
+    return PackedContext(
+        docs=packed,
+        tokens=tokens,
+        tokens_saved=max(0, naive_tokens - tokens),
+        chunks_dropped=dropped,
+    )
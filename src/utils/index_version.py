@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from src.core.config import settings
+
+_UNVERSIONED = "unversioned"
+
+# (caminho, mtime_ns) -> versão: evita reler o arquivo a cada requisição
+_cached: dict[tuple[str, int], str] = {}
+
+
+def _resolve(path: Optional[str | Path]) -> Path:
+    return Path(path or settings.INDEX_VERSION_PATH)
+
+
+def read_index_version(path: Optional[str | Path] = None) -> str:
+    """
+    Versão atual do índice vetorial (gravada pela ingestão).
+    Lida de um arquivo compartilhado entre `scripts/ingest.py` e a API, então
+    uma re-ingestão em outro processo é vista na próxima requisição.
+    """
+    target = _resolve(path)
+    try:
+        mtime_ns = target.stat().st_mtime_ns
+    except FileNotFoundError:
+        return _UNVERSIONED
+
+    key = (str(target), mtime_ns)
+    version = _cached.get(key)
+    if version is None:
+        version = target.read_text(encoding="utf-8").strip() or _UNVERSIONED
+        _cached.clear()
+        _cached[key] = version
+    return version
+
+
+def bump_index_version(path: Optional[str | Path] = None) -> str:
+    """Gera uma nova versão do índice. Chamado sempre que a coleção muda."""
+    target = _resolve(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    version = uuid.uuid4().hex[:12]
+    tmp = target.with_name(f"{target.name}.tmp")
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, target)  # troca atômica: leitores nunca veem arquivo parcial
+    return version
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class PatternHit:
+    category: str
+    pattern: str
+    start: int
+
+
+class PatternMatcher:
+    """
+    Matcher de múltiplos conjuntos de padrões compilado uma única vez.
+
+    Os literais são organizados numa trie e convertidos em uma única regex
+    (prefixos compartilhados viram um só ramo), com um grupo nomeado vazio
+    marcando o fim de cada padrão. As regexes entram na mesma alternância,
+    cada uma envolta no próprio grupo nomeado. Tudo fica dentro de um
+    lookahead, então o texto é percorrido uma vez só (em C) e `lastgroup`
+    diz qual padrão casou em cada posição; os demais que podem casar no mesmo
+    ponto (literais mais curtos e regexes seguintes) são checados em seguida.
+    Assim o custo por pergunta quase não cresce com o número de padrões, ao
+    contrário de um `re.search` por padrão.
+
+    - `literals`: categoria -> frases literais, casadas com word boundaries (\\b).
+      Um literal presente em várias categorias é reportado em todas.
+    - `regexes`: categoria -> expressões regulares usadas como estão (sem
+      grupos nomeados nem referências numéricas, que mudariam de índice).
+    """
+
+    def __init__(
+        self,
+        literals: Mapping[str, Iterable[str]],
+        regexes: Optional[Mapping[str, Iterable[str]]] = None,
+        flags: int = re.IGNORECASE,
+    ) -> None:
+        self._groups: Dict[str, str] = {}
+        # Literal -> categorias em que aparece (na ordem de `literals`)
+        self._categories: Dict[str, List[str]] = {}
+        self._word_regex: Dict[str, re.Pattern[str]] = {}
+
+        trie: dict = {}
+        for category, patterns in literals.items():
+            for pattern in patterns:
+                categories = self._categories.setdefault(pattern, [])
+                if category not in categories:
+                    categories.append(category)
+                if pattern in self._word_regex:
+                    continue
+                self._word_regex[pattern] = re.compile(rf"\b{re.escape(pattern)}\b", flags)
+                node = trie
+                for char in pattern:
+                    node = node.setdefault(char, {})
+                node[None] = self._add_group(pattern)
+
+        # Literais que são prefixo de outro literal: podem casar na mesma posição
+        # que o mais longo, então são checados explicitamente após cada hit.
+        self._prefixes: Dict[str, List[str]] = {
+            pattern: [other for other in self._word_regex if other != pattern and pattern.startswith(other)]
+            for pattern in self._word_regex
+        }
+
+        alternatives = [rf"\b{self._trie_to_regex(trie)}"] if trie else []
+        # Regexes na ordem de declaração; o índice diz quais ainda podem casar numa posição
+        self._regexes: List[tuple[str, str, re.Pattern[str]]] = []
+        self._regex_index: Dict[str, int] = {}
+        for category, patterns in (regexes or {}).items():
+            for pattern in patterns:
+                name = f"r{len(self._regexes)}"
+                self._regex_index[name] = len(self._regexes)
+                self._regexes.append((category, pattern, re.compile(pattern, flags)))
+                alternatives.append(f"(?P<{name}>{pattern})")
+
+        self._regex = re.compile(f"(?=(?:{'|'.join(alternatives)}))", flags) if alternatives else None
+
+    def _add_group(self, pattern: str) -> str:
+        name = f"p{len(self._groups)}"
+        self._groups[name] = pattern
+        return name
+
+    @classmethod
+    def _trie_to_regex(cls, node: dict) -> str:
+        # Ramos mais longos antes do fim de padrão: numa mesma posição vence o mais específico
+        branches = [
+            re.escape(char) + cls._trie_to_regex(child)
+            for char, child in sorted((k, v) for k, v in node.items() if k is not None)
+        ]
+        if None in node:
+            branches.append(rf"\b(?P<{node[None]}>)")
+        if len(branches) == 1:
+            return branches[0]
+        return f"(?:{'|'.join(branches)})"
+
+    def find_all(self, text: str) -> List[PatternHit]:
+        """Retorna todos os padrões encontrados no texto, na ordem em que aparecem."""
+        hits: List[PatternHit] = []
+        if self._regex is None:
+            return hits
+        for match in self._regex.finditer(text):
+            start = match.start()
+            name = match.lastgroup
+            if name in self._regex_index:
+                # Trie e regexes anteriores falharam nesta posição
+                remaining = self._regexes[self._regex_index[name]:]
+            else:
+                pattern = self._groups[name]
+                matched = [pattern] + [
+                    other for other in self._prefixes[pattern] if self._word_regex[other].match(text, start)
+                ]
+                hits.extend(
+                    PatternHit(category, literal, start) for literal in matched for category in self._categories[literal]
+                )
+                remaining = self._regexes
+            hits.extend(
+                PatternHit(category, pattern, start) for category, pattern, regex in remaining if regex.match(text, start)
+            )
+        return hits
+
+    def match_categories(self, text: str) -> Dict[str, List[str]]:
+        """Agrupa os hits por categoria: {categoria: [padrões]}."""
+        result: Dict[str, List[str]] = {}
+        for hit in self.find_all(text):
+            patterns = result.setdefault(hit.category, [])
+            if hit.pattern not in patterns:
+                patterns.append(hit.pattern)
+        return result
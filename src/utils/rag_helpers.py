@@ -5,6 +5,7 @@ from typing import List
 from langchain_core.documents import Document
 
 from src.api.schemas import Citation
+from src.providers.vector_store_provider import SCORE_METADATA_KEY
 
 
 def estimate_tokens(text: str) -> int:
@@ -19,16 +20,19 @@ def estimate_tokens(text: str) -> int:
     return max(1, len(text) // 4)
 
 
+def format_context_header(idx: int, doc: Document) -> str:
+    source = doc.metadata.get("source", "desconhecido")
+    page = doc.metadata.get("page")
+    page_info = f" (página {page})" if page is not None else ""
+    return f"[Documento {idx} - Fonte: {source}{page_info}]\n"
+
+
+def format_context_block(idx: int, doc: Document) -> str:
+    return f"{format_context_header(idx, doc)}{doc.page_content}\n"
+
+
 def build_context(docs: List[Document]) -> str:
-    partes: List[str] = []
-    for idx, doc in enumerate(docs, start=1):
-        source = doc.metadata.get("source", "desconhecido")
-        page = doc.metadata.get("page")
-        page_info = f" (página {page})" if page is not None else ""
-        partes.append(
-            f"[Documento {idx} - Fonte: {source}{page_info}]\n{doc.page_content}\n"
-        )
-    return "\n".join(partes)
+    return "\n".join(format_context_block(idx, doc) for idx, doc in enumerate(docs, start=1))
 
 
 def build_citations(docs: List[Document]) -> List[Citation]:
@@ -36,7 +40,7 @@ def build_citations(docs: List[Document]) -> List[Citation]:
     for doc in docs:
         source = doc.metadata.get("source", "desconhecido")
         page = doc.metadata.get("page")
-        relevance_score = float(doc.metadata.get("score", 0.0))
+        relevance_score = float(doc.metadata.get(SCORE_METADATA_KEY) or 0.0)
 
         excerpt = doc.page_content
         if len(excerpt) > 500:
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Set
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.utils.bm25 import tokenize
+
+# Metadado com o vetor do chunk, pedido ao Vector DB só quando há reranking
+VECTOR_METADATA_KEY = "_vector"
+
+
+class RerankTimeout(Exception):
+    """Orçamento de tempo do reranking estourado."""
+
+
+@dataclass
+class RerankOutcome:
+    docs: List[Document]
+    fallback: bool = False
+
+
+def strip_vectors(docs: Sequence[Document]) -> List[Document]:
+    """Remove os vetores dos metadados (não vão para citações nem cache)."""
+    return [
+        Document(page_content=doc.page_content, metadata={k: v for k, v in doc.metadata.items() if k != VECTOR_METADATA_KEY})
+        if VECTOR_METADATA_KEY in doc.metadata
+        else doc
+        for doc in docs
+    ]
+
+
+class Reranker:
+    """
+    Reranking em CPU, sem modelo extra: MMR (Maximal Marginal Relevance)
+    sobre os embeddings que o Vector DB já tem, com a relevância combinando
+    cosseno com a pergunta e sobreposição lexical (fração dos termos da
+    pergunta presentes no chunk).
+
+    - `lexical_weight`: peso da sobreposição lexical na relevância.
+    - `mmr_lambda`: 1.0 = só relevância; menor = mais diversidade (evita
+      mandar ao LLM chunks quase iguais).
+
+    Chunks sem vetor (ex.: vindos só do BM25 no modo híbrido) usam a posição
+    original como relevância densa e Jaccard de termos como similaridade.
+    Se `deadline` (time.monotonic) passar, devolve a ordem original.
+    """
+
+    def __init__(self, lexical_weight: float = 0.3, mmr_lambda: float = 0.7) -> None:
+        self._lexical_weight = lexical_weight
+        self._mmr_lambda = mmr_lambda
+
+    @staticmethod
+    def _unit(vector: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+        if vector is None:
+            return None
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm > 0 else None
+
+    @staticmethod
+    def _jaccard(a: Set[str], b: Set[str]) -> float:
+        return len(a & b) / len(a | b) if a and b else 0.0
+
+    def rerank(
+        self,
+        query: str,
+        query_vector: Optional[Sequence[float]],
+        docs: List[Document],
+        k: int,
+        deadline: Optional[float] = None,
+    ) -> RerankOutcome:
+        if len(docs) <= 1 or k <= 0:
+            return RerankOutcome(strip_vectors(docs[:k]))
+        try:
+            ranked = self._mmr(query, query_vector, docs, k, deadline)
+        except RerankTimeout:
+            return RerankOutcome(strip_vectors(docs[:k]), fallback=True)
+        return RerankOutcome(strip_vectors(ranked))
+
+    def _check(self, deadline: Optional[float]) -> None:
+        if deadline is not None and time.monotonic() > deadline:
+            raise RerankTimeout
+
+    def _mmr(
+        self,
+        query: str,
+        query_vector: Optional[Sequence[float]],
+        docs: List[Document],
+        k: int,
+        deadline: Optional[float],
+    ) -> List[Document]:
+        query_terms = set(tokenize(query))
+        query_unit = self._unit(query_vector)
+        units = [self._unit(doc.metadata.get(VECTOR_METADATA_KEY)) for doc in docs]
+        terms = [set(tokenize(doc.page_content)) for doc in docs]
+
+        relevance = []
+        for rank, (unit, doc_terms) in enumerate(zip(units, terms)):
+            if query_unit is not None and unit is not None:
+                dense = float(unit @ query_unit)
+            else:
+                dense = 1.0 - rank / len(docs)
+            lexical = len(query_terms & doc_terms) / len(query_terms) if query_terms else 0.0
+            relevance.append((1 - self._lexical_weight) * dense + self._lexical_weight * lexical)
+        self._check(deadline)
+
+        def similarity(i: int, j: int) -> float:
+            if units[i] is not None and units[j] is not None:
+                return float(units[i] @ units[j])
+            return self._jaccard(terms[i], terms[j])
+
+        selected: List[int] = []
+        max_sim = [0.0] * len(docs)
+        remaining = set(range(len(docs)))
+        while remaining and len(selected) < k:
+            best = max(
+                remaining,
+                key=lambda i: (self._mmr_lambda * relevance[i] - (1 - self._mmr_lambda) * max_sim[i], -i),
+            )
+            selected.append(best)
+            remaining.discard(best)
+            for i in remaining:
+                max_sim[i] = max(max_sim[i], similarity(i, best))
+            self._check(deadline)
+        return [docs[i] for i in selected]
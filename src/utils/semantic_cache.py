@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SemanticHit:
+    payload: Any
+    similarity: float
+
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas indexado pelo embedding da pergunta.
+
+    Uma pergunta nova reaproveita a resposta de uma pergunta já respondida
+    quando a similaridade de cosseno entre os embeddings passa de `threshold`.
+
+    - Embeddings normalizados numa matriz float32 pré-alocada: a busca é um
+      único produto matriz-vetor (`max_entries` x dim), sem I/O.
+    - `version`: identifica o índice e os prompts que geraram as respostas.
+      Quando muda, o cache inteiro é descartado (as respostas ficaram velhas).
+    - `scope`: particiona as entradas dentro da mesma versão (ex.: top_k).
+    - Cheio, substitui a entrada usada há mais tempo (LRU); TTL opcional.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_entries: int,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._threshold = threshold
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._payloads: List[Any] = []
+        self._scopes: List[Hashable] = []
+        self._expires_at: List[Optional[float]] = []
+        self._last_used = np.zeros(0, dtype=np.float64)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> Optional[np.ndarray]:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(arr))
+        if norm == 0.0:
+            return None
+        return arr / norm
+
+    def _check_version(self, version: str) -> None:
+        # Chamado com o lock adquirido
+        if self._version != version:
+            if self._version is not None and self._payloads:
+                self.invalidations += 1
+            self._reset()
+            self._version = version
+
+    def _reset(self) -> None:
+        self._matrix = None
+        self._payloads = []
+        self._scopes = []
+        self._expires_at = []
+        self._last_used = np.zeros(0, dtype=np.float64)
+
+    def lookup(self, vector: Sequence[float], version: str, scope: Hashable = None) -> Optional[SemanticHit]:
+        """Retorna a resposta mais similar acima do limiar, ou None."""
+        if not self.enabled:
+            return None
+        query = self._normalize(vector)
+
+        with self._lock:
+            self._check_version(version)
+            if query is None or self._matrix is None or not self._payloads:
+                self.misses += 1
+                return None
+
+            count = len(self._payloads)
+            if query.shape[0] != self._matrix.shape[1]:
+                self.misses += 1
+                return None
+
+            scores = self._matrix[:count] @ query
+            now = self._clock()
+            for idx in np.argsort(-scores):
+                similarity = float(scores[idx])
+                if similarity < self._threshold:
+                    break
+                if self._scopes[idx] != scope:
+                    continue
+                expires_at = self._expires_at[idx]
+                if expires_at is not None and expires_at <= now:
+                    continue
+                self._last_used[idx] = now
+                self.hits += 1
+                return SemanticHit(payload=self._payloads[idx], similarity=round(similarity, 4))
+
+            self.misses += 1
+            return None
+
+    def store(self, vector: Sequence[float], version: str, payload: Any, scope: Hashable = None) -> None:
+        if not self.enabled:
+            return
+        normalized = self._normalize(vector)
+        if normalized is None:
+            return
+
+        with self._lock:
+            self._check_version(version)
+            if self._matrix is None or self._matrix.shape[1] != normalized.shape[0]:
+                self._reset()
+                self._matrix = np.zeros((self._max_entries, normalized.shape[0]), dtype=np.float32)
+                self._last_used = np.zeros(self._max_entries, dtype=np.float64)
+
+            now = self._clock()
+            expires_at = now + self._ttl if self._ttl else None
+            if len(self._payloads) < self._max_entries:
+                idx = len(self._payloads)
+                self._payloads.append(payload)
+                self._scopes.append(scope)
+                self._expires_at.append(expires_at)
+            else:
+                idx = int(np.argmin(self._last_used))
+                self._payloads[idx] = payload
+                self._scopes[idx] = scope
+                self._expires_at[idx] = expires_at
+
+            self._matrix[idx] = normalized
+            self._last_used[idx] = now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._payloads),
+            "max_entries": self._max_entries,
+            "threshold": self._threshold,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
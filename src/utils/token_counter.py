@@ -1,8 +1,84 @@
-import tiktoken
-from core.config import settings
-
-def count_tokens(text: str, model: str = None) -> int:
-    """Conta tokens usando tiktoken"""
-    model = model or settings.OPENAI_MODEL
-    encoding = tiktoken.encoding_for_model(model)
-    return len(encoding.encode(text))
\ No newline at end of file
+from __future__ import annotations
+
+import threading
+from typing import Any, List, Optional, Sequence
+
+from src.core.config import settings
+from src.utils.logger import logger
+from src.utils.rag_helpers import estimate_tokens
+
+# Metadado do chunk com a contagem de tokens, calculada na ingestão
+TOKEN_COUNT_METADATA_KEY = "token_count"
+
+
+class TokenCounter:
+    """
+    Contagem de tokens com o encoder BPE do tiktoken (TOKENIZER_ENCODING).
+
+    O encoder é carregado uma vez por processo, na primeira contagem (o
+    tiktoken baixa o arquivo do vocabulário na primeira vez; em ambiente sem
+    rede, apontar TIKTOKEN_CACHE_DIR para uma cópia local). Se não carregar,
+    cai na heurística de ~4 caracteres por token e avisa no log uma vez.
+
+    O `cl100k_base` é a base do vocabulário do Llama 3, então as contagens
+    ficam próximas das do modelo servido pelo Ollama.
+    """
+
+    def __init__(self, encoding_name: str | None = None) -> None:
+        self._encoding_name = encoding_name if encoding_name is not None else settings.TOKENIZER_ENCODING
+        self._encoding: Any = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _get_encoding(self) -> Any:
+        if self._loaded:
+            return self._encoding
+        with self._lock:
+            if not self._loaded:
+                try:
+                    import tiktoken
+
+                    self._encoding = tiktoken.get_encoding(self._encoding_name)
+                except Exception as e:
+                    logger.warning(
+                        f"Encoder '{self._encoding_name}' indisponível ({e}); contando tokens pela heurística"
+                    )
+                    self._encoding = None
+                self._loaded = True
+        return self._encoding
+
+    @property
+    def backend(self) -> str:
+        return "tiktoken" if self._get_encoding() is not None else "heuristic"
+
+    def count(self, text: Optional[str]) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return estimate_tokens(text)
+        return len(encoding.encode_ordinary(text))
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        """Conta vários textos de uma vez (o tiktoken codifica em threads)."""
+        encoding = self._get_encoding()
+        if encoding is None:
+            return [estimate_tokens(text) for text in texts]
+        return [len(tokens) for tokens in encoding.encode_ordinary_batch(list(texts))]
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Corta `text` para no máximo `max_tokens` tokens."""
+        if max_tokens <= 0:
+            return ""
+        encoding = self._get_encoding()
+        if encoding is None:
+            return text[: max_tokens * 4]
+        tokens = encoding.encode_ordinary(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+token_counter = TokenCounter()
+
+
+def count_tokens(text: Optional[str]) -> int:
+    return token_counter.count(text)
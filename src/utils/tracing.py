@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import queue
+import random
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    start_time: datetime
+    end_time: datetime
+    kind: str = "span"  # "span" ou "generation"
+    input: Any = None
+    output: Any = None
+    metadata: Optional[Dict[str, Any]] = None
+    model: Optional[str] = None
+    usage: Optional[Dict[str, int]] = None
+
+
+@dataclass
+class TraceRecord:
+    name: str
+    start_time: datetime
+    input: Any = None
+    output: Any = None
+    metadata: Optional[Dict[str, Any]] = None
+    spans: List[SpanRecord] = field(default_factory=list)
+    trace_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+
+class TracingPipeline:
+    """
+    Pipeline de tracing único por processo.
+
+    O caminho da requisição só decide a amostragem e faz `put_nowait` numa
+    fila limitada; uma thread worker agrupa os traces em lotes e chama o
+    exporter. Com a fila cheia o trace é descartado e contabilizado, nunca
+    atrasando a requisição.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[Callable[[List[TraceRecord]], None]],
+        max_queue_size: int = 1000,
+        batch_size: int = 50,
+        flush_interval_seconds: float = 2.0,
+        sample_rate: float = 1.0,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self._exporter = exporter
+        self._queue: queue.Queue[TraceRecord] = queue.Queue(maxsize=max_queue_size)
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval_seconds
+        self._sample_rate = sample_rate
+        self._rng = rng
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    def should_sample(self) -> bool:
+        """Decide, no início da requisição, se ela será rastreada."""
+        if not self.enabled:
+            return False
+        if self._sample_rate >= 1.0 or self._rng() < self._sample_rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+    def submit(self, record: TraceRecord) -> bool:
+        """Enfileira o trace sem bloquear. Retorna False se foi descartado."""
+        if not self.enabled:
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._stop_event.clear()
+                self._worker = threading.Thread(
+                    target=self._run, name="tracing-exporter", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self) -> None:
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._export(batch)
+
+    def _export(self, batch: List[TraceRecord]) -> None:
+        try:
+            self._exporter(batch)
+            self.exported += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Falha ao exportar lote de traces")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Para o worker após exportar o que ainda estiver na fila."""
+        self._stop_event.set()
+        if self._worker is not None:
+            self._worker.join(timeout=timeout)
+            self._worker = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "submitted": self.submitted,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "exported": self.exported,
+            "failed": self.failed,
+            "queue_size": self._queue.qsize(),
+        }
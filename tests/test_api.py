@@ -11,6 +11,25 @@ def test_health_check():
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
+def test_ready_waits_for_resources_and_ollama_warmup():
+    not_ready = {"ready": False, "models": {"llm": {"model": "llama3.2", "loaded": False}}}
+    vector_store = {"ready": False, "init_ms": None, "error": "Connection refused"}
+    resources_down = {"ready": False, "resources": {"vector_store": vector_store}}
+    resources_up = {"ready": True, "resources": {"vector_store": {"ready": True, "init_ms": 12.5, "error": None}}}
+    with patch("src.api.routes.resources.readiness", return_value=resources_up), \
+         patch("src.api.routes.ollama_provider.readiness", return_value=not_ready):
+        assert client.get("/api/ready").status_code == 503
+    with patch("src.api.routes.resources.readiness", return_value=resources_down), \
+         patch("src.api.routes.ollama_provider.readiness", return_value={**not_ready, "ready": True}):
+        response = client.get("/api/ready")
+        assert response.status_code == 503
+        assert response.json()["resources"]["vector_store"]["error"] == "Connection refused"
+    with patch("src.api.routes.resources.readiness", return_value=resources_up), \
+         patch("src.api.routes.ollama_provider.readiness", return_value={**not_ready, "ready": True}):
+        response = client.get("/api/ready")
+        assert response.status_code == 200
+        assert response.json()["resources"]["vector_store"]["init_ms"] == 12.5
+
 def test_query_endpoint_success():
     metrics = Metrics(
         total_latency_ms=100.0, retrieval_latency_ms=50.0, generation_latency_ms=50.0,
@@ -64,3 +83,68 @@ def test_query_endpoint_exception():
         assert response.status_code == 500
         assert "Erro catastrófico" in response.json()["detail"]
 
+
+def test_query_stream_endpoint():
+    metrics = Metrics(
+        total_latency_ms=100.0, retrieval_latency_ms=50.0, generation_latency_ms=50.0,
+        prompt_tokens=10, completion_tokens=2, estimated_cost_usd=0.0,
+        top_k_used=3, context_size_chars=100, time_to_first_token_ms=5.0, tokens_per_second=40.0
+    )
+
+    async def fake_stream(_payload):
+        yield "guardrail", GuardrailStatus(blocked=False, reason=None)
+        yield "citations", []
+        yield "token", "Olá"
+        yield "token", " mundo"
+        yield "metrics", metrics
+
+    with patch("src.api.v1.query_api.qa_service.stream_query", side_effect=fake_stream):
+        response = client.post("/api/v1/query/stream", json={"question": "Teste"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.text
+        assert body.index("event: citations") < body.index("event: token") < body.index("event: metrics")
+        assert 'data: "Olá"' in body
+        assert '"time_to_first_token_ms": 5.0' in body
+
+def test_query_stream_endpoint_error_event():
+    async def broken_stream(_payload):
+        yield "guardrail", GuardrailStatus(blocked=False, reason=None)
+        raise RuntimeError("Ollama caiu")
+
+    with patch("src.api.v1.query_api.qa_service.stream_query", side_effect=broken_stream):
+        response = client.post("/api/v1/query/stream", json={"question": "Teste"})
+        assert response.status_code == 200
+        assert "event: error" in response.text
+        assert "Ollama caiu" in response.text
+
+
+def test_query_batch_endpoint_preserves_order():
+    metrics = Metrics(
+        total_latency_ms=1.0, retrieval_latency_ms=0.0, generation_latency_ms=0.0,
+        prompt_tokens=0, completion_tokens=0, estimated_cost_usd=0.0,
+        top_k_used=3, context_size_chars=0
+    )
+
+    async def fake_batch(questions):
+        return [
+            QueryResponse(answer=q.question.upper(), citations=[], metrics=metrics,
+                          guardrail_status=GuardrailStatus(blocked=False))
+            for q in questions
+        ]
+
+    with patch("src.api.v1.query_api.qa_service.handle_batch", side_effect=fake_batch):
+        response = client.post(
+            "/api/v1/query/batch",
+            json={"questions": [{"question": "a"}, {"question": "b", "top_k": 2}]},
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["answer"] for r in data["results"]] == ["A", "B"]
+    assert "total_latency_ms" in data
+
+
+def test_query_batch_endpoint_rejects_empty_batch():
+    response = client.post("/api/v1/query/batch", json={"questions": []})
+    assert response.status_code == 422
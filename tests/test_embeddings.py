@@ -0,0 +1,236 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.providers.cached_embedding_provider import CachedEmbeddingProvider
+from src.providers.embedding_provider import EmbeddingProvider
+from src.utils.cache import SQLiteStore
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model: str = "fake-model") -> None:
+        self._model = model
+        self.embed_query_mock = MagicMock(side_effect=lambda text: [float(len(text)), 0.5])
+        self.embed_documents_mock = MagicMock(
+            side_effect=lambda texts: [[float(len(t)), 0.5] for t in texts]
+        )
+        self.aembed_query_mock = AsyncMock(side_effect=lambda text: [float(len(text)), 0.5])
+
+    @property
+    def model_name(self) -> str:
+        return self._model
+
+    def embed_query(self, text):
+        return self.embed_query_mock(text)
+
+    def embed_documents(self, texts):
+        return self.embed_documents_mock(list(texts))
+
+    async def aembed_query(self, text):
+        return await self.aembed_query_mock(text)
+
+    @property
+    def langchain_embeddings(self):
+        return MagicMock()
+
+
+def test_embed_query_hits_cache():
+    inner = FakeEmbeddingProvider()
+    cached = CachedEmbeddingProvider(inner, max_bytes=1024)
+
+    assert cached.embed_query("abc") == [3.0, 0.5]
+    assert cached.embed_query("abc") == [3.0, 0.5]
+
+    inner.embed_query_mock.assert_called_once_with("abc")
+    assert cached.cache_stats()["hits"] == 1
+
+
+async def test_aembed_query_shares_cache_with_sync_path():
+    inner = FakeEmbeddingProvider()
+    cached = CachedEmbeddingProvider(inner, max_bytes=1024)
+
+    cached.embed_query("pergunta")
+    assert await cached.aembed_query("pergunta") == [8.0, 0.5]
+
+    inner.aembed_query_mock.assert_not_called()
+
+
+async def test_langchain_adapter_uses_cache():
+    inner = FakeEmbeddingProvider()
+    cached = CachedEmbeddingProvider(inner, max_bytes=1024)
+    lc = cached.langchain_embeddings
+
+    lc.embed_query("abc")
+    await lc.aembed_query("abc")
+    lc.embed_documents(["abc"])
+
+    inner.embed_query_mock.assert_called_once()
+    inner.aembed_query_mock.assert_not_called()
+    inner.embed_documents_mock.assert_not_called()
+
+
+def test_embed_documents_only_sends_misses_in_order():
+    inner = FakeEmbeddingProvider()
+    cached = CachedEmbeddingProvider(inner, max_bytes=1024)
+    cached.embed_query("bb")
+
+    result = cached.embed_documents(["a", "bb", "ccc", "a"])
+
+    assert result == [[1.0, 0.5], [2.0, 0.5], [3.0, 0.5], [1.0, 0.5]]
+    inner.embed_documents_mock.assert_called_once_with(["a", "ccc"])
+
+
+def test_cache_key_includes_model():
+    inner_a = FakeEmbeddingProvider(model="a")
+    inner_b = FakeEmbeddingProvider(model="b")
+    cached_a = CachedEmbeddingProvider(inner_a, max_bytes=1024)
+    cached_b = CachedEmbeddingProvider(inner_b, max_bytes=1024)
+
+    assert cached_a._key("texto") != cached_b._key("texto")
+
+
+def test_cache_is_bounded_by_bytes():
+    inner = FakeEmbeddingProvider()
+    # Cada vetor de 2 floats ocupa 8 bytes em float32: cabem 2 entradas
+    cached = CachedEmbeddingProvider(inner, max_bytes=16)
+
+    for text in ("a", "b", "c"):
+        cached.embed_query(text)
+
+    stats = cached.cache_stats()
+    assert stats["size"] == 2
+    assert stats["bytes"] == 16
+
+    cached.embed_query("a")  # o mais antigo foi despejado
+    assert inner.embed_query_mock.call_count == 4
+
+
+def test_cache_persists_in_sqlite(tmp_path):
+    path = tmp_path / "embeddings.db"
+    first = SQLiteStore(path, table="embeddings")
+    CachedEmbeddingProvider(FakeEmbeddingProvider(), max_bytes=1024, store=first).embed_query("abc")
+    first.close()
+
+    second = SQLiteStore(path, table="embeddings")
+    inner = FakeEmbeddingProvider()
+    cached = CachedEmbeddingProvider(inner, max_bytes=1024, store=second)
+    try:
+        assert cached.embed_query("abc") == pytest.approx([3.0, 0.5])
+        inner.embed_query_mock.assert_not_called()
+        assert cached.cache_stats()["disk_hits"] == 1
+    finally:
+        second.close()
+
+
+async def test_aembed_documents_only_sends_misses():
+    inner = FakeEmbeddingProvider()
+    inner.aembed_documents = AsyncMock(side_effect=lambda texts: [[float(len(t)), 0.5] for t in texts])
+    cached = CachedEmbeddingProvider(inner, max_bytes=1024)
+    cached.embed_query("bb")
+
+    result = await cached.aembed_documents(["a", "bb", "a"])
+
+    assert result == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    inner.aembed_documents.assert_awaited_once_with(["a"])
+
+
+def _ollama_provider(**overrides):
+    from src.core.embeddings_config import EmbeddingsConfig
+    from src.providers.ollama_embedding_provider import OllamaEmbeddingProvider
+
+    config = EmbeddingsConfig(
+        **{"batch_size": 2, "max_concurrency": 3, "max_retries": 2, "retry_backoff": 0.0, **overrides}
+    )
+    provider = OllamaEmbeddingProvider(config)
+    provider._lc = MagicMock()
+    return provider
+
+
+def test_ollama_embed_documents_batches_concurrently_in_order():
+    import threading
+    import time
+
+    provider = _ollama_provider()
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def embed(batch):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02 * (3 - len(batch[0]) % 3))  # conclusão fora de ordem
+        with lock:
+            active[0] -= 1
+        return [[float(len(t))] for t in batch]
+
+    provider._lc.embed_documents.side_effect = embed
+    texts = ["a" * n for n in range(1, 8)]
+
+    assert provider.embed_documents(texts) == [[float(n)] for n in range(1, 8)]
+    assert [len(c.args[0]) for c in provider._lc.embed_documents.call_args_list] == [2, 2, 2, 1]
+    assert 1 < peak[0] <= 3
+
+
+def test_ollama_embed_documents_retries_transient_errors():
+    import httpx
+
+    provider = _ollama_provider()
+    provider._lc.embed_documents.side_effect = [
+        httpx.ReadTimeout("lento"),
+        [[1.0], [2.0]],
+    ]
+
+    assert provider.embed_documents(["a", "bb"]) == [[1.0], [2.0]]
+    assert provider._lc.embed_documents.call_count == 2
+
+
+def test_ollama_does_not_retry_client_errors():
+    from ollama import ResponseError
+
+    provider = _ollama_provider()
+    provider._lc.embed_documents.side_effect = ResponseError("model not found", status_code=404)
+
+    with pytest.raises(ResponseError):
+        provider.embed_documents(["a"])
+    assert provider._lc.embed_documents.call_count == 1
+
+
+async def test_ollama_aembed_documents_limits_concurrency_and_gives_up_after_retries():
+    import asyncio
+
+    provider = _ollama_provider(max_concurrency=2, max_retries=1)
+    active, peak = [0], [0]
+
+    async def aembed(batch):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return [[float(len(t))] for t in batch]
+
+    provider._lc.aembed_documents = AsyncMock(side_effect=aembed)
+    texts = ["a" * n for n in range(1, 10)]
+    assert await provider.aembed_documents(texts) == [[float(n)] for n in range(1, 10)]
+    assert peak[0] == 2
+
+    provider._lc.aembed_documents = AsyncMock(side_effect=ConnectionError("Ollama fora do ar"))
+    with pytest.raises(ConnectionError):
+        await provider.aembed_documents(["a"])
+    assert provider._lc.aembed_documents.await_count == 2
+
+
+async def test_ollama_langchain_embeddings_batch_and_retry_without_cache():
+    import httpx
+
+    provider = _ollama_provider(max_concurrency=1)
+    provider._lc.embed_documents.side_effect = [
+        httpx.ConnectError("recusada"),
+        [[1.0], [2.0]],
+        [[3.0]],
+    ]
+    provider._lc.aembed_query = AsyncMock(side_effect=[httpx.ReadTimeout("lento"), [4.0]])
+    lc = provider.langchain_embeddings
+
+    assert lc.embed_documents(["a", "b", "c"]) == [[1.0], [2.0], [3.0]]
+    assert [c.args[0] for c in provider._lc.embed_documents.call_args_list] == [["a", "b"], ["a", "b"], ["c"]]
+    assert await lc.aembed_query("pergunta") == [4.0]
+    assert provider._lc.aembed_query.await_count == 2
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Orçamento do import de `src.main` (cold start dos pods). Antes do import
+# preguiçoso de Qdrant/Langfuse/ingestão ficava em ~3,5 s; hoje ~1,5 s.
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+
+# Nunca carregados pela API no import: ingestão e integrações pesadas/opcionais
+FORBIDDEN_MODULES = (
+    "qdrant_client",
+    "langchain_qdrant",
+    "langfuse",
+    "langchain_community",
+    "pypdf",
+    "src.ingestion",
+)
+
+
+def _importtime(module: str) -> dict[str, int]:
+    """Roda `python -X importtime` e retorna o tempo acumulado (µs) de cada módulo."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, total, name = line.removeprefix("import time:").split("|")
+        cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def test_api_import_stays_within_budget():
+    # Melhor de até 3 execuções: absorve ruído da máquina sem esconder regressões
+    best_ms = float("inf")
+    for _ in range(3):
+        modules = _importtime("src.main")
+        loaded = sorted({
+            forbidden for forbidden in FORBIDDEN_MODULES for name in modules
+            if name == forbidden or name.startswith(f"{forbidden}.")
+        })
+        assert loaded == [], f"módulos pesados importados pela API: {loaded}"
+        best_ms = min(best_ms, modules["src.main"] / 1000)
+        if best_ms <= IMPORT_TIME_BUDGET_MS:
+            break
+    assert best_ms <= IMPORT_TIME_BUDGET_MS, f"import de src.main: {best_ms:.0f} ms (orçamento {IMPORT_TIME_BUDGET_MS:.0f} ms)"
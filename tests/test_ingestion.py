@@ -0,0 +1,334 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from src.ingestion.chunking import ChunkingService
+from src.ingestion.incremental import IncrementalIngestor
+from src.ingestion.document_loader import load_file
+from src.ingestion.manifest import IngestionManifest
+from src.ingestion.parallel_loader import FileLoaded, LoadedPages, ParallelDocumentLoader
+from src.ingestion.pipeline import FileTask, IngestionPipeline
+
+
+@pytest.fixture
+def ingestion_env(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    vs_client = MagicMock()
+
+    def make_ingestor():
+        return IncrementalIngestor(
+            vs_client,
+            data_dir=data_dir,
+            manifest_path=tmp_path / "manifest.json",
+            chunker=ChunkingService(chunk_size=30, chunk_overlap=0),
+            fingerprint="test",
+            embeddings=_fake_embeddings(),
+        )
+
+    return data_dir, vs_client, make_ingestor
+
+
+def _fake_embeddings():
+    embeddings = MagicMock()
+    embeddings.embed_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+    return embeddings
+
+
+def test_chunks_carry_offset_and_token_count():
+    page = Document(page_content="primeira frase do texto. segunda frase do texto.", metadata={"source": "a.pdf"})
+
+    chunks = ChunkingService(chunk_size=30, chunk_overlap=0).split_page(page, start_index=3)
+
+    assert [c.metadata["chunk_index"] for c in chunks] == [3, 4]
+    assert all(page.page_content.index(c.page_content) == c.metadata["start_index"] for c in chunks)
+    assert all(c.metadata["token_count"] > 0 for c in chunks)
+
+
+def _upserted_ids(vs_client):
+    return [point_id for call in vs_client.upsert_vectors.call_args_list for point_id in call.args[2]]
+
+
+def test_unchanged_data_dir_does_no_embedding(ingestion_env, tmp_path):
+    from src.clients.vector_store_client import VectorStoreClient
+    from src.core.vector_store_config import VectorStoreConfig
+    from src.providers.qdrant_vector_store_provider import QdrantVectorStoreProvider
+
+    data_dir, vs_client, make_ingestor = ingestion_env
+    (data_dir / "a.txt").write_text("Primeiro parágrafo.\n\nSegundo parágrafo.", encoding="utf-8")
+    (data_dir / "b.txt").write_text("Outro arquivo.", encoding="utf-8")
+
+    first = make_ingestor().run()
+    assert first.files_added == 2
+    assert vs_client.upsert_vectors.called
+
+    vs_client.reset_mock()
+    second = make_ingestor().run()
+
+    assert second.files_unchanged == 2
+    assert not second.changed
+    vs_client.upsert_vectors.assert_not_called()
+    vs_client.delete.assert_not_called()
+
+    # Como no scripts/ingest.py: client do Qdrant de verdade (sem rede), nenhuma chamada de embedding
+    emb_client = MagicMock()
+    embeddings = _fake_embeddings()
+    with patch("src.providers.qdrant_vector_store_provider.QdrantClient"), \
+         patch("src.providers.qdrant_vector_store_provider.AsyncQdrantClient"), \
+         patch("src.providers.qdrant_vector_store_provider.QdrantVectorStore") as mock_vs_cls:
+        provider = QdrantVectorStoreProvider(VectorStoreConfig(collection_name="test_docs"), emb_client)
+        third = IncrementalIngestor(
+            VectorStoreClient(provider), data_dir=data_dir, manifest_path=tmp_path / "manifest.json",
+            chunker=ChunkingService(chunk_size=30, chunk_overlap=0), fingerprint="test", embeddings=embeddings,
+        ).run()
+
+    assert third.files_unchanged == 2
+    mock_vs_cls.assert_not_called()
+    assert emb_client.method_calls == [] and embeddings.method_calls == []
+
+
+def test_point_ids_are_deterministic(ingestion_env):
+    data_dir, vs_client, make_ingestor = ingestion_env
+    (data_dir / "a.txt").write_text("Conteúdo estável.", encoding="utf-8")
+
+    make_ingestor().run()
+    first_ids = _upserted_ids(vs_client)
+
+    vs_client.reset_mock()
+    make_ingestor().run(force=True)
+
+    assert _upserted_ids(vs_client) == first_ids
+
+
+def test_changed_file_reembeds_only_new_chunks_and_deletes_stale(ingestion_env):
+    data_dir, vs_client, make_ingestor = ingestion_env
+    path = data_dir / "a.txt"
+    path.write_text("Bloco um que fica igual.\n\nBloco dois antigo.", encoding="utf-8")
+    make_ingestor().run()
+    old_ids = _upserted_ids(vs_client)
+    assert len(old_ids) == 2
+
+    vs_client.reset_mock()
+    path.write_text("Bloco um que fica igual.\n\nBloco dois novo!", encoding="utf-8")
+    report = make_ingestor().run()
+
+    assert report.files_changed == 1
+    assert report.chunks_reused == 1
+    assert report.chunks_upserted == 1
+    (chunks, vectors, ids), _ = vs_client.upsert_vectors.call_args
+    assert [c.page_content for c in chunks] == ["Bloco dois novo!"]
+    vs_client.delete.assert_called_once_with([old_ids[1]])
+
+
+def test_removed_file_points_are_deleted(ingestion_env, tmp_path):
+    data_dir, vs_client, make_ingestor = ingestion_env
+    (data_dir / "a.txt").write_text("Arquivo A.", encoding="utf-8")
+    (data_dir / "b.txt").write_text("Arquivo B.", encoding="utf-8")
+    make_ingestor().run()
+    manifest = IngestionManifest.load(tmp_path / "manifest.json")
+    b_ids = manifest.files["b.txt"].point_ids
+
+    vs_client.reset_mock()
+    (data_dir / "b.txt").unlink()
+    report = make_ingestor().run()
+
+    assert report.files_removed == 1
+    vs_client.delete.assert_called_once_with(b_ids)
+    vs_client.upsert_vectors.assert_not_called()
+    assert "b.txt" not in IngestionManifest.load(tmp_path / "manifest.json").files
+
+
+def test_fingerprint_change_reindexes_everything(ingestion_env, tmp_path):
+    data_dir, vs_client, _ = ingestion_env
+    (data_dir / "a.txt").write_text("Arquivo A.", encoding="utf-8")
+
+    def ingestor(fingerprint):
+        return IncrementalIngestor(
+            vs_client, data_dir=data_dir, manifest_path=tmp_path / "manifest.json",
+            chunker=ChunkingService(chunk_size=30, chunk_overlap=0), fingerprint=fingerprint,
+            embeddings=_fake_embeddings(),
+        )
+
+    ingestor("v1").run()
+    vs_client.reset_mock()
+    report = ingestor("v2").run()
+
+    assert report.files_changed == 1
+    assert report.chunks_upserted == 1
+
+
+def test_pipeline_batches_and_reports_throughput(tmp_path):
+    def fake_reader(path):
+        for page in range(5):
+            yield Document(page_content=f"{path.name} página {page}. " * 3, metadata={"page": page})
+
+    vs_client = MagicMock()
+    embeddings = _fake_embeddings()
+    pipeline = IngestionPipeline(
+        vs_client, embeddings, chunker=ChunkingService(chunk_size=40, chunk_overlap=0),
+        batch_size=4, queue_size=1, reader=fake_reader,
+    )
+    done = []
+    stages = pipeline.run(
+        [FileTask(tmp_path / "a.pdf"), FileTask(tmp_path / "b.pdf")],
+        on_file_done=lambda result: done.append((result.task.name, len(result.point_ids), result.upserted)),
+    )
+
+    assert [name for name, _, _ in done] == ["a.pdf", "b.pdf"]
+    assert all(n_ids == upserted for _, n_ids, upserted in done)
+    assert all(call.args[0] and len(call.args[0]) <= 4 for call in embeddings.embed_documents.call_args_list)
+    by_name = {stage.name: stage for stage in stages}
+    assert by_name["load"].count == 10
+    assert by_name["chunk"].count == by_name["embed"].count == by_name["upsert"].count
+    assert by_name["upsert"].count == sum(n for _, n, _ in done)
+
+
+def test_pipeline_propagates_stage_errors(tmp_path):
+    embeddings = MagicMock()
+    embeddings.embed_documents.side_effect = RuntimeError("ollama fora do ar")
+    pipeline = IngestionPipeline(
+        MagicMock(), embeddings, chunker=ChunkingService(chunk_size=40, chunk_overlap=0),
+        batch_size=1, queue_size=1,
+        reader=lambda path: iter([Document(page_content="x" * 200)]),
+    )
+
+    with pytest.raises(RuntimeError, match="ollama fora do ar"):
+        pipeline.run([FileTask(tmp_path / "a.txt")])
+
+
+def test_pipeline_isolates_file_that_fails_to_load(tmp_path):
+    def flaky_reader(path):
+        yield Document(page_content=f"{path.name} primeira página. " * 3, metadata={"page": 0})
+        if path.name == "b.pdf":
+            raise ValueError("PDF corrompido")
+        yield Document(page_content=f"{path.name} segunda página. " * 3, metadata={"page": 1})
+
+    vs_client = MagicMock()
+    pipeline = IngestionPipeline(
+        vs_client, _fake_embeddings(), chunker=ChunkingService(chunk_size=40, chunk_overlap=0),
+        batch_size=1, queue_size=1, reader=flaky_reader,
+    )
+    done = {}
+    pipeline.run(
+        [FileTask(tmp_path / name) for name in ("a.pdf", "b.pdf", "c.pdf")],
+        on_file_done=lambda result: done.setdefault(result.task.name, result.point_ids),
+    )
+
+    assert list(done) == ["a.pdf", "c.pdf"]
+    assert pipeline.failed_files == ["b.pdf"]
+    # O que chegou a ser escrito do arquivo com falha é desfeito
+    committed = set(done["a.pdf"]) | set(done["c.pdf"])
+    partial = [point_id for point_id in _upserted_ids(vs_client) if point_id not in committed]
+    assert partial
+    vs_client.delete.assert_called_once_with(partial)
+
+
+def test_parallel_loader_keeps_order_and_isolates_broken_files(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    writer = pypdf.PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(width=200, height=200)
+    with open(tmp_path / "a.pdf", "wb") as fh:
+        writer.write(fh)
+    (tmp_path / "b.pdf").write_bytes(b"isto nao e um pdf")
+    (tmp_path / "c.txt").write_text("texto simples", encoding="utf-8")
+    paths = [tmp_path / "a.pdf", tmp_path / "b.pdf", tmp_path / "c.txt"]
+
+    loader = ParallelDocumentLoader(workers=2, pages_per_task=2, timeout_seconds=60)
+    items = list(loader.iter_documents(paths))
+
+    loaded = [doc for item in items if isinstance(item, LoadedPages) for doc in item.docs]
+    expected = load_file(paths[0]) + load_file(paths[2])
+    assert [(d.page_content, d.metadata) for d in loaded] == [(d.page_content, d.metadata) for d in expected]
+    assert [(item.path.name, item.ok) for item in items if isinstance(item, FileLoaded)] == [
+        ("a.pdf", True), ("b.pdf", False), ("c.txt", True),
+    ]
+    assert [failure.task.path.name for failure in loader.failures] == ["b.pdf"]
+    # PDF de 5 páginas dividido em 3 tarefas
+    assert sum(1 for item in items if isinstance(item, LoadedPages) and item.path.name == "a.pdf") == 3
+
+
+def test_parallel_loader_timeout_counts_from_submission(tmp_path, monkeypatch):
+    import multiprocessing
+    import time
+
+    class HangingResult:
+        def ready(self):
+            return False
+
+        def get(self, timeout):
+            time.sleep(timeout)
+            raise multiprocessing.TimeoutError
+
+    paths = [tmp_path / f"{name}.txt" for name in "abc"]
+    for path in paths:
+        path.write_text("texto", encoding="utf-8")
+    loader = ParallelDocumentLoader(workers=3, timeout_seconds=0.2)
+    submitted = []
+    monkeypatch.setattr(loader, "_new_pool", MagicMock)
+    monkeypatch.setattr(loader, "_submit", lambda pool, task: submitted.append(task) or HangingResult())
+
+    started = time.monotonic()
+    items = list(loader.iter_documents(paths))
+
+    # Os três travam juntos: um único prazo de espera, sem reenviar os vencidos
+    assert time.monotonic() - started < 0.4
+    assert len(submitted) == 3
+    assert [(item.path.name, item.ok) for item in items] == [("a.txt", False), ("b.txt", False), ("c.txt", False)]
+    assert [failure.task.path.name for failure in loader.failures] == ["a.txt", "b.txt", "c.txt"]
+
+
+def test_parallel_pdf_metadata_matches_pypdf_loader(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    from src.ingestion.parallel_loader import _parse_pdf_pages
+
+    writer = pypdf.PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    writer.add_metadata({
+        "/Author": "  Fulano  ",
+        "/CreationDate": "D:20240102030405+00'00'",
+        "/ModDate": "data inválida",
+    })
+    path = tmp_path / "meta.pdf"
+    with open(path, "wb") as fh:
+        writer.write(fh)
+
+    [(_, metadata)] = _parse_pdf_pages(str(path), 0, 1)
+    assert metadata == load_file(path)[0].metadata
+    assert metadata["author"] == "Fulano" and metadata["creationdate"] == "2024-01-02T03:04:05+00:00"
+
+
+def test_force_reindex_failure_keeps_points_still_in_manifest(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "a.pdf").write_bytes(b"pdf")
+    broken = {"value": False}
+
+    def reader(path):
+        yield Document(page_content="primeira página do arquivo. " * 3, metadata={"page": 0})
+        if broken["value"]:
+            raise ValueError("PDF corrompido")
+        yield Document(page_content="segunda página do arquivo. " * 3, metadata={"page": 1})
+
+    vs_client = MagicMock()
+
+    def make_ingestor():
+        return IncrementalIngestor(
+            vs_client, data_dir=data_dir, manifest_path=tmp_path / "manifest.json",
+            chunker=ChunkingService(chunk_size=40, chunk_overlap=0), fingerprint="test",
+            embeddings=_fake_embeddings(), batch_size=1, reader=reader,
+        )
+
+    make_ingestor().run()
+    indexed = IngestionManifest.load(tmp_path / "manifest.json").files["a.pdf"].point_ids
+    vs_client.reset_mock()
+
+    # --force com falha no meio: os IDs reupsertados são os mesmos já publicados
+    broken["value"] = True
+    report = make_ingestor().run(force=True)
+
+    assert report.files_failed == ["a.pdf"]
+    assert _upserted_ids(vs_client) and set(_upserted_ids(vs_client)) <= set(indexed)
+    vs_client.delete.assert_not_called()
+    assert IngestionManifest.load(tmp_path / "manifest.json").files["a.pdf"].point_ids == indexed
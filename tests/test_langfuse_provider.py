@@ -0,0 +1,123 @@
+import time
+from unittest.mock import MagicMock
+
+from src.providers.langfuse_provider import (
+    GUARDRAIL_PROMPT_NAME,
+    LangfuseProvider,
+    LOCAL_PROMPTS,
+)
+
+
+def _fake_client(texts):
+    client = MagicMock()
+
+    def get_prompt(name):
+        if name not in texts:
+            raise RuntimeError("não encontrado")
+        prompt = MagicMock()
+        prompt.get_langchain_prompt.return_value = texts[name]
+        return prompt
+
+    client.get_prompt.side_effect = get_prompt
+    return client
+
+
+def test_prompts_default_to_local_without_io():
+    provider = LangfuseProvider(client=_fake_client({}), refresh_interval_seconds=0)
+    assert provider.get_guardrail_prompt() == LOCAL_PROMPTS[GUARDRAIL_PROMPT_NAME]
+    assert provider.get_prompt(GUARDRAIL_PROMPT_NAME).source == "local"
+    # Sem refresh em background, nenhuma chamada remota no caminho da requisição
+    provider.get_prompts()
+    provider._client.get_prompt.assert_not_called()
+
+
+def test_refresh_updates_registry_and_version():
+    provider = LangfuseProvider(client=_fake_client({GUARDRAIL_PROMPT_NAME: "Novo {question}"}), refresh_interval_seconds=0)
+    version_before = provider.prompt_version
+
+    provider.refresh_prompts()
+
+    assert provider.get_guardrail_prompt() == "Novo {question}"
+    assert provider.get_prompt(GUARDRAIL_PROMPT_NAME).source == "langfuse"
+    # Prompts que falharam mantêm o valor local
+    assert provider.get_prompt("rag-prompt").source == "local"
+    assert provider.prompt_version != version_before
+
+
+def test_background_refresh_thread_lifecycle():
+    provider = LangfuseProvider(client=_fake_client({"rag-prompt": "RAG remoto"}), refresh_interval_seconds=3600)
+    try:
+        deadline = time.monotonic() + 2
+        while provider.get_prompt("rag-prompt").source != "langfuse" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert provider.get_prompts()[1] == "RAG remoto"
+    finally:
+        provider.stop_background_refresh()
+    assert provider._refresh_thread is None
+
+
+def _record(name="t"):
+    from datetime import datetime, timezone
+    from src.utils.tracing import SpanRecord, TraceRecord
+
+    now = datetime.now(timezone.utc)
+    return TraceRecord(
+        name=name,
+        start_time=now,
+        spans=[
+            SpanRecord(name="retrieval", start_time=now, end_time=now),
+            SpanRecord(name="generation", kind="generation", start_time=now, end_time=now, model="llama3.2"),
+        ],
+    )
+
+
+def test_tracing_pipeline_drops_when_queue_is_full():
+    from src.utils.tracing import TracingPipeline
+
+    pipeline = TracingPipeline(exporter=lambda batch: None, max_queue_size=2)
+    pipeline._ensure_worker = lambda: None  # sem worker: a fila não é drenada
+
+    results = [pipeline.submit(_record()) for _ in range(5)]
+
+    assert results == [True, True, False, False, False]
+    assert pipeline.stats()["dropped"] == 3
+    assert pipeline.stats()["queue_size"] == 2
+
+
+def test_tracing_pipeline_exports_in_batches():
+    from src.utils.tracing import TracingPipeline
+
+    batches = []
+    pipeline = TracingPipeline(exporter=batches.append, batch_size=3, flush_interval_seconds=0.01)
+    for i in range(7):
+        pipeline.submit(_record(str(i)))
+    pipeline.shutdown()
+
+    assert sum(len(batch) for batch in batches) == 7
+    assert all(len(batch) <= 3 for batch in batches)
+    assert pipeline.stats()["exported"] == 7
+
+
+def test_tracing_pipeline_sampling_and_disabled():
+    from src.utils.tracing import TracingPipeline
+
+    sampled = TracingPipeline(exporter=lambda batch: None, sample_rate=0.5, rng=iter([0.1, 0.9]).__next__)
+    assert sampled.should_sample() is True
+    assert sampled.should_sample() is False
+    assert sampled.stats()["sampled_out"] == 1
+
+    disabled = TracingPipeline(exporter=None)
+    assert disabled.should_sample() is False
+    assert disabled.submit(_record()) is False
+
+
+def test_langfuse_export_traces():
+    client = _fake_client({})
+    provider = LangfuseProvider(client=client, refresh_interval_seconds=0)
+
+    provider._export_traces([_record()])
+
+    client.trace.assert_called_once()
+    client.span.assert_called_once()
+    client.generation.assert_called_once()
+    client.flush.assert_called_once()
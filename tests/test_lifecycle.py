@@ -0,0 +1,99 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.core.lifecycle import ResourceRegistry
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+
+class _Service:
+    def __init__(self) -> None:
+        self.value = 1
+
+    def answer(self) -> str:
+        return "real"
+
+
+def test_resource_is_created_on_first_use_and_patchable():
+    factory = MagicMock(side_effect=_Service)
+    registry = ResourceRegistry()
+    service = registry.register("service", factory)
+
+    assert factory.call_count == 0
+    # patch não cria o recurso só para inspecionar o atributo
+    with patch(f"{__name__}._Service.answer", return_value="mock"):
+        assert factory.call_count == 0
+        assert service.answer() == "mock"
+    assert service.answer() == "real"
+    with patch.object(service, "value", 2):
+        assert service.value == 2
+    assert service.value == 1
+    assert factory.call_count == 1
+
+
+async def test_startup_initializes_in_parallel_and_retries_failures():
+    registry = ResourceRegistry()
+    attempts = {"vector_store": 0}
+
+    def flaky():
+        attempts["vector_store"] += 1
+        if attempts["vector_store"] == 1:
+            raise ConnectionError("Connection refused")
+        return _Service()
+
+    registry.register("vector_store", flaky)
+    registry.register("service", _Service)
+
+    with patch("src.core.lifecycle.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        first_round = asyncio.Event()
+        mock_sleep.side_effect = lambda _s: first_round.set()
+        startup = asyncio.create_task(registry.astartup(retry_seconds=5))
+        await first_round.wait()
+        status = registry.readiness()
+        assert status["ready"] is False
+        assert status["resources"]["vector_store"]["error"] == "Connection refused"
+        assert status["resources"]["service"]["ready"] is True
+        await startup
+
+    status = registry.readiness()
+    assert status["ready"] is True
+    assert status["resources"]["vector_store"]["error"] is None
+    assert status["resources"]["vector_store"]["init_ms"] >= 0
+    mock_sleep.assert_awaited_once_with(5)
+
+
+async def test_shutdown_closes_created_resources_in_reverse_order():
+    registry = ResourceRegistry()
+    closed = []
+
+    async def aclose(_service):
+        closed.append("async")
+
+    first = registry.register("first", _Service, shutdown=lambda _service: closed.append("sync"))
+    second = registry.register("second", _Service, shutdown=aclose)
+    registry.register("never_used", _Service, shutdown=lambda _service: closed.append("never_used"))
+
+    first.answer()
+    second.answer()
+    await registry.ashutdown()
+
+    assert closed == ["async", "sync"]
+    assert registry.ready is False
+
+
+def test_importing_the_api_does_not_connect_to_dependencies():
+    # Qdrant inacessível: o import (e o /api/health) não pode depender dele
+    env = {**os.environ, "VECTOR_DB_URL": "http://127.0.0.1:1", "VECTOR_DB_BACKEND": "qdrant"}
+    code = (
+        "from fastapi.testclient import TestClient\n"
+        "from src.main import app\n"
+        "from src.core.lifecycle import resources\n"
+        "assert TestClient(app).get('/api/health').status_code == 200\n"
+        "assert not any(r['ready'] for r in resources.readiness()['resources'].values())\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,54 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+from src.providers.ollama_provider import OllamaProvider, parse_keep_alive
+
+
+def test_parse_keep_alive_to_seconds():
+    assert parse_keep_alive("30m") == 1800
+    assert parse_keep_alive("2h") == 7200
+    assert parse_keep_alive("45s") == 45
+    assert parse_keep_alive("-1") == -1
+    assert parse_keep_alive("300") == 300
+
+
+def test_llms_and_embeddings_share_connection_pool():
+    provider = OllamaProvider(base_url="http://ollama:11434", keep_alive=600, pool_size=4, warmup_models={})
+
+    chat = ChatOllama(model="llama3.2", base_url="http://ollama:11434", **provider.langchain_kwargs())
+    guard = ChatOllama(model="llama3.2", base_url="http://ollama:11434", temperature=0, **provider.langchain_kwargs())
+    embeddings = OllamaEmbeddings(
+        model="nomic-embed-text", base_url="http://ollama:11434", **provider.langchain_kwargs(timeout=30)
+    )
+
+    async_transports = {id(c._async_client._client._transport) for c in (chat, guard, embeddings)}
+    sync_transports = {id(c._client._client._transport) for c in (chat, guard, embeddings)}
+    assert len(async_transports) == 1 and len(sync_transports) == 1
+    assert chat.keep_alive == embeddings.keep_alive == 600
+    # Cada cliente mantém o próprio timeout sobre o pool compartilhado
+    assert embeddings._async_client._client.timeout.read == 30
+
+
+async def test_warmup_retries_until_models_are_loaded():
+    provider = OllamaProvider(
+        keep_alive=60, pool_size=2, warmup_models={"llm": "llama3.2", "embeddings": "nomic-embed-text"}
+    )
+    client = MagicMock()
+    client.generate = AsyncMock()
+    client.embed = AsyncMock(side_effect=[ConnectionError("Ollama subindo"), None])
+
+    assert provider.readiness()["ready"] is False
+    with patch("src.providers.ollama_provider.AsyncClient", return_value=client):
+        await provider.awarmup(retry_seconds=0)
+
+    status = provider.readiness()
+    assert status["ready"] is True
+    assert status["models"]["embeddings"]["loaded"] and status["models"]["embeddings"]["error"] is None
+    # O LLM carregou na primeira tentativa e não é recarregado no retry
+    client.generate.assert_awaited_once_with(model="llama3.2", prompt="", keep_alive=60)
+    assert client.embed.await_count == 2
+
+
+def test_provider_without_warmup_is_ready():
+    assert OllamaProvider(warmup_models={}).ready is True
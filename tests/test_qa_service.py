@@ -1,7 +1,12 @@
+import asyncio
+
 import pytest
-from unittest.mock import MagicMock, patch
+from langchain_core.documents import Document
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.services.qa_service import QAService
-from src.api.schemas import QueryRequest, QueryResponse, GuardrailStatus
+from src.api.schemas import QueryRequest
+from src.core.types import RetrievalResult
+from src.utils.context_packer import PackedContext
 
 @pytest.fixture
 def mock_dependencies():
@@ -10,57 +15,374 @@ def mock_dependencies():
          patch("src.services.qa_service.langfuse_provider") as mock_langfuse, \
          patch("src.services.qa_service.build_context") as mock_build_context, \
          patch("src.services.qa_service.build_citations") as mock_build_citations, \
-         patch("src.services.qa_service.estimate_tokens") as mock_estimate_tokens:
+         patch("src.services.qa_service.count_tokens") as mock_count_tokens, \
+         patch(
+             "src.services.qa_service.pack_context",
+             side_effect=lambda docs, max_tokens=0: PackedContext(docs=list(docs)),
+         ), \
+         patch("src.services.qa_service.guardrail_service") as mock_guardrail:
         
         mock_llm_instance = MagicMock()
         mock_llm_cls.return_value = mock_llm_instance
+
+        # Guardrails liberam por padrão; cada teste ajusta conforme necessário
+        mock_guardrail.validate_patterns.return_value = (False, None)
+        mock_guardrail.avalidate_intent = AsyncMock(return_value=(False, None))
+        mock_retrieval.aretrieve = AsyncMock(return_value=["doc"])
+
+        async def asearch(question, top_k, with_vectors=False):
+            # Os testes configuram `aretrieve`; `asearch` só embrulha o resultado
+            return RetrievalResult(docs=await mock_retrieval.aretrieve(question, top_k=top_k), dense_latency_ms=1.0)
+
+        mock_retrieval.asearch = asearch
         
         yield {
+            "guardrail": mock_guardrail,
             "llm": mock_llm_instance,
             "retrieval": mock_retrieval,
             "langfuse": mock_langfuse,
             "build_context": mock_build_context,
             "build_citations": mock_build_citations,
-            "estimate_tokens": mock_estimate_tokens
+            "count_tokens": mock_count_tokens
         }
 
-def test_qa_service_handle_query_success(mock_dependencies):
+async def test_qa_service_handle_query_success(mock_dependencies):
     # Setup
     service = QAService()
     
-    # Mock guardrails (internal method)
-    service._run_guardrails = MagicMock(return_value=GuardrailStatus(blocked=False))
-    
     # Mock dependencies return values
-    mock_dependencies["retrieval"].retrieve.return_value = ["doc1"]
+    mock_dependencies["retrieval"].aretrieve = AsyncMock(return_value=["doc1"])
     mock_dependencies["langfuse"].get_prompts.return_value = ("SysPrompt", "RAGPrompt {contexto} {question}")
-    mock_dependencies["langfuse"].get_callback_handler.return_value = None
     mock_dependencies["build_context"].return_value = "Contexto"
     
     mock_response = MagicMock()
     mock_response.content = "Resposta final"
-    mock_dependencies["llm"].invoke.return_value = mock_response
+    mock_dependencies["llm"].ainvoke = AsyncMock(return_value=mock_response)
     
-    mock_dependencies["estimate_tokens"].return_value = 10
+    mock_dependencies["count_tokens"].return_value = 10
     mock_dependencies["build_citations"].return_value = []
 
     # Execute
     request = QueryRequest(question="Pergunta", top_k=5)
-    response = service.handle_query(request)
+    response = await service.handle_query(request)
 
     # Assert
     assert response.answer == "Resposta final"
-    mock_dependencies["retrieval"].retrieve.assert_called_once_with("Pergunta", top_k=5)
-    mock_dependencies["llm"].invoke.assert_called_once()
+    mock_dependencies["retrieval"].aretrieve.assert_awaited_once_with("Pergunta", top_k=5)
+    mock_dependencies["llm"].ainvoke.assert_awaited_once()
 
-def test_qa_service_handle_query_blocked(mock_dependencies):
+async def test_qa_service_handle_query_blocked(mock_dependencies):
     service = QAService()
-    service._run_guardrails = MagicMock(return_value=GuardrailStatus(blocked=True, reason="Blocked"))
+    mock_dependencies["guardrail"].avalidate_intent.return_value = (True, "Blocked")
     
     request = QueryRequest(question="Malicious", top_k=5)
-    response = service.handle_query(request)
+    response = await service.handle_query(request)
     
     assert response.answer is None
     assert response.guardrail_status.blocked is True
-    mock_dependencies["llm"].invoke.assert_not_called()
+    mock_dependencies["llm"].ainvoke.assert_not_called()
+
+async def test_qa_service_stream_query(mock_dependencies):
+    service = QAService()
+
+    mock_dependencies["retrieval"].aretrieve = AsyncMock(return_value=["doc1"])
+    mock_dependencies["langfuse"].get_prompts.return_value = ("SysPrompt", "RAGPrompt {contexto} {question}")
+    mock_dependencies["build_context"].return_value = "Contexto"
+    mock_dependencies["build_citations"].return_value = []
+    mock_dependencies["count_tokens"].return_value = 2
+
+    async def fake_astream(*_args, **_kwargs):
+        for content in ["Res", "", "posta"]:
+            chunk = MagicMock()
+            chunk.content = content
+            yield chunk
+
+    mock_dependencies["llm"].astream = fake_astream
+
+    events = [event async for event in service.stream_query(QueryRequest(question="Pergunta", top_k=5))]
+    names = [name for name, _ in events]
+
+    assert names == ["guardrail", "citations", "token", "token", "metrics"]
+    assert "".join(data for name, data in events if name == "token") == "Resposta"
+    metrics = events[-1][1]
+    assert metrics.time_to_first_token_ms is not None
+    assert metrics.tokens_per_second is not None
+
+async def test_insufficient_context_skips_llm(mock_dependencies):
+    from src.services.qa_service import INSUFFICIENT_CONTEXT_ANSWER
+
+    service = QAService()
+    low = Document(page_content="Receita de bolo", metadata={"score": 0.2})
+    mock_dependencies["retrieval"].aretrieve = AsyncMock(return_value=[low])
+    mock_dependencies["llm"].ainvoke = AsyncMock()
+    mock_dependencies["llm"].astream = MagicMock()
+
+    with patch("src.services.qa_service.settings.MIN_RELEVANCE_SCORE", 0.5):
+        response = await service.handle_query(QueryRequest(question="Quem ganhou a copa?", top_k=5))
+        events = [event async for event in service.stream_query(QueryRequest(question="Quem ganhou a copa?"))]
+
+    assert response.answer == INSUFFICIENT_CONTEXT_ANSWER and response.citations == []
+    assert response.metrics.insufficient_context is True
+    assert response.metrics.prompt_tokens == 0 and response.metrics.generation_latency_ms == 0.0
+    assert [name for name, _ in events] == ["guardrail", "citations", "token", "metrics"]
+    assert events[-1][1].insufficient_context is True
+    mock_dependencies["llm"].ainvoke.assert_not_called()
+    mock_dependencies["llm"].astream.assert_not_called()
+
+async def test_qa_service_stream_query_blocked(mock_dependencies):
+    service = QAService()
+    mock_dependencies["guardrail"].validate_patterns.return_value = (True, "Blocked")
+
+    events = [event async for event in service.stream_query(QueryRequest(question="Malicious"))]
+
+    assert [name for name, _ in events] == ["guardrail", "metrics"]
+    mock_dependencies["retrieval"].aretrieve.assert_not_called()
+    mock_dependencies["guardrail"].avalidate_intent.assert_not_called()
+
+async def test_guardrail_llm_runs_concurrently_with_retrieval(mock_dependencies):
+    service = QAService()
+    guardrail_started = asyncio.Event()
+
+    async def slow_guardrail(_question):
+        guardrail_started.set()
+        await asyncio.sleep(0.05)
+        return False, None
+
+    async def slow_retrieval(_question, top_k):
+        # Só conclui se o guardrail já estiver em andamento (execução concorrente)
+        await asyncio.wait_for(guardrail_started.wait(), timeout=1)
+        await asyncio.sleep(0.05)
+        return ["doc1"]
+
+    mock_dependencies["guardrail"].avalidate_intent = AsyncMock(side_effect=slow_guardrail)
+    mock_dependencies["retrieval"].aretrieve = AsyncMock(side_effect=slow_retrieval)
+
+    guarded, _ = await service._guard_and_retrieve("Pergunta", top_k=3)
+
+    assert guarded.guardrail_status.blocked is False
+    assert guarded.docs == ["doc1"]
+    assert guarded.guardrail_latency_ms >= 50
+    assert guarded.parallel_savings_ms > 30
+
+async def test_guardrail_unsafe_discards_retrieval(mock_dependencies):
+    service = QAService()
+    mock_dependencies["guardrail"].avalidate_intent.return_value = (True, "Blocked")
+    mock_dependencies["retrieval"].aretrieve = AsyncMock(side_effect=RuntimeError("Qdrant fora"))
+
+    guarded, _ = await service._guard_and_retrieve("Pergunta", top_k=3)
+
+    assert guarded.guardrail_status.blocked is True
+    assert guarded.docs == []
+
+
+@pytest.fixture
+def answer_cache_setup(mock_dependencies):
+    from src.utils.semantic_cache import SemanticAnswerCache
+
+    with patch("src.services.qa_service.get_embeddings_client") as mock_emb_factory, \
+         patch("src.services.qa_service.read_index_version", return_value="idx-1") as mock_index_version:
+        vectors = {"Qual o prazo?": [1.0, 0.0], "Qual é o prazo?": [0.99, 0.05], "Outra coisa": [0.0, 1.0]}
+        mock_emb_factory.return_value.aembed_query = AsyncMock(side_effect=lambda q: vectors[q])
+
+        mock_dependencies["langfuse"].get_prompts.return_value = ("Sys", "RAG {contexto} {question}")
+        mock_dependencies["langfuse"].prompt_version = "p1"
+        mock_dependencies["langfuse"].tracing.should_sample.return_value = False
+        mock_dependencies["build_context"].return_value = "Contexto"
+        mock_dependencies["build_citations"].return_value = []
+        mock_dependencies["count_tokens"].return_value = 10
+        mock_dependencies["llm"].ainvoke = AsyncMock(return_value=MagicMock(content="Resposta"))
+
+        service = QAService(answer_cache=SemanticAnswerCache(threshold=0.95, max_entries=10))
+        yield service, mock_dependencies, mock_index_version
+
+
+async def test_paraphrase_is_served_from_answer_cache(answer_cache_setup):
+    service, deps, _ = answer_cache_setup
+
+    first = await service.handle_query(QueryRequest(question="Qual o prazo?", top_k=5))
+    second = await service.handle_query(QueryRequest(question="Qual é o prazo?", top_k=5))
+
+    assert first.metrics.cache_hit is False
+    assert second.answer == "Resposta"
+    assert second.metrics.cache_hit is True
+    assert second.metrics.cache_similarity > 0.95
+    deps["llm"].ainvoke.assert_awaited_once()
+    deps["retrieval"].aretrieve.assert_awaited_once()
+    # O guardrail LLM continua rodando mesmo com a resposta vinda do cache
+    assert deps["guardrail"].avalidate_intent.await_count == 2
+
+    await service.handle_query(QueryRequest(question="Outra coisa", top_k=5))
+    assert deps["llm"].ainvoke.await_count == 2
+
+
+async def test_answer_cache_lookup_overlaps_guardrail_and_scans_patterns_once(answer_cache_setup):
+    import src.services.qa_service as qa_module
+
+    service, deps, _ = answer_cache_setup
+    guardrail = {"started": False, "done": False}
+
+    async def slow_guardrail(_question):
+        guardrail["started"] = True
+        await asyncio.sleep(0.05)
+        guardrail["done"] = True
+        return False, None
+
+    deps["guardrail"].avalidate_intent = AsyncMock(side_effect=slow_guardrail)
+    embeddings = qa_module.get_embeddings_client.return_value
+    vector_for = embeddings.aembed_query.side_effect
+    embedded_while_guarding = []
+
+    async def embed(question):
+        embedded_while_guarding.append(guardrail["started"] and not guardrail["done"])
+        return vector_for(question)
+
+    embeddings.aembed_query = AsyncMock(side_effect=embed)
+
+    await service.handle_query(QueryRequest(question="Qual o prazo?", top_k=5))
+
+    assert embedded_while_guarding == [True]
+    deps["guardrail"].validate_patterns.assert_called_once_with("Qual o prazo?")
+
+
+async def test_answer_cache_respects_guardrails_on_hit(answer_cache_setup):
+    service, deps, _ = answer_cache_setup
+    await service.handle_query(QueryRequest(question="Qual o prazo?", top_k=5))
+
+    deps["guardrail"].avalidate_intent = AsyncMock(return_value=(True, "Bloqueado"))
+    response = await service.handle_query(QueryRequest(question="Qual é o prazo?", top_k=5))
+
+    assert response.guardrail_status.blocked is True
+    assert response.answer is None
+
+
+async def test_answer_cache_invalidated_by_new_index_version(answer_cache_setup):
+    service, deps, mock_index_version = answer_cache_setup
+    await service.handle_query(QueryRequest(question="Qual o prazo?", top_k=5))
+
+    mock_index_version.return_value = "idx-2"
+    response = await service.handle_query(QueryRequest(question="Qual o prazo?", top_k=5))
+
+    assert response.metrics.cache_hit is False
+    assert deps["llm"].ainvoke.await_count == 2
+
+
+async def test_handle_batch_orders_results_and_skips_blocked(mock_dependencies):
+    service = QAService()
+    deps = mock_dependencies
+    deps["guardrail"].avalidate_intent = AsyncMock(
+        side_effect=lambda q: (True, "Bloqueado") if q == "ruim" else (False, None)
+    )
+    deps["retrieval"].abatch_retrieve = AsyncMock(return_value=[["doc-a"], ["doc-c"]])
+    deps["langfuse"].get_prompts.return_value = ("Sys", "RAG {contexto} {question}")
+    deps["langfuse"].tracing.should_sample.return_value = False
+    deps["build_context"].side_effect = lambda docs: ",".join(docs)
+    deps["build_citations"].return_value = []
+    deps["count_tokens"].return_value = 10
+
+    async def fake_llm(prompt):
+        # Respostas fora de ordem: a pergunta "a" termina por último
+        await asyncio.sleep(0.02 if "doc-a" in prompt else 0)
+        return MagicMock(content=prompt.split("RAG ")[1])
+
+    deps["llm"].ainvoke = AsyncMock(side_effect=fake_llm)
+
+    requests = [
+        QueryRequest(question="a", top_k=2),
+        QueryRequest(question="ruim"),
+        QueryRequest(question="c"),
+    ]
+    results = await service.handle_batch(requests)
+
+    assert [r.guardrail_status.blocked for r in results] == [False, True, False]
+    assert results[0].answer == "doc-a a"
+    assert results[1].answer is None
+    assert results[2].answer == "doc-c c"
+    assert results[0].metrics.top_k_used == 2
+    deps["retrieval"].abatch_retrieve.assert_awaited_once_with(["a", "c"], top_k=[2, 5])
+
+
+async def test_handle_batch_bounds_generation_concurrency(mock_dependencies):
+    service = QAService()
+    deps = mock_dependencies
+    deps["retrieval"].abatch_retrieve = AsyncMock(side_effect=lambda qs, top_k: [["doc"] for _ in qs])
+    deps["langfuse"].get_prompts.return_value = ("Sys", "RAG {contexto} {question}")
+    deps["langfuse"].tracing.should_sample.return_value = False
+    deps["build_context"].return_value = ""
+    deps["build_citations"].return_value = []
+    deps["count_tokens"].return_value = 1
+
+    running = 0
+    peak = 0
+
+    async def fake_llm(_prompt):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return MagicMock(content="ok")
+
+    deps["llm"].ainvoke = AsyncMock(side_effect=fake_llm)
+
+    with patch("src.services.qa_service.settings.BATCH_MAX_CONCURRENCY", 2):
+        results = await service.handle_batch([QueryRequest(question=f"q{i}") for i in range(6)])
+
+    assert len(results) == 6
+    assert peak == 2
+
+
+async def test_per_request_search_params_reach_retrieval(mock_dependencies):
+    service = QAService()
+    deps = mock_dependencies
+    deps["retrieval"].asearch = AsyncMock(return_value=RetrievalResult(docs=["doc"], dense_latency_ms=1.0))
+    deps["retrieval"].abatch_retrieve = AsyncMock(side_effect=lambda qs, top_k, **_: [["doc"] for _ in qs])
+    deps["langfuse"].get_prompts.return_value = ("Sys", "RAG {contexto} {question}")
+    deps["langfuse"].tracing.should_sample.return_value = False
+    deps["build_context"].return_value = ""
+    deps["build_citations"].return_value = []
+    deps["count_tokens"].return_value = 1
+    deps["llm"].ainvoke = AsyncMock(return_value=MagicMock(content="ok"))
+
+    await service.handle_query(QueryRequest(question="q", top_k=3, hnsw_ef=256))
+    deps["retrieval"].asearch.assert_awaited_once_with("q", top_k=3, hnsw_ef=256)
+
+    # Lote: uma busca por combinação de parâmetros, cada pergunta com os seus
+    await service.handle_batch([
+        QueryRequest(question="a"),
+        QueryRequest(question="b", exact=True),
+        QueryRequest(question="c"),
+    ])
+    calls = deps["retrieval"].abatch_retrieve.await_args_list
+    assert len(calls) == 2
+    assert sorted((call.args[0], call.kwargs) for call in calls) == [
+        (["a", "c"], {"top_k": [5, 5]}),
+        (["b"], {"top_k": [5], "exact": True}),
+    ]
+
+
+async def test_reranking_overfetches_and_keeps_best_top_k(mock_dependencies):
+    from src.utils.reranker import Reranker
+
+    deps = mock_dependencies
+    service = QAService(reranker=Reranker(lexical_weight=0.0, mmr_lambda=1.0))
+    candidates = [
+        Document(page_content=f"doc {i}", metadata={"_vector": [1.0, float(i)]}) for i in range(6)
+    ]
+    deps["retrieval"].aretrieve = AsyncMock(return_value=candidates)
+    deps["langfuse"].get_prompts.return_value = ("Sys", "RAG {contexto} {question}")
+    deps["build_context"].return_value = "ctx"
+    deps["build_citations"].return_value = []
+    deps["count_tokens"].return_value = 1
+    deps["llm"].ainvoke = AsyncMock(return_value=MagicMock(content="ok"))
+
+    with patch("src.services.qa_service.get_embeddings_client") as mock_embeddings:
+        # Pergunta alinhada ao eixo y: os últimos candidatos são os mais relevantes
+        mock_embeddings.return_value.aembed_query = AsyncMock(return_value=[0.0, 1.0])
+        response = await service.handle_query(QueryRequest(question="Pergunta", top_k=2))
 
+    deps["retrieval"].aretrieve.assert_awaited_once_with("Pergunta", top_k=20)
+    docs = deps["build_context"].call_args.args[0]
+    assert [doc.page_content for doc in docs] == ["doc 5", "doc 4"]
+    assert all("_vector" not in doc.metadata for doc in docs)
+    assert response.metrics.rerank_latency_ms is not None
+    assert response.metrics.rerank_fallback is False
@@ -38,3 +38,240 @@ def test_build_citations():
     assert len(citations[1].excerpt) <= 503
     assert citations[1].excerpt.endswith("...")
 
+
+
+def test_semantic_cache_hits_similar_vector_only_in_same_scope():
+    from src.utils.semantic_cache import SemanticAnswerCache
+
+    cache = SemanticAnswerCache(threshold=0.9, max_entries=10)
+    cache.store([1.0, 0.0], version="v1", payload="resposta", scope=5)
+
+    hit = cache.lookup([0.99, 0.05], version="v1", scope=5)
+    assert hit is not None and hit.payload == "resposta"
+    assert hit.similarity > 0.9
+
+    assert cache.lookup([0.0, 1.0], version="v1", scope=5) is None
+    assert cache.lookup([1.0, 0.0], version="v1", scope=3) is None
+
+
+def test_semantic_cache_version_change_invalidates():
+    from src.utils.semantic_cache import SemanticAnswerCache
+
+    cache = SemanticAnswerCache(threshold=0.9, max_entries=10)
+    cache.store([1.0, 0.0], version="v1", payload="resposta")
+
+    assert cache.lookup([1.0, 0.0], version="v2") is None
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_semantic_cache_evicts_least_recently_used_and_expires():
+    from src.utils.semantic_cache import SemanticAnswerCache
+
+    now = [0.0]
+    cache = SemanticAnswerCache(threshold=0.99, max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.store([1.0, 0.0, 0.0], version="v", payload="a")
+    now[0] = 1.0
+    cache.store([0.0, 1.0, 0.0], version="v", payload="b")
+    now[0] = 2.0
+    assert cache.lookup([1.0, 0.0, 0.0], version="v").payload == "a"  # "a" volta a ser recente
+    now[0] = 3.0
+    cache.store([0.0, 0.0, 1.0], version="v", payload="c")  # despeja "b"
+
+    assert cache.lookup([0.0, 1.0, 0.0], version="v") is None
+    assert cache.lookup([0.0, 0.0, 1.0], version="v").payload == "c"
+
+    now[0] = 20.0
+    assert cache.lookup([0.0, 0.0, 1.0], version="v") is None
+
+
+def test_index_version_bump_and_read(tmp_path):
+    from src.utils.index_version import bump_index_version, read_index_version
+
+    path = tmp_path / "index_version"
+    assert read_index_version(path) == "unversioned"
+
+    first = bump_index_version(path)
+    assert read_index_version(path) == first
+
+    second = bump_index_version(path)
+    assert second != first
+    assert read_index_version(path) == second
+
+
+def test_bm25_ranks_exact_terms_and_ignores_accents():
+    from src.utils.bm25 import BM25Index
+
+    index = BM25Index()
+    index.upsert(
+        [
+            Document(page_content="Introdução à análise descritiva de dados", metadata={"source": "a.pdf"}),
+            Document(page_content="Disciplina MAT101: cálculo e álgebra", metadata={"source": "b.pdf"}),
+            Document(page_content="Dados, dados e mais dados", metadata={"source": "c.pdf"}),
+        ],
+        ["a", "b", "c"],
+    )
+
+    top = index.search("mat101", k=3)
+    assert [doc.metadata["_id"] for doc in top] == ["b"]
+    assert top[0].metadata["source"] == "b.pdf" and top[0].metadata["_bm25_score"] > 0
+    assert index.search("ANALISE", k=1)[0].metadata["_id"] == "a"
+    assert [doc.metadata["_id"] for doc in index.search("dados", k=2)] == ["c", "a"]
+    index.close()
+
+
+def test_bm25_upsert_delete_and_persistence(tmp_path):
+    from src.utils.bm25 import BM25Index
+
+    path = tmp_path / "bm25.sqlite3"
+    index = BM25Index(path)
+    reader = BM25Index(path)
+    index.upsert([Document(page_content="gato", metadata={"page": 1}), Document(page_content="cachorro")], ["1", "2"])
+    index.upsert([Document(page_content="peixe")], ["1"])
+    index.delete(["2"])
+    assert index.search("gato", k=5) == [] and index.search("cachorro", k=5) == []
+    # Outro processo (API) só enxerga o que foi confirmado no flush
+    assert len(reader) == 0
+
+    index.flush()
+    assert len(reader) == 1
+    hit = reader.search("peixe", k=5)[0]
+    assert hit.metadata["_id"] == "1" and "page" not in hit.metadata
+    index.close()
+    reloaded = BM25Index(path)
+    assert len(reloaded) == 1
+    assert reloaded.search("peixe", k=5)[0].metadata["_id"] == "1"
+    reader.close()
+    reloaded.close()
+
+
+def test_reranker_mmr_demotes_near_duplicates_and_uses_lexical_overlap():
+    from src.utils.reranker import Reranker
+
+    docs = [
+        Document(page_content="prazo de entrega do trabalho", metadata={"_vector": [1.0, 0.0]}),
+        Document(page_content="prazo de entrega do trabalho final", metadata={"_vector": [0.99, 0.05]}),
+        Document(page_content="critérios de avaliação", metadata={"_vector": [0.7, 0.7]}),
+    ]
+
+    relevance_only = Reranker(lexical_weight=0.0, mmr_lambda=1.0).rerank("prazo", [1.0, 0.0], docs, k=2)
+    diverse = Reranker(lexical_weight=0.0, mmr_lambda=0.3).rerank("prazo", [1.0, 0.0], docs, k=2)
+    lexical = Reranker(lexical_weight=1.0, mmr_lambda=1.0).rerank("avaliação", None, docs, k=1)
+
+    assert [d.page_content for d in relevance_only.docs] == [docs[0].page_content, docs[1].page_content]
+    assert [d.page_content for d in diverse.docs] == [docs[0].page_content, docs[2].page_content]
+    assert lexical.docs[0].page_content == "critérios de avaliação"
+    assert all("_vector" not in d.metadata for d in relevance_only.docs + diverse.docs)
+
+
+def test_reranker_falls_back_to_retrieval_order_when_over_budget():
+    import time
+
+    from src.utils.reranker import Reranker
+
+    docs = [Document(page_content=f"doc {i}", metadata={"_vector": [1.0, float(i)]}) for i in range(4)]
+
+    outcome = Reranker().rerank("doc", [0.0, 1.0], docs, k=2, deadline=time.monotonic() - 1)
+
+    assert outcome.fallback is True
+    assert [d.page_content for d in outcome.docs] == ["doc 0", "doc 1"]
+
+
+def test_context_packer_merges_overlapping_chunks_by_offset_and_text():
+    from src.utils.context_packer import pack_context
+
+    page = "O prazo de entrega do trabalho final é 10/12. A apresentação acontece na semana seguinte."
+    docs = [
+        # Mesma página, chunks com overlap (ordem de relevância invertida)
+        Document(page_content=page[40:], metadata={"source": "a.pdf", "page": 1, "start_index": 40}),
+        Document(page_content=page[:50], metadata={"source": "a.pdf", "page": 1, "start_index": 0}),
+        # Chunks antigos, sem offset: junta pelo texto sobreposto
+        Document(page_content="Avaliação: duas provas e um projeto em grupo", metadata={"source": "b.pdf"}),
+        Document(page_content="duas provas e um projeto em grupo com peso 2", metadata={"source": "b.pdf"}),
+    ]
+
+    packed = pack_context(docs)
+
+    assert [d.page_content for d in packed.docs] == [
+        page,
+        "Avaliação: duas provas e um projeto em grupo com peso 2",
+    ]
+    assert packed.docs[0].metadata["start_index"] == 0 and packed.docs[0].metadata["merged_chunks"] == 2
+    assert packed.tokens_saved > 0 and packed.chunks_dropped == 0
+
+
+def test_context_packer_respects_token_budget_in_relevance_order():
+    from src.utils.context_packer import pack_context
+
+    docs = [Document(page_content=f"trecho {i} " + "x" * 200, metadata={"source": f"{i}.pdf"}) for i in range(4)]
+
+    budget = pack_context(docs[:2]).tokens
+    packed = pack_context(docs, max_tokens=budget)
+
+    assert [d.metadata["source"] for d in packed.docs] == ["0.pdf", "1.pdf"]
+    assert packed.chunks_dropped == 2 and packed.tokens <= budget
+
+    # Nem o primeiro cabe: vai truncado, não vazio
+    only = pack_context(docs[:1], max_tokens=budget // 4)
+    assert len(only.docs) == 1 and 0 < len(only.docs[0].page_content) < len(docs[0].page_content)
+    assert only.tokens <= budget // 4
+
+    # Orçamento menor que o cabeçalho: o trecho fica de fora
+    none = pack_context(docs[:1], max_tokens=2)
+    assert none.docs == [] and none.tokens == 0 and none.chunks_dropped == 1
+
+
+def test_context_packer_sums_token_counts_from_payload():
+    from src.utils.context_packer import pack_context
+
+    docs = [
+        Document(page_content="texto curto", metadata={"source": "a.pdf", "token_count": 50}),
+        Document(page_content="outro texto", metadata={"source": "b.pdf", "token_count": 50}),
+    ]
+
+    packed = pack_context(docs, max_tokens=80)
+
+    # O token_count do payload manda no orçamento, sem recontar o texto
+    assert [d.metadata["source"] for d in packed.docs] == ["a.pdf"]
+    assert packed.docs[0].metadata["token_count"] == 50 and packed.chunks_dropped == 1
+
+
+def test_token_counter_loads_encoder_once_and_counts_in_batch(monkeypatch):
+    import tiktoken
+
+    from src.utils.token_counter import TokenCounter
+
+    class FakeEncoding:
+        def encode_ordinary(self, text):
+            return text.split()
+
+        def encode_ordinary_batch(self, texts):
+            return [text.split() for text in texts]
+
+        def decode(self, tokens):
+            return " ".join(tokens)
+
+    loads = []
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: loads.append(name) or FakeEncoding())
+
+    counter = TokenCounter("fake")
+    assert counter.count_batch(["um dois", "tres", ""]) == [2, 1, 0]
+    assert counter.count("um dois tres") == 3 and counter.count(None) == 0
+    assert counter.truncate("um dois tres", 2) == "um dois"
+    assert loads == ["fake"] and counter.backend == "tiktoken"
+
+
+def test_token_counter_falls_back_to_heuristic(monkeypatch):
+    import tiktoken
+
+    from src.utils.token_counter import TokenCounter
+
+    def unavailable(name):
+        raise ValueError(f"Unknown encoding {name}")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", unavailable)
+
+    counter = TokenCounter("inexistente")
+    assert counter.backend == "heuristic"
+    assert counter.count_batch(["abcdefgh", "abcd"]) == [2, 1]
+    assert counter.truncate("abcdefghij", 2) == "abcdefgh"
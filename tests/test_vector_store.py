@@ -0,0 +1,427 @@
+from types import SimpleNamespace
+from langchain_core.documents import Document
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.core.vector_store_config import VectorStoreConfig
+from src.providers.qdrant_vector_store_provider import QdrantVectorStoreProvider
+
+
+@pytest.fixture
+def qdrant_provider():
+    with patch("src.providers.qdrant_vector_store_provider.QdrantClient"), \
+         patch("src.providers.qdrant_vector_store_provider.AsyncQdrantClient") as mock_async_cls, \
+         patch("src.providers.qdrant_vector_store_provider.QdrantVectorStore") as mock_vs_cls:
+
+        mock_vs = mock_vs_cls.return_value
+        mock_vs.vector_name = ""
+        mock_vs.content_payload_key = "page_content"
+        mock_vs.metadata_payload_key = "metadata"
+
+        emb_client = MagicMock()
+        emb_client.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+
+        provider = QdrantVectorStoreProvider(
+            config=VectorStoreConfig(collection_name="test_docs"),
+            embeddings_client=emb_client,
+        )
+        yield provider, mock_async_cls.return_value, emb_client
+
+
+async def test_qdrant_asimilarity_search(qdrant_provider):
+    provider, async_client, emb_client = qdrant_provider
+    point = SimpleNamespace(
+        id="abc",
+        score=0.8,
+        payload={"page_content": "Texto", "metadata": {"source": "doc.pdf", "page": 1}},
+    )
+    async_client.query_points = AsyncMock(return_value=SimpleNamespace(points=[point]))
+
+    docs = await provider.asimilarity_search("pergunta", k=3)
+
+    emb_client.aembed_query.assert_awaited_once_with("pergunta")
+    assert async_client.query_points.await_args.kwargs["limit"] == 3
+    assert docs[0].page_content == "Texto"
+    assert docs[0].metadata["source"] == "doc.pdf"
+    assert docs[0].metadata["_id"] == "abc"
+    assert docs[0].metadata["score"] == 0.8
+
+
+async def test_qdrant_abatch_similarity_search_uses_batch_api(qdrant_provider):
+    provider, async_client, emb_client = qdrant_provider
+    emb_client.aembed_documents = AsyncMock(return_value=[[0.1, 0.2], [0.3, 0.4]])
+
+    def point(text):
+        return SimpleNamespace(id=text, score=0.5, payload={"page_content": text, "metadata": {"source": "f.pdf"}})
+
+    async_client.query_batch_points = AsyncMock(return_value=[
+        SimpleNamespace(points=[point("a1"), point("a2")]),
+        SimpleNamespace(points=[point("b1")]),
+    ])
+
+    results = await provider.abatch_similarity_search(["qa", "qb"], k=[2, 1])
+
+    emb_client.aembed_documents.assert_awaited_once_with(["qa", "qb"])
+    async_client.query_batch_points.assert_awaited_once()
+    requests = async_client.query_batch_points.await_args.kwargs["requests"]
+    assert [r.limit for r in requests] == [2, 1]
+    assert [[d.page_content for d in docs] for docs in results] == [["a1", "a2"], ["b1"]]
+
+
+def test_qdrant_upsert_and_delete_use_explicit_ids(qdrant_provider):
+    provider, _, _ = qdrant_provider
+    doc = Document(page_content="x", metadata={})
+
+    provider.upsert_documents([doc], ["id-1"])
+    provider._vs.add_documents.assert_called_once_with([doc], ids=["id-1"])
+
+    provider.delete_documents(["id-1"])
+    _, kwargs = provider._client.delete.call_args
+    assert kwargs["collection_name"] == "test_docs"
+    assert kwargs["points_selector"].points == ["id-1"]
+
+
+@pytest.mark.parametrize("mode, expected_type, on_disk", [
+    ("none", None, False),
+    ("scalar", "ScalarQuantization", True),
+    ("binary", "BinaryQuantization", True),
+])
+def test_qdrant_quantization_configs(mode, expected_type, on_disk):
+    from src.providers.qdrant_vector_store_provider import (
+        build_quantization_config, build_search_params, build_vectors_config,
+    )
+
+    config = VectorStoreConfig(quantization=mode, on_disk_vectors=True, oversampling=3.0, rescore=True)
+
+    quantization = build_quantization_config(config)
+    assert (type(quantization).__name__ if quantization is not None else None) == expected_type
+    # Originais em disco só quando há vetores quantizados na RAM
+    assert build_vectors_config(config, 768).on_disk is on_disk
+    params = build_search_params(config)
+    if mode == "none":
+        assert params is None
+    else:
+        assert params.quantization.oversampling == 3.0 and params.quantization.rescore is True
+
+
+async def test_qdrant_quantized_search_uses_oversampling_and_rescore():
+    with patch("src.providers.qdrant_vector_store_provider.QdrantClient"), \
+         patch("src.providers.qdrant_vector_store_provider.AsyncQdrantClient") as mock_async_cls, \
+         patch("src.providers.qdrant_vector_store_provider.QdrantVectorStore") as mock_vs_cls:
+        mock_vs_cls.return_value.vector_name = ""
+        emb_client = MagicMock()
+        emb_client.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+        provider = QdrantVectorStoreProvider(
+            config=VectorStoreConfig(collection_name="test_docs", quantization="scalar", oversampling=2.0),
+            embeddings_client=emb_client,
+        )
+        async_client = mock_async_cls.return_value
+        async_client.query_points = AsyncMock(return_value=SimpleNamespace(points=[]))
+
+        await provider.asimilarity_search("pergunta", k=3)
+        provider.similarity_search("pergunta", k=3)
+
+    params = async_client.query_points.await_args.kwargs["search_params"]
+    assert params.quantization.oversampling == 2.0 and params.quantization.rescore is True
+    assert provider._vs.similarity_search_with_score.call_args.kwargs["search_params"] is params
+
+
+@pytest.mark.parametrize("prefer_grpc", [False, True])
+def test_qdrant_clients_share_connection_options(prefer_grpc):
+    with patch("src.providers.qdrant_vector_store_provider.QdrantClient") as mock_cls, \
+         patch("src.providers.qdrant_vector_store_provider.AsyncQdrantClient") as mock_async_cls, \
+         patch("src.providers.qdrant_vector_store_provider.QdrantVectorStore") as mock_vs_cls:
+        config = VectorStoreConfig(prefer_grpc=prefer_grpc, grpc_port=6334, timeout=3, pool_size=4)
+        provider = QdrantVectorStoreProvider(config=config, embeddings_client=MagicMock())
+        # Só o cliente assíncrono (buscas); o síncrono nasce no primeiro uso e é reaproveitado
+        mock_cls.assert_not_called()
+        provider.delete_documents(["a"])
+        provider.as_retriever(k=3)
+
+    mock_cls.assert_called_once()
+    kwargs = mock_cls.call_args.kwargs
+    assert mock_async_cls.call_args.kwargs == kwargs
+    assert mock_vs_cls.call_args.kwargs["client"] is mock_cls.return_value
+    assert kwargs["prefer_grpc"] is prefer_grpc and kwargs["timeout"] == 3
+    if prefer_grpc:
+        assert kwargs["pool_size"] == 4 and "limits" not in kwargs
+    else:
+        # REST: conexões keep-alive mesmo em localhost
+        assert kwargs["limits"].max_keepalive_connections == 4 and "pool_size" not in kwargs
+
+
+async def test_qdrant_per_request_hnsw_ef_and_exact(qdrant_provider):
+    provider, async_client, _ = qdrant_provider
+    async_client.query_points = AsyncMock(return_value=SimpleNamespace(points=[]))
+
+    await provider.asimilarity_search("pergunta", k=3)
+    assert async_client.query_points.await_args.kwargs["search_params"] is None
+
+    await provider.asimilarity_search("pergunta", k=3, hnsw_ef=256)
+    params = async_client.query_points.await_args.kwargs["search_params"]
+    assert params.hnsw_ef == 256 and not params.exact
+
+    await provider.asimilarity_search("pergunta", k=3, exact=True)
+    assert async_client.query_points.await_args.kwargs["search_params"].exact is True
+
+
+def _local_provider(tmp_path, mmap=False):
+    from src.providers.local_vector_store_provider import LocalVectorStoreProvider
+
+    emb_client = MagicMock()
+    vectors = {"gato": [1.0, 0.0, 0.0], "cachorro": [0.0, 1.0, 0.0], "peixe": [0.0, 0.0, 1.0]}
+    emb_client.embed_query.side_effect = lambda text: vectors[text]
+    emb_client.aembed_query = AsyncMock(side_effect=lambda text: vectors[text])
+    emb_client.aembed_documents = AsyncMock(side_effect=lambda texts: [vectors[t] for t in texts])
+    config = VectorStoreConfig(collection_name="test_docs", local_path=str(tmp_path), local_mmap=mmap)
+    return LocalVectorStoreProvider(config=config, embeddings_client=emb_client)
+
+
+def _docs(*texts):
+    return [Document(page_content=text, metadata={"source": f"{text}.pdf"}) for text in texts]
+
+
+def test_local_search_returns_top_k_with_scores(tmp_path):
+    provider = _local_provider(tmp_path)
+    provider.upsert_vectors(
+        _docs("gato", "felino", "cachorro"),
+        [[1.0, 0.0, 0.0], [2.0, 0.5, 0.0], [0.0, 3.0, 0.0]],
+        ["1", "2", "3"],
+    )
+
+    docs = provider.similarity_search("gato", k=2)
+
+    assert [doc.page_content for doc in docs] == ["gato", "felino"]
+    assert docs[0].metadata["score"] == pytest.approx(1.0)
+    assert docs[1].metadata["score"] == pytest.approx(2.0 / (4.25 ** 0.5))
+    assert docs[0].metadata["_id"] == "1"
+    assert docs[0].metadata["source"] == "gato.pdf"
+    assert len(provider.similarity_search("gato", k=10)) == 3
+
+
+async def test_local_async_and_batch_search(tmp_path):
+    provider = _local_provider(tmp_path)
+    provider.upsert_vectors(_docs("a", "b"), [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], ["a", "b"])
+
+    single = await provider.asimilarity_search("cachorro", k=1)
+    batch = await provider.abatch_similarity_search(["gato", "cachorro"], k=[2, 1])
+
+    assert [doc.page_content for doc in single] == ["b"]
+    assert [[doc.page_content for doc in docs] for docs in batch] == [["a", "b"], ["b"]]
+    # Busca já exata: os ajustes do HNSW são aceitos e ignorados
+    assert await provider.asimilarity_search("cachorro", k=1, hnsw_ef=64, exact=True) == single
+    assert await provider.abatch_similarity_search(["gato", "cachorro"], k=[2, 1], exact=True) == batch
+
+
+def test_local_upsert_replaces_and_delete_keeps_matrix_contiguous(tmp_path):
+    provider = _local_provider(tmp_path)
+    provider.upsert_vectors(
+        _docs("a", "b", "c"), [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]], ["a", "b", "c"]
+    )
+    provider.upsert_vectors(_docs("b2"), [[1.0, 0.0, 0.0]], ["b"])
+    provider.delete_documents(["a", "inexistente"])
+
+    assert provider.size == 2
+    assert [doc.page_content for doc in provider.similarity_search("gato", k=1)] == ["b2"]
+    assert [doc.page_content for doc in provider.similarity_search("peixe", k=1)] == ["c"]
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_local_store_persists_on_flush(tmp_path, mmap):
+    writer = _local_provider(tmp_path)
+    writer.upsert_vectors(_docs("a", "b"), [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], ["a", "b"])
+    assert _local_provider(tmp_path).size == 0
+
+    writer.flush()
+    reader = _local_provider(tmp_path, mmap=mmap)
+    assert reader.size == 2
+    assert [doc.page_content for doc in reader.similarity_search("cachorro", k=1)] == ["b"]
+
+    # Escrita a partir do índice carregado (copia o memmap para a RAM)
+    reader.delete_documents(["b"])
+    reader.flush()
+    assert [doc.metadata["_id"] for doc in writer.similarity_search("cachorro", k=5)] == ["a"]
+
+
+def test_local_store_publishes_versions_atomically(tmp_path):
+    writer = _local_provider(tmp_path)
+    writer.upsert_vectors(_docs("a", "b"), [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], ["a", "b"])
+    writer.flush()
+    reader = _local_provider(tmp_path)
+    for point_id in ("c", "d"):
+        writer.upsert_vectors(_docs(point_id), [[0.0, 0.0, 1.0]], [point_id])
+        writer.flush()
+
+    # Só a versão publicada e a anterior ficam em disco
+    collection = tmp_path / "test_docs"
+    assert len(list(collection.glob("vectors-*.npy"))) == len(list(collection.glob("payload-*.json"))) == 2
+    assert reader.size == 2 and len(reader.similarity_search("peixe", k=5)) == 4
+
+    # Ponteiro para uma versão já apagada (flush concorrente): mantém o estado carregado
+    (collection / "current.json").write_text('{"version": "apagada"}', encoding="utf-8")
+    assert len(reader.similarity_search("peixe", k=5)) == 4
+
+
+def test_local_langchain_store_from_texts_and_kwargs(tmp_path):
+    from langchain_core.embeddings import Embeddings
+    from src.providers.local_vector_store_provider import _LocalLangChainStore
+
+    class FakeEmbeddings(Embeddings):
+        vectors = {"gato": [1.0, 0.0, 0.0], "cachorro": [0.0, 1.0, 0.0]}
+
+        def embed_documents(self, texts):
+            return [self.vectors[text] for text in texts]
+
+        def embed_query(self, text):
+            return self.vectors[text]
+
+    config = VectorStoreConfig(backend="local", collection_name="test_docs", local_path=str(tmp_path))
+    store = _LocalLangChainStore.from_texts(
+        ["gato", "cachorro"], FakeEmbeddings(), metadatas=[{"n": 1}, {"n": 2}], ids=["g", "c"], config=config
+    )
+
+    assert [doc.metadata["_id"] for doc in store.as_retriever(search_kwargs={"k": 1}).invoke("cachorro")] == ["c"]
+    assert _local_provider(tmp_path).size == 2
+    with pytest.raises(TypeError, match="filter"):
+        store.similarity_search("gato", filter={"n": 1})
+
+
+def test_local_store_selected_by_backend(tmp_path, monkeypatch):
+    from src.clients import vector_store_client
+    from src.providers.local_vector_store_provider import LocalVectorStoreProvider
+
+    monkeypatch.setattr(vector_store_client, "get_embeddings_client", MagicMock())
+    monkeypatch.setattr(vector_store_client, "VectorStoreConfig", lambda: VectorStoreConfig(
+        backend="local", local_path=str(tmp_path),
+    ))
+
+    assert isinstance(vector_store_client._build_provider_from_env(), LocalVectorStoreProvider)
+
+
+def _doc(point_id, text=None):
+    return Document(page_content=text or point_id, metadata={"_id": point_id})
+
+
+def test_score_threshold_keeps_relevant_chunks_or_nothing():
+    from src.clients.retrieval_client import apply_score_threshold
+
+    dense_hit = Document(page_content="a", metadata={"score": 0.82})
+    weak = Document(page_content="b", metadata={"score": 0.31})
+    bm25_only = Document(page_content="c", metadata={"_bm25_score": 4.2})
+
+    assert apply_score_threshold([dense_hit, weak, bm25_only], 0.5) == [dense_hit, bm25_only]
+    # Nenhum chunk denso passou: o BM25 sozinho não segura o contexto
+    assert apply_score_threshold([weak, bm25_only], 0.5) == []
+    assert apply_score_threshold([weak], 0.0) == [weak]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    from src.clients.retrieval_client import reciprocal_rank_fusion
+
+    dense = [_doc("a"), _doc("b"), _doc("c")]
+    sparse = [_doc("c"), _doc("d"), _doc("a")]
+
+    fused = reciprocal_rank_fusion([dense, sparse], k=3, rrf_k=60)
+
+    assert [doc.metadata["_id"] for doc in fused] == ["a", "c", "b"]
+    assert fused[0].metadata["_rrf_score"] == pytest.approx(1 / 61 + 1 / 63)
+
+
+async def test_hybrid_retrieval_runs_dense_and_sparse_and_reports_stages():
+    from src.clients.retrieval_client import RetrievalClient
+    from src.clients.vector_store_client import VectorStoreClient
+    from src.utils.bm25 import BM25Index
+
+    provider = MagicMock()
+    provider.asimilarity_search = AsyncMock(return_value=[_doc("semantico"), _doc("comum")])
+    provider.abatch_similarity_search = AsyncMock(return_value=[[_doc("semantico"), _doc("comum")]])
+    sparse_index = BM25Index()
+    vs_client = VectorStoreClient(provider, sparse_index=sparse_index)
+    with patch("src.clients.vector_store_client.bump_index_version"):
+        vs_client.upsert_vectors(
+            [Document(page_content="código MAT101"), Document(page_content="comum MAT101 outro texto")],
+            [[0.0], [0.0]],
+            ["exato", "comum"],
+        )
+
+    client = RetrievalClient(vs_client, mode="hybrid")
+    result = await client.asearch("MAT101", top_k=2)
+
+    # "comum" aparece nas duas buscas: sobe para o topo
+    assert [doc.metadata["_id"] for doc in result.docs] == ["comum", "semantico"]
+    assert result.sparse_latency_ms is not None and result.fusion_latency_ms is not None
+    assert provider.asimilarity_search.await_args.kwargs["k"] >= 2
+
+    batch = await client.abatch_retrieve(["MAT101"], top_k=[3])
+    assert {doc.metadata["_id"] for doc in batch[0]} == {"comum", "semantico", "exato"}
+
+    dense_only = await RetrievalClient(vs_client, mode="dense").asearch("MAT101", top_k=2)
+    assert dense_only.sparse_latency_ms is None
+    sparse_index.close()
+
+
+async def test_search_params_reach_provider_through_clients():
+    from src.clients.retrieval_client import RetrievalClient
+    from src.clients.vector_store_client import VectorStoreClient
+
+    provider = MagicMock()
+    provider.asimilarity_search = AsyncMock(return_value=[])
+    provider.abatch_similarity_search = AsyncMock(return_value=[[]])
+    client = RetrievalClient(VectorStoreClient(provider), mode="dense")
+
+    await client.asearch("pergunta", top_k=3, hnsw_ef=128)
+    assert provider.asimilarity_search.await_args.kwargs == {
+        "k": 3, "with_vectors": False, "hnsw_ef": 128, "exact": None,
+    }
+    await client.abatch_retrieve(["pergunta"], top_k=[3], exact=True)
+    assert provider.abatch_similarity_search.await_args.kwargs == {
+        "k": [3], "with_vectors": False, "hnsw_ef": None, "exact": True,
+    }
+
+
+def test_vector_store_client_keeps_sparse_index_in_sync():
+    from src.clients.vector_store_client import VectorStoreClient
+    from src.utils.bm25 import BM25Index
+
+    sparse_index = BM25Index()
+    vs_client = VectorStoreClient(MagicMock(), sparse_index=sparse_index)
+    with patch("src.clients.vector_store_client.bump_index_version"):
+        vs_client.upsert([Document(page_content="gato")], ["1"])
+        vs_client.upsert_vectors([Document(page_content="cachorro")], [[0.0]], ["2"])
+        vs_client.delete(["1"])
+
+    assert len(sparse_index) == 1
+    assert sparse_index.search("cachorro", k=1)[0].metadata["_id"] == "2"
+    sparse_index.close()
+
+
+def test_vector_store_client_bumps_index_version_once_per_flush():
+    from src.clients.vector_store_client import VectorStoreClient
+
+    vs_client = VectorStoreClient(MagicMock())
+    with patch("src.clients.vector_store_client.bump_index_version") as bump:
+        for point_id in ("1", "2", "3"):
+            vs_client.upsert_vectors([Document(page_content=point_id)], [[0.0]], [point_id])
+        bump.assert_not_called()
+
+        vs_client.flush()
+        vs_client.flush()
+        assert bump.call_count == 1
+
+        vs_client.delete(["1"])
+        assert bump.call_count == 2
+
+
+async def test_search_can_return_stored_vectors_for_reranking(tmp_path, qdrant_provider):
+    local = _local_provider(tmp_path)
+    local.upsert_vectors(_docs("a"), [[2.0, 0.0, 0.0]], ["a"])
+    assert (await local.asimilarity_search("gato", k=1, with_vectors=True))[0].metadata["_vector"] == [1.0, 0.0, 0.0]
+    assert "_vector" not in (await local.asimilarity_search("gato", k=1))[0].metadata
+
+    provider, async_client, _ = qdrant_provider
+    point = SimpleNamespace(id="p", score=0.9, vector={"": [0.3, 0.4]}, payload={"page_content": "t", "metadata": {}})
+    async_client.query_points = AsyncMock(return_value=SimpleNamespace(points=[point]))
+    docs = await provider.asimilarity_search("q", k=1, with_vectors=True)
+    assert async_client.query_points.await_args.kwargs["with_vectors"] is True
+    assert docs[0].metadata["_vector"] == [0.3, 0.4]